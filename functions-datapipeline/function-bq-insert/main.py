@@ -2,11 +2,15 @@ import functions_framework
 import datetime
 import json
 import logging
+import time
+from dataclasses import dataclass
+from typing import Optional
 
 from src.config import Config
 from src.repositories.bigquery_repository import BigQueryRepository
 from src.repositories.nodeai_repository import NodeaiRepository
 from src.repositories.cloud_storage_repository import CloudStorageRepository
+from src.repositories.http_client import ResilientHttpClient
 from src.services.inference_service import InferenceService
 
 
@@ -40,6 +44,20 @@ def setup_logging():
 setup_logging()
 
 
+@dataclass
+class _WarmResources:
+    """ウォームインスタンスで再利用する検証済みの設定とリポジトリ（クライアントを含む）"""
+
+    config: Config
+    bigquery_repository: BigQueryRepository
+    nodeai_repository: NodeaiRepository
+    cloud_storage_repository: CloudStorageRepository
+    created_at: float
+
+
+_warm_resources: Optional[_WarmResources] = None
+
+
 # Cloud Functions Entry Point
 @functions_framework.http
 def insert_inference_result(request):
@@ -70,32 +88,45 @@ def insert_inference_result(request):
     }
 
     try:
-        # 設定読み込みと検証
-        logger.info("設定読み込み中...")
-        config = Config.from_environment()
-        
-        # 設定検証
-        validation_error = _validate_config(config)
-        if validation_error:
-            return _create_error_response(validation_error, 400, headers, request_start_time, logger)
-        
-        logger.info("設定検証完了")
-
-        # 依存関係の構築
-        bigquery_repository = BigQueryRepository(config)
-        nodeai_repository = NodeaiRepository(config)
-        cloud_storage_repository = CloudStorageRepository(config)
+        # 設定と依存関係（ウォームインスタンスでは有効期限内のものを再利用）
+        resources = _get_warm_resources()
+        if resources is None:
+            # 設定読み込みと検証
+            logger.info("設定読み込み中...")
+            config = Config.from_environment()
+            
+            # 設定検証
+            validation_error = _validate_config(config)
+            if validation_error:
+                return _create_error_response(validation_error, 400, headers, request_start_time, logger)
+            
+            logger.info("設定検証完了")
+            resources = _build_warm_resources(config)
+        else:
+            logger.info("キャッシュ済みの設定とクライアントを再利用します")
         
         # サービスの作成
         inference_service = InferenceService(
-            bigquery_repository=bigquery_repository,
-            nodeai_repository=nodeai_repository,
-            cloud_storage_repository=cloud_storage_repository
+            bigquery_repository=resources.bigquery_repository,
+            nodeai_repository=resources.nodeai_repository,
+            cloud_storage_repository=resources.cloud_storage_repository,
+            ingest_all_results=resources.config.ingest_all_results,
+            source=resources.config.source,
+            stream_payload=resources.config.stream_payload,
+            payload_chunk_bytes=resources.config.payload_chunk_kb * 1024,
+            tail_window_rows=resources.config.tail_window_rows
         )
 
         # 推論処理とBigQuery挿入
         logger.info("推論処理とBigQuery挿入を開始")
         result = inference_service.process_inference()
+        
+        # 書き溜めた行の明示的な反映（バッチロード方式のみ。?flush=true で指定）
+        if request.args.get("flush") == "true":
+            result["batch_load_flush"] = resources.bigquery_repository.flush()
+        if result.get("bigquery_insert") == "failed":
+            # スキーマ変更・権限エラーなどの可能性があるため、次回はクライアントから作り直す
+            _invalidate_warm_resources("BigQuery挿入の失敗")
 
         # 成功レスポンス
         request_elapsed = (datetime.datetime.now(jst) - request_start_time).total_seconds()
@@ -107,13 +138,15 @@ def insert_inference_result(request):
             "message": "推論結果のBigQuery挿入が完了しました",
             "status": "success",
             "processing_time_seconds": round(request_elapsed, 2),
-            **result
+            **result,
+            "nodeai_http": ResilientHttpClient.get_metrics(),
         }
 
         return (json.dumps(response_data, ensure_ascii=False), 200, headers)
 
     except ValueError as e:
         # 設定エラー（400 Bad Request）
+        _invalidate_warm_resources("設定エラー")
         return _create_error_response(
             f"設定エラー: {str(e)}", 
             400, 
@@ -125,6 +158,7 @@ def insert_inference_result(request):
 
     except Exception as e:
         # その他のエラー（500 Internal Server Error）
+        _invalidate_warm_resources("内部エラー")
         return _create_error_response(
             f"内部エラーが発生しました: {str(e)}", 
             500, 
@@ -135,6 +169,56 @@ def insert_inference_result(request):
         )
 
 
+def _get_warm_resources() -> Optional[_WarmResources]:
+    """有効期限内のキャッシュ済みリソースを取得（存在しない・期限切れの場合はNone）"""
+    resources = _warm_resources
+    if resources is None:
+        return None
+    if time.monotonic() - resources.created_at >= resources.config.resource_cache_ttl_seconds:
+        _invalidate_warm_resources("有効期限切れ")
+        return None
+    return resources
+
+
+def _build_warm_resources(config: Config) -> _WarmResources:
+    """検証済みの設定からリポジトリを作成してキャッシュ"""
+    global _warm_resources
+    resources = _WarmResources(
+        config=config,
+        bigquery_repository=_create_bigquery_repository(config),
+        nodeai_repository=NodeaiRepository(config),
+        cloud_storage_repository=CloudStorageRepository(config),
+        created_at=time.monotonic(),
+    )
+    if config.resource_cache_ttl_seconds > 0:
+        _warm_resources = resources
+    return resources
+
+
+def _create_bigquery_repository(config: Config) -> BigQueryRepository:
+    """書き込み方式に応じたBigQueryリポジトリを作成"""
+    if config.bigquery_write_mode == "insert_rows":
+        return BigQueryRepository(config)
+    if config.bigquery_write_mode == "batch_load":
+        from src.repositories.bigquery_load_repository import BigQueryLoadRepository, LocalLoadRepository
+        if config.batch_load_local_path:
+            return LocalLoadRepository(config, config.batch_load_local_path)
+        return BigQueryLoadRepository(config)
+    # Storage Write API のライブラリは使う場合のみ読み込む
+    from src.repositories.bigquery_write_repository import BigQueryWriteRepository
+    return BigQueryWriteRepository(config)
+
+
+def _invalidate_warm_resources(reason: str) -> None:
+    """キャッシュ済みリソースを破棄（次回のリクエストで作り直す）"""
+    global _warm_resources
+    if _warm_resources is not None:
+        logging.getLogger(f"{__name__}._invalidate_warm_resources").info(
+            f"キャッシュ済みの設定とクライアントを破棄します: {reason}"
+        )
+    _warm_resources = None
+
+
 def _validate_config(config: Config) -> str:
     """設定の検証"""
     try:
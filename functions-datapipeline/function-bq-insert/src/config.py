@@ -22,6 +22,35 @@ class Config:
     gcs_bucket_name: str
     gcs_file_name: str
 
+    # NodeAI APIの通信設定
+    nodeai_connect_timeout_seconds: float = 5.0
+    nodeai_read_timeout_seconds: float = 60.0
+    nodeai_max_retries: int = 2
+    nodeai_circuit_failure_threshold: int = 5
+    nodeai_circuit_reset_seconds: float = 60.0
+
+    # リクエストボディのストリーミング設定
+    stream_payload: bool = False
+    payload_chunk_kb: int = 1024
+    tail_window_rows: int = 0
+
+    # NodeAI APIの全ての推論結果を取り込む設定
+    # （挿入IDによる重複排除は insert_rows のみ。他の書き込み方式ではウォーターマークのみで重複を防ぐ）
+    ingest_all_results: bool = False
+    source: str = ""
+
+    # ウォームインスタンスで設定・クライアントを再利用する時間（秒、0で再利用しない）
+    resource_cache_ttl_seconds: int = 900
+
+    # BigQuery書き込み方式（insert_rows / default_stream / committed_stream / batch_load）
+    bigquery_write_mode: str = "insert_rows"
+    bigquery_write_batch_rows: int = 10000
+
+    # バッチロード設定
+    batch_load_flush_mb: int = 64
+    batch_load_flush_seconds: int = 3600
+    batch_load_local_path: str = ""
+
     @classmethod
     def from_environment(cls) -> "Config":
         """環境変数から設定を読み込み"""
@@ -37,6 +66,22 @@ class Config:
             tc_data_delay_minutes=int(os.environ.get("TC_DATA_DELAY_MINUTES", "5")),
             gcs_bucket_name=os.environ.get("GCS_BUCKET_NAME", ""),
             gcs_file_name=os.environ.get("GCS_FILE_NAME", ""),
+            nodeai_connect_timeout_seconds=float(os.environ.get("NODEAI_CONNECT_TIMEOUT_SECONDS", "5")),
+            nodeai_read_timeout_seconds=float(os.environ.get("NODEAI_READ_TIMEOUT_SECONDS", "60")),
+            nodeai_max_retries=int(os.environ.get("NODEAI_MAX_RETRIES", "2")),
+            nodeai_circuit_failure_threshold=int(os.environ.get("NODEAI_CIRCUIT_FAILURE_THRESHOLD", "5")),
+            nodeai_circuit_reset_seconds=float(os.environ.get("NODEAI_CIRCUIT_RESET_SECONDS", "60")),
+            stream_payload=os.environ.get("STREAM_PAYLOAD", "false").lower() == "true",
+            payload_chunk_kb=int(os.environ.get("PAYLOAD_CHUNK_KB", "1024")),
+            tail_window_rows=int(os.environ.get("TAIL_WINDOW_ROWS", "0")),
+            ingest_all_results=os.environ.get("INGEST_ALL_RESULTS", "false").lower() == "true",
+            source=os.environ.get("SOURCE", ""),
+            resource_cache_ttl_seconds=int(os.environ.get("RESOURCE_CACHE_TTL_SECONDS", "900")),
+            bigquery_write_mode=os.environ.get("BIGQUERY_WRITE_MODE", "insert_rows"),
+            bigquery_write_batch_rows=int(os.environ.get("BIGQUERY_WRITE_BATCH_ROWS", "10000")),
+            batch_load_flush_mb=int(os.environ.get("BATCH_LOAD_FLUSH_MB", "64")),
+            batch_load_flush_seconds=int(os.environ.get("BATCH_LOAD_FLUSH_SECONDS", "3600")),
+            batch_load_local_path=os.environ.get("BATCH_LOAD_LOCAL_PATH", ""),
         )
 
     def validate(self) -> None:
@@ -58,6 +103,28 @@ class Config:
         if not self.gcs_bucket_name:
             raise ValueError("GCS_BUCKET_NAME環境変数が設定されていません")
         # GCS_FILE_NAMEは空でも可（空の場合はtimeseries_dataプレフィックスで最新ファイルを検索）
+        if self.nodeai_connect_timeout_seconds <= 0 or self.nodeai_read_timeout_seconds <= 0:
+            raise ValueError("NODEAI_CONNECT_TIMEOUT_SECONDSとNODEAI_READ_TIMEOUT_SECONDSは0より大きい必要があります")
+        if self.nodeai_max_retries < 0:
+            raise ValueError("NODEAI_MAX_RETRIESは0以上である必要があります")
+        if self.nodeai_circuit_failure_threshold <= 0:
+            raise ValueError("NODEAI_CIRCUIT_FAILURE_THRESHOLDは1以上である必要があります")
+        if self.payload_chunk_kb <= 0:
+            raise ValueError("PAYLOAD_CHUNK_KBは1以上である必要があります")
+        if self.tail_window_rows < 0:
+            raise ValueError("TAIL_WINDOW_ROWSは0以上である必要があります")
+        if self.ingest_all_results and not self.source:
+            raise ValueError("INGEST_ALL_RESULTSを有効にする場合はSOURCE環境変数が必要です")
+        if self.resource_cache_ttl_seconds < 0:
+            raise ValueError("RESOURCE_CACHE_TTL_SECONDSは0以上である必要があります")
+        if self.bigquery_write_mode not in ("insert_rows", "default_stream", "committed_stream", "batch_load"):
+            raise ValueError(
+                "BIGQUERY_WRITE_MODEはinsert_rows, default_stream, committed_stream, batch_loadのいずれかである必要があります"
+            )
+        if self.bigquery_write_batch_rows <= 0:
+            raise ValueError("BIGQUERY_WRITE_BATCH_ROWSは1以上である必要があります")
+        if self.batch_load_flush_mb < 0 or self.batch_load_flush_seconds < 0:
+            raise ValueError("BATCH_LOAD_FLUSH_MBとBATCH_LOAD_FLUSH_SECONDSは0以上である必要があります")
     
     def get_env_var(self, key: str) -> str:
         """環境変数を取得"""
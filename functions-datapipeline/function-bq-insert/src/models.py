@@ -1,6 +1,7 @@
+import hashlib
 from dataclasses import dataclass
-from datetime import datetime
-from typing import Any, Dict
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
 
 
 @dataclass
@@ -9,6 +10,16 @@ class InferenceResult:
     
     timestamp: datetime
     inference_value: float
+    source: Optional[str] = None
+    
+    @property
+    def insert_id(self) -> Optional[str]:
+        """(source, timestamp) から決まる挿入ID（source がない場合はNone）"""
+        if self.source is None:
+            return None
+        timestamp = self.timestamp if self.timestamp.tzinfo else self.timestamp.replace(tzinfo=timezone.utc)
+        key = f"{self.source}|{timestamp.astimezone(timezone.utc).isoformat()}"
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
     
     def to_dict(self) -> Dict[str, Any]:
         """BigQuery挿入用の辞書に変換"""
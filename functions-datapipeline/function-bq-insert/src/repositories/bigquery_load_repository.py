@@ -0,0 +1,400 @@
+import datetime
+import hashlib
+import json
+import logging
+import os
+import uuid
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from google.cloud import bigquery
+from google.cloud.exceptions import Conflict, NotFound, PreconditionFailed
+
+from ..config import Config
+from ..models import InferenceResult
+from .bigquery_repository import BigQueryRepository
+
+
+@dataclass
+class StagedFile:
+    """書き込み待ちのNDJSONファイル"""
+
+    name: str
+    partition: str
+    size_bytes: int
+    created_at: datetime.datetime
+
+
+class BigQueryLoadRepository(BigQueryRepository):
+    """
+    推論結果をGCSのNDJSONに書き溜め、ロードジョブでまとめてBigQueryに反映するリポジトリ
+
+    行はパーティション（UTCの日付）ごとに bigquery_staging/{dataset}.{table}/{YYYYMMDD}/ 配下の
+    NDJSONとして保存する。書き溜めた合計サイズか最も古いファイルの経過時間が閾値を超えた場合、
+    または flush() の呼び出し時に、パーティションごとに1つのロードジョブ（パーティションデコレータ指定）を実行し、
+    反映したファイルを削除する。
+    ロードの前に対象ファイルを記録したマニフェスト（{prefix}/_manifests/{YYYYMMDD}.json）を
+    存在しない場合のみ作成する条件付き書き込みで作成し、パーティションを確保する。同時に反映しようとした
+    別のインスタンスは既存のマニフェストの内容を引き継ぐため、同じファイルが別々のジョブで反映されることはない。
+    ジョブIDはマニフェストから決まるため、削除前に中断して再実行しても二重に反映されない（既存ジョブの結果を使う）。
+    マニフェストは対象ファイルの削除後に、読み込んだ世代を指定して削除する。
+    """
+
+    STAGING_PREFIX = "bigquery_staging"
+    MANIFEST_DIRECTORY = "_manifests"
+    # 1ロードジョブのソースURI数の上限
+    MAX_LOAD_URIS = 10000
+
+    def __init__(self, config: Config):
+        super().__init__(config)
+        from google.cloud import storage
+
+        self.storage_client = storage.Client(project=config.project_id)
+        self.bucket = self.storage_client.bucket(config.gcs_bucket_name)
+        self._init_staging(config)
+
+    def _init_staging(self, config: Config) -> None:
+        """書き溜めの設定を初期化"""
+        self.staging_prefix = f"{self.STAGING_PREFIX}/{config.dataset_id}.{config.table_id}"
+        self.flush_bytes = config.batch_load_flush_mb * 1024 * 1024
+        self.flush_seconds = config.batch_load_flush_seconds
+
+    def insert_inference_results(self, results: List[InferenceResult]) -> bool:
+        """推論結果を書き溜め、閾値を超えていればBigQueryに反映"""
+        if not results:
+            self.logger.warning("挿入するデータがありません")
+            return True
+
+        try:
+            self.stage(results)
+            self.flush_if_due()
+            return True
+
+        except Exception as e:
+            self.logger.error(f"バッチロード処理中にエラーが発生: {str(e)}")
+            return False
+
+    def stage(self, results: List[InferenceResult]) -> List[str]:
+        """
+        推論結果をパーティションごとのNDJSONとして保存
+
+        Returns:
+            保存したファイル名
+        """
+        partitions: Dict[str, List[str]] = {}
+        for result in results:
+            partition = _partition_of(result.timestamp)
+            partitions.setdefault(partition, []).append(json.dumps(result.to_dict(), ensure_ascii=False))
+
+        created = datetime.datetime.now(datetime.timezone.utc).strftime("%Y%m%dT%H%M%S")
+        names = []
+        for partition, lines in partitions.items():
+            name = f"{self.staging_prefix}/{partition}/{created}_{uuid.uuid4().hex}.ndjson"
+            self._put_staged(name, ("\n".join(lines) + "\n").encode("utf-8"))
+            names.append(name)
+        self.logger.info(f"{len(results)}件を{len(names)}ファイルに書き溜めました")
+        return names
+
+    def flush_if_due(self) -> Optional[Dict]:
+        """書き溜めた合計サイズか最も古いファイルの経過時間が閾値を超えていれば反映"""
+        staged = self._list_staged()
+        if not staged:
+            return None
+        total_bytes = sum(staged_file.size_bytes for staged_file in staged)
+        oldest = min(staged_file.created_at for staged_file in staged)
+        age_seconds = (datetime.datetime.now(datetime.timezone.utc) - oldest).total_seconds()
+        if total_bytes < self.flush_bytes and age_seconds < self.flush_seconds:
+            self.logger.info(
+                f"書き込み待ち: {len(staged)}ファイル, {total_bytes} bytes, 最古 {age_seconds:.0f}秒前"
+            )
+            return None
+        return self._flush_staged(staged, replace_partitions=False)
+
+    def flush(self, replace_partitions: bool = False) -> Optional[Dict]:
+        """
+        書き溜めた行をパーティションごとのロードジョブで反映
+
+        Args:
+            replace_partitions: 書き溜めた行で対象パーティションを置き換える（WRITE_TRUNCATE。バックフィル用）
+
+        Returns:
+            反映結果の辞書（書き込み待ちがない場合はNone）
+        """
+        staged = self._list_staged()
+        if not staged:
+            return None
+        return self._flush_staged(staged, replace_partitions)
+
+    def _flush_staged(self, staged: List[StagedFile], replace_partitions: bool) -> Dict:
+        """パーティションごとにロードジョブを実行し、反映したファイルを削除"""
+        self.ensure_table_exists()
+        partitions: Dict[str, List[StagedFile]] = {}
+        for staged_file in staged:
+            partitions.setdefault(staged_file.partition, []).append(staged_file)
+
+        jobs = []
+        for partition, files in sorted(partitions.items()):
+            names = sorted(staged_file.name for staged_file in files)
+            if replace_partitions and len(names) > self.MAX_LOAD_URIS:
+                raise ValueError(f"パーティション {partition} のファイル数が多すぎるため置き換えできません")
+            for start in range(0, len(names), self.MAX_LOAD_URIS):
+                job = self._load_claimed(partition, names[start:start + self.MAX_LOAD_URIS], replace_partitions)
+                jobs.append(job)
+                if job["resumed"]:
+                    # 別のインスタンスのマニフェストを引き継いだ場合、残りのファイルは次回の反映で扱う
+                    break
+
+        row_count = sum(job["rows"] or 0 for job in jobs)
+        file_count = sum(job["files"] for job in jobs)
+        self.logger.info(f"バッチロード完了: {len(jobs)}ジョブ, {file_count}ファイル, {row_count}行")
+        return {"jobs": jobs, "files": file_count, "rows": row_count}
+
+    def _load_claimed(self, partition: str, names: List[str], replace_partition: bool) -> Dict:
+        """
+        マニフェストでパーティションを確保してロードし、反映したファイルとマニフェストを削除
+
+        マニフェストが既に存在する場合は、指定したファイルではなくマニフェストのファイルを反映する。
+
+        Returns:
+            ロードジョブの情報
+        """
+        manifest_name = self._manifest_name(partition)
+        generation = self._create_manifest(manifest_name, self._encode_manifest(partition, names, replace_partition))
+        resumed = generation is None
+        if resumed:
+            existing = self._read_manifest(manifest_name)
+            if existing is None:
+                # 引き継ぐ前に反映が終わった（対象ファイルは削除済みの可能性があるため次回の反映で扱う）
+                self.logger.info(f"パーティション {partition} は他のインスタンスが反映済みです")
+                return {"job_id": None, "partition": partition, "files": 0, "rows": 0, "resumed": True}
+            data, generation = existing
+            self.logger.info(f"パーティション {partition} は反映中のため、既存のマニフェストを引き継ぎます")
+        else:
+            # 一覧の取得後に他のインスタンスが反映・削除したファイルを除く
+            remaining = {staged_file.name for staged_file in self._list_staged()}
+            names = [name for name in names if name in remaining]
+            data = self._encode_manifest(partition, names, replace_partition)
+            generation = self._replace_manifest(manifest_name, data, generation)
+
+        manifest = json.loads(data.decode("utf-8"))
+        if not manifest["files"]:
+            self._delete_manifest(manifest_name, generation)
+            return {"job_id": None, "partition": partition, "files": 0, "rows": 0, "resumed": resumed}
+        job_id = self._job_id(partition, data)
+        output_rows = self._load(partition, manifest["files"], job_id, manifest["replace_partition"])
+        self._delete_staged(manifest["files"])
+        self._delete_manifest(manifest_name, generation)
+        return {
+            "job_id": job_id,
+            "partition": partition,
+            "files": len(manifest["files"]),
+            "rows": output_rows,
+            "resumed": resumed,
+        }
+
+    @staticmethod
+    def _encode_manifest(partition: str, names: List[str], replace_partition: bool) -> bytes:
+        """マニフェストの内容"""
+        return json.dumps(
+            {"partition": partition, "files": names, "replace_partition": replace_partition}
+        ).encode("utf-8")
+
+    def _manifest_name(self, partition: str) -> str:
+        """パーティションのマニフェストのオブジェクト名"""
+        return f"{self.staging_prefix}/{self.MANIFEST_DIRECTORY}/{partition}.json"
+
+    def _job_id(self, partition: str, manifest: bytes) -> str:
+        """マニフェストから決まるロードジョブID"""
+        digest = hashlib.sha256(manifest).hexdigest()[:32]
+        return f"inference_load_{self.config.table_id}_{partition}_{digest}"
+
+    # =====================
+    # 書き溜め・ロードの実装（LocalLoadRepository で置き換え）
+    # =====================
+
+    def _put_staged(self, name: str, data: bytes) -> None:
+        self.bucket.blob(name).upload_from_string(data, content_type="application/x-ndjson")
+
+    def _list_staged(self) -> List[StagedFile]:
+        staged = []
+        for blob in self.storage_client.list_blobs(self.bucket, prefix=f"{self.staging_prefix}/"):
+            partition = blob.name[len(self.staging_prefix) + 1:].split("/", 1)[0]
+            if partition == self.MANIFEST_DIRECTORY:
+                continue
+            staged.append(StagedFile(blob.name, partition, blob.size or 0, blob.time_created))
+        return staged
+
+    def _delete_staged(self, names: List[str]) -> None:
+        # バッチリクエストは1回あたり最大1000件
+        for start in range(0, len(names), 1000):
+            with self.storage_client.batch():
+                for name in names[start:start + 1000]:
+                    self.bucket.delete_blob(name)
+
+    def _create_manifest(self, name: str, data: bytes) -> Optional[int]:
+        """マニフェストを存在しない場合のみ作成し、世代を返す（既に存在する場合はNone）"""
+        blob = self.bucket.blob(name)
+        try:
+            blob.upload_from_string(data, content_type="application/json", if_generation_match=0)
+        except PreconditionFailed:
+            return None
+        return blob.generation
+
+    def _replace_manifest(self, name: str, data: bytes, generation: int) -> int:
+        """作成したマニフェストを書き換え、新しい世代を返す"""
+        blob = self.bucket.blob(name)
+        blob.upload_from_string(data, content_type="application/json", if_generation_match=generation)
+        return blob.generation
+
+    def _read_manifest(self, name: str) -> Optional[Tuple[bytes, int]]:
+        """マニフェストの内容と世代を取得（存在しない場合はNone）"""
+        blob = self.bucket.blob(name)
+        try:
+            data = blob.download_as_bytes()
+        except NotFound:
+            return None
+        return data, blob.generation
+
+    def _delete_manifest(self, name: str, generation: int) -> None:
+        """世代が一致する場合のみマニフェストを削除（既に削除・置き換えられている場合は何もしない）"""
+        try:
+            self.bucket.delete_blob(name, if_generation_match=generation)
+        except (NotFound, PreconditionFailed):
+            self.logger.info(f"マニフェスト {name} は他のインスタンスによって処理済みです")
+
+    def _load(self, partition: str, names: List[str], job_id: str, replace_partition: bool) -> Optional[int]:
+        """パーティションデコレータを指定してロードジョブを実行（同じジョブIDが存在する場合はその結果を使う）"""
+        job_config = bigquery.LoadJobConfig(
+            source_format=bigquery.SourceFormat.NEWLINE_DELIMITED_JSON,
+            schema=self.get_schema(),
+            write_disposition=(
+                bigquery.WriteDisposition.WRITE_TRUNCATE if replace_partition
+                else bigquery.WriteDisposition.WRITE_APPEND
+            ),
+        )
+        uris = [f"gs://{self.config.gcs_bucket_name}/{name}" for name in names]
+        try:
+            job = self.client.load_table_from_uri(
+                uris, f"{self.table_ref}${partition}", job_id=job_id, job_config=job_config
+            )
+        except Conflict:
+            self.logger.info(f"ロードジョブ {job_id} は実行済みのため結果を使います")
+            job = self.client.get_job(job_id)
+        job.result()
+        return job.output_rows
+
+
+class LocalLoadRepository(BigQueryLoadRepository):
+    """
+    BigQuery・GCSを使わずにバッチロードを試すためのローカル実装
+
+    書き込み待ちのNDJSONを {base_path}/bigquery_staging/ 配下に、反映した行を
+    {base_path}/tables/{dataset}.{table}/{YYYYMMDD}.ndjson に保存する。
+    実行済みのジョブIDは同じディレクトリの _jobs/ に記録する。
+    マニフェストの世代はファイルの更新時刻（ナノ秒）で代用する。
+    """
+
+    def __init__(self, config: Config, base_path: str):
+        self.config = config
+        self.base_path = base_path
+        self.table_ref = f"{config.project_id}.{config.dataset_id}.{config.table_id}"
+        self.table_directory = os.path.join(base_path, "tables", f"{config.dataset_id}.{config.table_id}")
+        self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+        self._table = None
+        self._init_staging(config)
+
+    def ensure_table_exists(self) -> None:
+        os.makedirs(os.path.join(self.table_directory, "_jobs"), exist_ok=True)
+
+    def _put_staged(self, name: str, data: bytes) -> None:
+        path = os.path.join(self.base_path, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+    def _list_staged(self) -> List[StagedFile]:
+        staged = []
+        root = os.path.join(self.base_path, self.staging_prefix)
+        if not os.path.isdir(root):
+            return staged
+        for partition in sorted(os.listdir(root)):
+            if partition == self.MANIFEST_DIRECTORY:
+                continue
+            for file_name in sorted(os.listdir(os.path.join(root, partition))):
+                if not file_name.endswith(".ndjson"):
+                    continue
+                stat = os.stat(os.path.join(root, partition, file_name))
+                created_at = datetime.datetime.fromtimestamp(stat.st_mtime, datetime.timezone.utc)
+                staged.append(StagedFile(
+                    f"{self.staging_prefix}/{partition}/{file_name}", partition, stat.st_size, created_at
+                ))
+        return staged
+
+    def _delete_staged(self, names: List[str]) -> None:
+        for name in names:
+            try:
+                os.unlink(os.path.join(self.base_path, name))
+            except FileNotFoundError:
+                pass
+
+    def _create_manifest(self, name: str, data: bytes) -> Optional[int]:
+        path = os.path.join(self.base_path, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        try:
+            # 書き込み済みのファイルをリンクし、存在する場合は失敗させる
+            os.link(temp_path, path)
+        except FileExistsError:
+            return None
+        finally:
+            os.unlink(temp_path)
+        return os.stat(path).st_mtime_ns
+
+    def _replace_manifest(self, name: str, data: bytes, generation: int) -> int:
+        path = os.path.join(self.base_path, name)
+        self._put_staged(name, data)
+        return os.stat(path).st_mtime_ns
+
+    def _read_manifest(self, name: str) -> Optional[Tuple[bytes, int]]:
+        path = os.path.join(self.base_path, name)
+        try:
+            with open(path, "rb") as f:
+                return f.read(), os.fstat(f.fileno()).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _delete_manifest(self, name: str, generation: int) -> None:
+        path = os.path.join(self.base_path, name)
+        try:
+            if os.stat(path).st_mtime_ns == generation:
+                os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+    def _load(self, partition: str, names: List[str], job_id: str, replace_partition: bool) -> Optional[int]:
+        marker_path = os.path.join(self.table_directory, "_jobs", job_id)
+        if os.path.exists(marker_path):
+            self.logger.info(f"ロードジョブ {job_id} は実行済みのため結果を使います")
+            with open(marker_path) as f:
+                return int(f.read())
+
+        lines = []
+        for name in names:
+            with open(os.path.join(self.base_path, name), encoding="utf-8") as f:
+                lines.extend(line for line in f if line.strip())
+        with open(os.path.join(self.table_directory, f"{partition}.ndjson"), "w" if replace_partition else "a", encoding="utf-8") as f:
+            f.writelines(lines)
+        with open(marker_path, "w") as f:
+            f.write(str(len(lines)))
+        return len(lines)
+
+
+def _partition_of(timestamp: datetime.datetime) -> str:
+    """日単位パーティションのID（UTCの日付, YYYYMMDD）"""
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=datetime.timezone.utc)
+    return timestamp.astimezone(datetime.timezone.utc).strftime("%Y%m%d")
@@ -1,32 +1,57 @@
 import logging
-from typing import List
+import uuid
+from typing import Dict, List, Optional
 from google.cloud import bigquery
-from google.cloud.exceptions import NotFound
+from google.cloud.exceptions import BadRequest, Forbidden, NotFound
 
 from ..config import Config
 from ..models import InferenceResult
 
 
 class BigQueryRepository:
-    """BigQuery データベースへのアクセスを管理するリポジトリ"""
+    """
+    BigQuery データベースへのアクセスを管理するリポジトリ
+
+    テーブルのメタデータはインスタンスごとに保持し、ウォームインスタンスでは get_table を繰り返さない。
+    スキーマ・権限・テーブル削除による挿入エラーの場合は保持したメタデータを破棄する。
+    """
+
+    # 保持したテーブル情報を破棄する挿入エラーの理由
+    INVALIDATING_REASONS = {"invalid", "accessDenied", "notFound"}
 
     def __init__(self, config: Config):
         self.config = config
         self.client = bigquery.Client(project=config.project_id)
         self.table_ref = f"{config.project_id}.{config.dataset_id}.{config.table_id}"
         self.logger = logging.getLogger(self.__class__.__name__)
+        self._table = None  # 存在を確認したテーブルのメタデータ
 
     def ensure_table_exists(self) -> None:
-        """テーブルが存在することを確認し、存在しない場合は作成"""
+        """テーブルが存在することを確認し、存在しない場合は作成（確認済みの場合は何もしない）"""
+        if self._table is not None:
+            return
         try:
-            table_id = f"{self.config.project_id}.{self.config.dataset_id}.{self.config.table_id}"
-            table = self.client.get_table(table_id)
-            self.logger.info(f"テーブル {table_id} は既に存在します")
+            self._table = self.client.get_table(self.table_ref)
+            self.logger.info(f"テーブル {self.table_ref} は既に存在します")
         except NotFound:
-            self.logger.info(f"テーブル {table_id} が見つからないため作成します")
-            self._create_table()
+            self.logger.info(f"テーブル {self.table_ref} が見つからないため作成します")
+            self._table = self._create_table()
+
+    def invalidate_table(self) -> None:
+        """保持したテーブルのメタデータを破棄（次回の挿入前に存在を再確認）"""
+        if self._table is not None:
+            self.logger.info(f"テーブル {self.table_ref} のメタデータを破棄します")
+        self._table = None
+
+    @staticmethod
+    def get_schema() -> List[bigquery.SchemaField]:
+        """推論結果テーブルのスキーマ"""
+        return [
+            bigquery.SchemaField("timestamp", "TIMESTAMP", mode="REQUIRED"),
+            bigquery.SchemaField("inference_value", "FLOAT", mode="REQUIRED"),
+        ]
 
-    def _create_table(self) -> None:
+    def _create_table(self) -> bigquery.Table:
         """推論結果テーブルを作成"""
         dataset_ref = self.client.dataset(
             self.config.dataset_id, project=self.config.project_id
@@ -41,14 +66,8 @@ class BigQueryRepository:
             dataset = self.client.create_dataset(dataset)
             self.logger.info(f"データセット {self.config.dataset_id} を作成しました")
 
-        # テーブルスキーマを定義
-        schema = [
-            bigquery.SchemaField("timestamp", "TIMESTAMP", mode="REQUIRED"),
-            bigquery.SchemaField("inference_value", "FLOAT", mode="REQUIRED"),
-        ]
-
         table_ref = dataset_ref.table(self.config.table_id)
-        table = bigquery.Table(table_ref, schema=schema)
+        table = bigquery.Table(table_ref, schema=self.get_schema())
 
         # パーティション設定（日付ベース）
         table.time_partitioning = bigquery.TimePartitioning(
@@ -57,6 +76,7 @@ class BigQueryRepository:
 
         table = self.client.create_table(table)
         self.logger.info(f"テーブル {table.table_id} を作成しました")
+        return table
 
     def insert_inference_result(self, result: InferenceResult) -> bool:
         """推論結果を1件挿入"""
@@ -71,16 +91,38 @@ class BigQueryRepository:
         try:
             # BigQueryに挿入するためのデータを準備
             rows_to_insert = [result.to_dict() for result in results]
-            table = self.client.get_table(self.table_ref)
-            errors = self.client.insert_rows_json(table, rows_to_insert)
+            self.ensure_table_exists()
+            # 挿入IDが同じ行は BigQuery 側で重複が除かれる（ベストエフォート）
+            row_ids = [result.insert_id or str(uuid.uuid4()) for result in results]
+            errors = self.client.insert_rows_json(self._table, rows_to_insert, row_ids=row_ids)
 
             if errors:
                 self.logger.error(f"BigQuery挿入エラー: {errors}")
+                reasons = {error.get("reason") for row in errors for error in row.get("errors", [])}
+                if reasons & self.INVALIDATING_REASONS:
+                    self.invalidate_table()
                 return False
 
             self.logger.info(f"{len(results)}件のデータを正常に挿入しました")
             return True
 
+        except (BadRequest, Forbidden, NotFound) as e:
+            self.logger.error(f"BigQuery挿入処理中にエラーが発生: {str(e)}")
+            self.invalidate_table()
+            return False
+
         except Exception as e:
             self.logger.error(f"BigQuery挿入処理中にエラーが発生: {str(e)}")
             return False
+
+    def flush(self, replace_partitions: bool = False) -> Optional[Dict]:
+        """
+        書き込み待ちの行をBigQueryに反映（行を即時に書き込む方式では何もしない）
+
+        Args:
+            replace_partitions: 対象パーティションを置き換える（バッチロード方式のみ）
+
+        Returns:
+            反映結果の辞書（反映するものがない場合はNone）
+        """
+        return None
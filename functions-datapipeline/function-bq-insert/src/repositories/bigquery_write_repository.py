@@ -0,0 +1,216 @@
+import datetime
+from typing import Iterator, List, Optional, Tuple
+
+from google.cloud.exceptions import BadRequest, Forbidden, NotFound
+
+from ..config import Config
+from ..models import InferenceResult
+from .bigquery_repository import BigQueryRepository
+
+
+class BigQueryWriteRepository(BigQueryRepository):
+    """
+    BigQuery Storage Write API で推論結果を書き込むリポジトリ
+
+    行は protobuf にシリアライズし、バッチ単位で1本の接続にパイプラインで送る。
+    - default_stream: _default ストリームへ追記（少なくとも1回。再送時は重複する可能性がある）
+    - committed_stream: 書き込みごとに PENDING ストリームを作成して行オフセットを指定して追記し、
+      全バッチの追記後にまとめてコミットする（書き込みの途中で失敗した場合は1行も反映されない）
+    失敗したバッチは同じオフセットで再送し、ALREADY_EXISTS は書き込み済みとして扱う。
+    重複しないのは1回の書き込みの中での再送のみで、コミット済みの推論結果を別のリクエストで
+    再び書き込んだ場合（呼び出し元の再試行など）は二重に書き込まれる。
+    テーブルの作成・存在確認は BigQueryRepository と共通。
+    """
+
+    # 1リクエストの上限（10MB）に余裕を持たせたバッチのバイト数
+    MAX_BATCH_BYTES = 8 * 1024 * 1024
+    # 1バッチの再送回数
+    MAX_APPEND_ATTEMPTS = 3
+
+    def __init__(self, config: Config):
+        # Storage Write API のライブラリはこのリポジトリを使う場合のみ読み込む
+        from google.cloud import bigquery_storage_v1
+
+        super().__init__(config)
+        self.write_client = bigquery_storage_v1.BigQueryWriteClient()
+        self.table_path = self.write_client.table_path(
+            config.project_id, config.dataset_id, config.table_id
+        )
+        self.use_pending_stream = config.bigquery_write_mode == "committed_stream"
+        self.batch_rows = config.bigquery_write_batch_rows
+        self.row_class, self.proto_schema = self._build_row_schema()
+
+    def insert_inference_results(self, results: List[InferenceResult]) -> bool:
+        """推論結果を複数件書き込み"""
+        if not results:
+            self.logger.warning("挿入するデータがありません")
+            return True
+
+        try:
+            self.ensure_table_exists()
+            rows = (self._serialize(result) for result in results)
+            if self.use_pending_stream:
+                row_count = self._append_committed(rows)
+            else:
+                row_count = self._append_batches(f"{self.table_path}/streams/_default", rows, use_offsets=False)
+
+            self.logger.info(f"{row_count}件のデータを Storage Write API で正常に書き込みました")
+            return True
+
+        except (BadRequest, Forbidden, NotFound) as e:
+            self.logger.error(f"Storage Write API 書き込み中にエラーが発生: {str(e)}")
+            self.invalidate_table()
+            return False
+
+        except Exception as e:
+            self.logger.error(f"Storage Write API 書き込み中にエラーが発生: {str(e)}")
+            return False
+
+    def _append_committed(self, rows: Iterator[bytes]) -> int:
+        """PENDING ストリームにオフセット付きで追記し、ストリームを確定してまとめてコミット"""
+        from google.cloud.bigquery_storage_v1 import types
+
+        write_stream = self.write_client.create_write_stream(
+            parent=self.table_path,
+            write_stream=types.WriteStream(type_=types.WriteStream.Type.PENDING),
+        )
+        # 追記に失敗した場合はコミットしないため、ストリームの行は破棄される
+        row_count = self._append_batches(write_stream.name, rows, use_offsets=True)
+        self.write_client.finalize_write_stream(name=write_stream.name)
+
+        response = self.write_client.batch_commit_write_streams(
+            types.BatchCommitWriteStreamsRequest(parent=self.table_path, write_streams=[write_stream.name])
+        )
+        if response.stream_errors:
+            messages = "; ".join(error.error_message for error in response.stream_errors)
+            raise RuntimeError(f"Storage Write API のコミットに失敗しました: {messages}")
+        return row_count
+
+    def _append_batches(self, stream_name: str, rows: Iterator[bytes], use_offsets: bool) -> int:
+        """
+        バッチを1本の接続にパイプラインで送り、失敗したバッチをオフセット順に再送
+
+        Returns:
+            書き込んだ行数
+        """
+        from google.api_core.exceptions import AlreadyExists
+        from google.cloud.bigquery_storage_v1 import types, writer
+
+        template = types.AppendRowsRequest(
+            write_stream=stream_name,
+            proto_rows=types.AppendRowsRequest.ProtoData(writer_schema=self.proto_schema),
+        )
+        append_stream = writer.AppendRowsStream(self.write_client, template)
+        pending: List[Tuple[int, List[bytes], object]] = []
+        offset = 0
+        try:
+            for batch in self._batches(rows):
+                request = types.AppendRowsRequest(
+                    proto_rows=types.AppendRowsRequest.ProtoData(
+                        rows=types.ProtoRows(serialized_rows=batch)
+                    ),
+                )
+                if use_offsets:
+                    request.offset = offset
+                pending.append((offset, batch, append_stream.send(request)))
+                offset += len(batch)
+
+            failed = []
+            for batch_offset, batch, future in pending:
+                try:
+                    future.result()
+                except AlreadyExists:
+                    self.logger.info(f"オフセット {batch_offset} は書き込み済みです")
+                except Exception as e:
+                    self.logger.warning(f"バッチの追記に失敗しました（オフセット {batch_offset}）: {e}")
+                    failed.append((batch_offset, batch))
+        finally:
+            append_stream.close()
+
+        for batch_offset, batch in failed:
+            self._retry_batch(stream_name, batch, batch_offset if use_offsets else None)
+        return offset
+
+    def _retry_batch(self, stream_name: str, batch: List[bytes], offset: Optional[int]) -> None:
+        """1バッチを再送（オフセット指定時は書き込み済みなら成功とみなす）"""
+        from google.api_core.exceptions import AlreadyExists, from_grpc_status
+        from google.cloud.bigquery_storage_v1 import types
+        from google.rpc import code_pb2
+
+        request = types.AppendRowsRequest(
+            write_stream=stream_name,
+            proto_rows=types.AppendRowsRequest.ProtoData(
+                writer_schema=self.proto_schema,
+                rows=types.ProtoRows(serialized_rows=batch),
+            ),
+        )
+        if offset is not None:
+            request.offset = offset
+        for attempt in range(1, self.MAX_APPEND_ATTEMPTS + 1):
+            try:
+                for response in self.write_client.append_rows(iter([request])):
+                    if response.error.code == code_pb2.ALREADY_EXISTS:
+                        raise AlreadyExists(response.error.message)
+                    if response.error.code:
+                        if response.row_errors:
+                            self.logger.error(f"行エラー: {list(response.row_errors)}")
+                        raise from_grpc_status(response.error.code, response.error.message)
+                return
+            except AlreadyExists:
+                self.logger.info(f"オフセット {offset} は書き込み済みです")
+                return
+            except (BadRequest, Forbidden, NotFound):
+                raise
+            except Exception as e:
+                if attempt == self.MAX_APPEND_ATTEMPTS:
+                    raise
+                self.logger.warning(f"追記に失敗したため再送します（{attempt}回目, オフセット {offset}）: {e}")
+
+    def _batches(self, rows: Iterator[bytes]) -> Iterator[List[bytes]]:
+        """行数・バイト数の上限ごとにまとめる"""
+        batch: List[bytes] = []
+        batch_bytes = 0
+        for row in rows:
+            if batch and (len(batch) >= self.batch_rows or batch_bytes + len(row) > self.MAX_BATCH_BYTES):
+                yield batch
+                batch, batch_bytes = [], 0
+            batch.append(row)
+            batch_bytes += len(row)
+        if batch:
+            yield batch
+
+    def _serialize(self, result: InferenceResult) -> bytes:
+        """推論結果を protobuf の行にシリアライズ"""
+        message = self.row_class(
+            timestamp=_to_micros(result.timestamp), inference_value=result.inference_value
+        )
+        return message.SerializeToString()
+
+    @staticmethod
+    def _build_row_schema() -> Tuple[type, object]:
+        """推論結果の行の protobuf メッセージクラスと Write API 用のスキーマを作成"""
+        from google.cloud.bigquery_storage_v1 import types
+        from google.protobuf import descriptor_pb2, descriptor_pool, message_factory
+
+        field = descriptor_pb2.FieldDescriptorProto
+        file_proto = descriptor_pb2.FileDescriptorProto(
+            name="inference_result.proto", package="inference", syntax="proto2"
+        )
+        message_proto = file_proto.message_type.add(name="InferenceRow")
+        message_proto.field.add(name="timestamp", number=1, type=field.TYPE_INT64, label=field.LABEL_REQUIRED)
+        message_proto.field.add(name="inference_value", number=2, type=field.TYPE_DOUBLE, label=field.LABEL_REQUIRED)
+
+        pool = descriptor_pool.DescriptorPool()
+        pool.Add(file_proto)
+        descriptor = pool.FindMessageTypeByName("inference.InferenceRow")
+        proto_descriptor = descriptor_pb2.DescriptorProto()
+        descriptor.CopyToProto(proto_descriptor)
+        return message_factory.GetMessageClass(descriptor), types.ProtoSchema(proto_descriptor=proto_descriptor)
+
+
+def _to_micros(timestamp: datetime.datetime) -> int:
+    """日時を epoch マイクロ秒に変換（タイムゾーンなしはUTC）"""
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=datetime.timezone.utc)
+    delta = timestamp - datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
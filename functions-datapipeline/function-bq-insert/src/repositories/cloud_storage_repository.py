@@ -1,12 +1,16 @@
 """
 Cloud Storageとの通信を担当するリポジトリ
 """
+import datetime
+import json
 import logging
+import random
 import tempfile
+import time
 import os
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterator, Tuple
 from google.cloud import storage
-from google.cloud.exceptions import NotFound, Forbidden
+from google.cloud.exceptions import NotFound, Forbidden, PreconditionFailed
 
 from ..config import Config
 
@@ -14,31 +18,49 @@ from ..config import Config
 class CloudStorageRepository:
     """Cloud Storage リポジトリ"""
 
+    # 末尾の行だけを取得する場合に先頭から読む範囲（ヘッダー行と行の長さの見積もり用）
+    HEAD_RANGE_BYTES = 16 * 1024
+    TIMESERIES_PREFIX = "timeseries_data/"
+    # 最新のCSVを指すポインタ（function-tc-apicall がCSVの保存ごとに更新）
+    LATEST_POINTER_PATH = "timeseries_data/_latest.json"
+    # ポインタがない場合に一覧を取得する日数（ファイル名の日付）
+    LATEST_LOOKBACK_DAYS = 3
+    # ウォーターマーク更新の競合時の試行回数
+    WATERMARK_ATTEMPTS = 5
+    # 再試行までの待ち時間の上限（秒）
+    WATERMARK_MAX_BACKOFF_SECONDS = 2.0
+
     def __init__(self, config: Config):
         self.config = config
         self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
         self.client = storage.Client(project=self.config.project_id)
         self._resolved_file_name = None  # 解決されたファイル名をキャッシュ
+        # ウォームインスタンスで使い回す最新ファイルの検索結果
+        self._latest_cache: Optional[Tuple[int, storage.Blob]] = None  # (ポインタの世代, 最新のBlob)
+        self._latest_listed_name: Optional[str] = None  # 日付で絞った一覧で前回見つけたファイル名
 
     # =====================
     # パブリックメソッド - メイン機能
     # =====================
     
     def prepare_csv_file_for_inference(self, local_csv_path: str) -> bool:
-        """推論用CSVファイルを準備（Cloud Storageからダウンロード）"""
+        """
+        推論用CSVファイルを準備（Cloud Storageからダウンロード）
+        
+        対象オブジェクトのメタデータは1回の取得（ファイル名指定時は get_blob、未指定時は一覧）で得て、
+        存在確認・ログ出力・ダウンロードに使い回す。
+        """
         try:
             self.logger.info("推論用CSVファイルの準備を開始します")
             
-            # ファイル名を解決（GCS_FILE_NAMEが空の場合は最新のtimeseries_dataファイルを検索）
-            if not self._resolve_target_file_name():
-                return False
-            
-            if not self._validate_file_availability():
+            # 対象を解決（GCS_FILE_NAMEが空の場合は最新のtimeseries_dataファイルを検索）
+            blob = self._resolve_target_blob()
+            if blob is None:
                 return False
             
-            self._log_file_information()
+            self._log_file_information(blob)
             
-            success = self.download_file_to_local_path(local_csv_path)
+            success = self._download_blob(blob, local_csv_path)
             
             if success:
                 self.logger.info("推論用CSVファイルの準備が完了しました")
@@ -51,22 +73,92 @@ class CloudStorageRepository:
             self.logger.error(f"推論用CSVファイル準備中にエラーが発生: {str(e)}")
             return False
 
+    def resolve_csv_blob(self) -> Optional[storage.Blob]:
+        """推論用CSVのBlobを解決（ダウンロードはしない。存在しない場合はNone）"""
+        try:
+            blob = self._resolve_target_blob()
+            if blob is not None:
+                self._log_file_information(blob)
+            return blob
+        except Exception as e:
+            self.logger.error(f"推論用CSVファイルの解決中にエラーが発生: {str(e)}")
+            return None
+
+    def iter_blob_chunks(self, blob: storage.Blob, chunk_size: int) -> Iterator[bytes]:
+        """Blobを chunk_size バイトずつ範囲指定で読み込む（解決時の世代に固定）"""
+        with blob.open("rb", chunk_size=chunk_size) as reader:
+            while True:
+                chunk = reader.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+    def download_csv_tail(self, blob: storage.Blob, rows: int) -> Optional[bytes]:
+        """
+        CSVのヘッダー行と末尾の rows 行だけを範囲指定で取得（解決時の世代に固定）
+
+        先頭の範囲からヘッダー行と1行あたりのバイト数を見積もり、末尾から必要な範囲を取得する。
+        行数が足りない場合は範囲を2倍ずつ前に広げる（ファイル全体より多くは読まない）。
+
+        Returns:
+            ヘッダー行と末尾の行からなるCSV（データ行がない場合・取得に失敗した場合はNone）
+        """
+        try:
+            size = blob.size or 0
+            if size == 0:
+                self.logger.warning("CSVファイルが空のため、推論に使うデータ行がありません")
+                return None
+            head = self._download_range(blob, 0, min(self.HEAD_RANGE_BYTES, size))
+            fetched_bytes, requests_count = len(head), 1
+            if len(head) >= size:
+                # ファイル全体が先頭の範囲に収まる場合
+                lines = head.splitlines(keepends=True)
+                header, data_lines = lines[0] if lines else b"", lines[1:]
+            else:
+                header_end = head.find(b"\n") + 1
+                if header_end == 0:
+                    raise ValueError(f"先頭 {len(head)} bytes にCSVのヘッダー行が見つかりません")
+                header = head[:header_end]
+                sample = head[header_end:head.rfind(b"\n") + 1]
+                sample_rows = sample.count(b"\n")
+                row_bytes = len(sample) / sample_rows if sample_rows else len(head)
+                length = int(row_bytes * (rows + 1) * 1.25)
+                while True:
+                    start = max(size - length, header_end)
+                    tail = self._download_range(blob, start, size)
+                    fetched_bytes += len(tail)
+                    requests_count += 1
+                    data_lines = tail.splitlines(keepends=True)
+                    if start > header_end:
+                        # 範囲の先頭の行は途中から始まっている可能性があるため使わない
+                        data_lines = data_lines[1:]
+                    data_lines = [line for line in data_lines if line.strip()]
+                    if len(data_lines) >= rows or start == header_end:
+                        break
+                    length *= 2
+
+            data_lines = [line for line in data_lines if line.strip()][-rows:]
+            if not data_lines:
+                self.logger.warning("CSVファイルにヘッダー行しかないため、推論に使うデータ行がありません")
+                return None
+            self.logger.info(
+                f"CSVの末尾 {len(data_lines)}行 を取得しました - 範囲取得: {requests_count}回, "
+                f"取得: {fetched_bytes} bytes / ファイル全体: {size} bytes"
+            )
+            return header + b"".join(data_lines)
+
+        except Exception as e:
+            self.logger.error(f"CSVの末尾の取得中にエラーが発生: {str(e)}")
+            return None
+
     def download_file_to_local_path(self, local_path: str) -> bool:
         """Cloud Storageからファイルをダウンロードしてローカルパスに保存"""
         try:
-            self.logger.info(f"ファイルダウンロード開始: {self._get_gcs_uri()}")
-            self.logger.info(f"ローカル保存先: {local_path}")
-            
             blob = self._get_blob()
             if not self._check_blob_exists(blob):
                 return False
             
-            self._ensure_local_directory(local_path)
-            blob.download_to_filename(local_path)
-            
-            file_size = os.path.getsize(local_path)
-            self.logger.info(f"ファイルダウンロード完了: {file_size} bytes")
-            return True
+            return self._download_blob(blob, local_path)
             
         except Exception as e:
             self.logger.error(f"ファイルダウンロード中にエラーが発生: {str(e)}")
@@ -135,6 +227,43 @@ class CloudStorageRepository:
             self.logger.error(f"メタデータ取得中にエラーが発生: {str(e)}")
             return None
 
+    def load_ingest_watermark(self, source: str) -> Optional[datetime.datetime]:
+        """取り込み済みの最新時刻を取得（未保存の場合はNone）"""
+        return self._read_ingest_watermark(source)[0]
+
+    def save_ingest_watermark(self, source: str, latest_timestamp: datetime.datetime) -> bool:
+        """
+        取り込み済みの最新時刻を保存（保存済みの時刻より新しい場合のみ）
+
+        世代を指定した条件付き書き込みで保存し、競合時は読み直して再試行する。
+        同時に実行した他のリクエストが先により新しい時刻を保存していた場合は、時刻を戻さない。
+
+        Returns:
+            保存した場合はTrue（保存済みの時刻の方が新しい場合はFalse）
+        """
+        blob = self.client.bucket(self.config.gcs_bucket_name).blob(self._get_watermark_path(source))
+        for attempt in range(1, self.WATERMARK_ATTEMPTS + 1):
+            current, generation = self._read_ingest_watermark(source)
+            if current is not None and current >= latest_timestamp:
+                self.logger.info(f"取り込み済みの最新時刻は既に {current.isoformat()} まで進んでいるため保存しません")
+                return False
+            state = {
+                "latest_timestamp": latest_timestamp.isoformat(),
+                "updated_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            }
+            try:
+                blob.upload_from_string(
+                    json.dumps(state), content_type="application/json", if_generation_match=generation
+                )
+            except PreconditionFailed:
+                if attempt == self.WATERMARK_ATTEMPTS:
+                    raise
+                self.logger.info(f"取り込み済みの最新時刻が他の書き込みで更新されたため再試行します（{attempt}回目）")
+                time.sleep(random.uniform(0, min(0.1 * 2 ** attempt, self.WATERMARK_MAX_BACKOFF_SECONDS)))
+                continue
+            self.logger.info(f"取り込み済みの最新時刻を保存しました: {latest_timestamp.isoformat()}")
+            return True
+
     def cleanup_temp_file(self, temp_file_path: str) -> None:
         """一時ファイルを削除"""
         try:
@@ -148,69 +277,118 @@ class CloudStorageRepository:
     # プライベートメソッド - ファイル検証・情報取得
     # =====================
     
-    def _resolve_target_file_name(self) -> bool:
-        """対象ファイル名を解決"""
+    def _resolve_target_blob(self) -> Optional[storage.Blob]:
+        """対象ファイルを解決し、メタデータ取得済みのBlobを返す（存在しない場合はNone）"""
         if self.config.gcs_file_name:
             # GCS_FILE_NAMEが指定されている場合はそのまま使用
             self._resolved_file_name = self.config.gcs_file_name
             self.logger.info(f"指定されたファイル名を使用: {self._resolved_file_name}")
-            return True
+            blob = self.client.bucket(self.config.gcs_bucket_name).get_blob(self._resolved_file_name)
+            if blob is None:
+                self.logger.error(f"Cloud Storageにファイルが存在しません: {self._get_gcs_uri()}")
+            return blob
         else:
             # GCS_FILE_NAMEが空の場合はtimeseries_dataプレフィックスで最新ファイルを検索
             self.logger.info("GCS_FILE_NAMEが空のため、timeseries_dataプレフィックスで最新ファイルを検索します")
-            latest_file = self._find_latest_timeseries_file()
-            if latest_file:
-                self._resolved_file_name = latest_file
+            latest_blob = self._find_latest_timeseries_blob()
+            if latest_blob:
+                self._resolved_file_name = latest_blob.name
                 self.logger.info(f"最新のtimeseries_dataファイルを使用: {self._resolved_file_name}")
-                return True
+                return latest_blob
             else:
                 self.logger.error("timeseries_dataプレフィックスのファイルが見つかりませんでした")
-                return False
+                return None
     
-    def _find_latest_timeseries_file(self) -> Optional[str]:
-        """timeseries_dataプレフィックスの最新ファイルを検索"""
+    def _find_latest_timeseries_blob(self) -> Optional[storage.Blob]:
+        """
+        timeseries_dataプレフィックスの最新ファイルを検索
+
+        バケット内のファイル数に依存しないよう、次の順に解決する。
+        1. function-tc-apicall が更新するポインタ（_latest.json）。ポインタの世代が前回と同じ場合は
+           ウォームインスタンスにキャッシュしたBlobを使う
+        2. ファイル名（YYYYmmdd_HHMMSS.csv）の日付で絞った一覧。新しい日付から順に探し、
+           前回見つけたファイル以降（start_offset）だけを取得する
+        3. 直近にファイルがない場合のみ、プレフィックス全体の一覧
+        """
         try:
             bucket = self.client.bucket(self.config.gcs_bucket_name)
-            
-            # timeseries_dataプレフィックスでファイルをリスト
-            blobs = bucket.list_blobs(prefix="timeseries_data")
-            
-            # 更新時間でソートして最新を取得
-            latest_blob = None
-            latest_time = None
-            
-            for blob in blobs:
-                if blob.updated:
-                    if latest_time is None or blob.updated > latest_time:
-                        latest_time = blob.updated
-                        latest_blob = blob
-            
+
+            latest_blob = self._find_latest_from_pointer(bucket)
+            if latest_blob is None:
+                latest_blob = self._find_latest_by_date_prefix(bucket)
+            if latest_blob is None:
+                self.logger.warning(
+                    f"直近 {self.LATEST_LOOKBACK_DAYS}日 のファイルが見つからないため、timeseries_dataプレフィックス全体を検索します"
+                )
+                latest_blob = self._find_latest_by_full_listing(bucket)
+
             if latest_blob:
-                self.logger.info(f"最新ファイル発見: {latest_blob.name}, 更新時刻: {latest_time}")
-                return latest_blob.name
+                self.logger.info(f"最新ファイル発見: {latest_blob.name}, 更新時刻: {latest_blob.updated}")
+                return latest_blob
             else:
                 self.logger.warning("timeseries_dataプレフィックスのファイルが見つかりません")
                 return None
-                
+
         except Exception as e:
             self.logger.error(f"最新ファイル検索中にエラーが発生: {str(e)}")
             return None
-    
-    def _validate_file_availability(self) -> bool:
-        """ファイルの利用可能性を検証"""
-        if not self.file_exists():
-            self.logger.error(f"Cloud Storageにファイルが存在しません: {self._get_gcs_uri()}")
-            return False
-        return True
-    
-    def _log_file_information(self) -> None:
-        """ファイル情報をログ出力"""
-        metadata = self.get_file_metadata()
-        if metadata:
-            self.logger.info(
-                f"ファイル情報 - サイズ: {metadata.get('size', 'N/A')} bytes, "
-                f"更新日時: {metadata.get('updated', 'N/A')}"
-            )
+
+    def _find_latest_from_pointer(self, bucket: storage.Bucket) -> Optional[storage.Blob]:
+        """ポインタが指す最新ファイルを取得（ポインタがない場合はNone）"""
+        pointer_blob = bucket.get_blob(self.LATEST_POINTER_PATH)
+        if pointer_blob is None:
+            return None
+        if self._latest_cache and self._latest_cache[0] == pointer_blob.generation:
+            self.logger.info("ポインタが更新されていないため、キャッシュした最新ファイルを使用します")
+            return self._latest_cache[1]
+
+        pointer = json.loads(pointer_blob.download_as_bytes())
+        latest_blob = bucket.get_blob(pointer["name"], generation=pointer.get("generation"))
+        if latest_blob is None:
+            self.logger.warning(f"ポインタが指すファイルが存在しません: {pointer['name']}")
+            return None
+        self.logger.info(f"ポインタから最新ファイルを特定しました: {latest_blob.name}")
+        self._latest_cache = (pointer_blob.generation, latest_blob)
+        return latest_blob
+
+    def _find_latest_by_date_prefix(self, bucket: storage.Bucket) -> Optional[storage.Blob]:
+        """ファイル名の日付で絞った一覧から最新ファイルを取得（名前の辞書順が時刻順）"""
+        now = datetime.datetime.now(datetime.timezone.utc)
+        # ファイル名は function-tc-apicall の実行環境の現地時刻のため、UTCの翌日から探す
+        for days in range(-1, self.LATEST_LOOKBACK_DAYS):
+            prefix = f"{self.TIMESERIES_PREFIX}{(now - datetime.timedelta(days=days)):%Y%m%d}"
+            start_offset = None
+            if self._latest_listed_name and self._latest_listed_name.startswith(prefix):
+                start_offset = self._latest_listed_name
+
+            latest_blob = None
+            for blob in bucket.list_blobs(prefix=prefix, start_offset=start_offset):
+                # 統計量サイドカー（.stats.json）などCSV以外のオブジェクトは対象外
+                if blob.name.endswith(".csv"):
+                    latest_blob = blob
+            if latest_blob:
+                self._latest_listed_name = latest_blob.name
+                return latest_blob
+        return None
+
+    def _find_latest_by_full_listing(self, bucket: storage.Bucket) -> Optional[storage.Blob]:
+        """timeseries_dataプレフィックス全体の一覧から更新時刻が最新のファイルを取得"""
+        latest_blob = None
+        for blob in bucket.list_blobs(prefix=self.TIMESERIES_PREFIX):
+            if not blob.name.endswith(".csv"):
+                continue
+            if blob.updated and (latest_blob is None or blob.updated > latest_blob.updated):
+                latest_blob = blob
+        return latest_blob
+
+    def _log_file_information(self, blob: storage.Blob) -> None:
+        """ファイル情報をログ出力（取得済みのメタデータを使用）"""
+        metadata = self._build_metadata_dict(blob)
+        self.logger.info(
+            f"ファイル情報 - サイズ: {metadata.get('size', 'N/A')} bytes, "
+            f"更新日時: {metadata.get('updated', 'N/A')}"
+        )
+        self.logger.debug(f"メタデータ: {metadata}")
     
     def _check_blob_exists(self, blob: storage.Blob) -> bool:
         """Blobの存在確認とエラーハンドリング"""
@@ -243,21 +421,52 @@ class CloudStorageRepository:
     # プライベートメソッド - Cloud Storage操作
     # =====================
     
+    def _download_range(self, blob: storage.Blob, start: int, end: int) -> bytes:
+        """Blobの [start, end) の範囲を取得"""
+        if end <= start:
+            return b""
+        return blob.download_as_bytes(start=start, end=end - 1)
+
     def _get_blob(self) -> storage.Blob:
         """Cloud StorageのBlobオブジェクトを取得"""
         bucket = self.client.bucket(self.config.gcs_bucket_name)
         file_name = self._resolved_file_name or self.config.gcs_file_name
         return bucket.blob(file_name)
     
+    def _get_watermark_path(self, source: str) -> str:
+        """取り込み済みの最新時刻のオブジェクトパス"""
+        return f"inference_state/{source}/watermark.json"
+    
     def _get_gcs_uri(self) -> str:
         """Cloud Storage URIを取得"""
         file_name = self._resolved_file_name or self.config.gcs_file_name
         return f"gs://{self.config.gcs_bucket_name}/{file_name}"
 
+    def _read_ingest_watermark(self, source: str) -> Tuple[Optional[datetime.datetime], int]:
+        """取り込み済みの最新時刻と世代を取得（未保存の場合は (None, 0)）"""
+        blob = self.client.bucket(self.config.gcs_bucket_name).blob(self._get_watermark_path(source))
+        try:
+            state = json.loads(blob.download_as_bytes())
+        except NotFound:
+            return None, 0
+        return datetime.datetime.fromisoformat(state["latest_timestamp"]), blob.generation
+
     # =====================
     # プライベートメソッド - ローカルファイル操作
     # =====================
     
+    def _download_blob(self, blob: storage.Blob, local_path: str) -> bool:
+        """Blobをローカルパスにダウンロード"""
+        self.logger.info(f"ファイルダウンロード開始: {self._get_gcs_uri()}")
+        self.logger.info(f"ローカル保存先: {local_path}")
+        
+        self._ensure_local_directory(local_path)
+        blob.download_to_filename(local_path)
+        
+        file_size = os.path.getsize(local_path)
+        self.logger.info(f"ファイルダウンロード完了: {file_size} bytes")
+        return True
+    
     def _ensure_local_directory(self, local_path: str) -> None:
         """ローカルファイルの保存先ディレクトリを作成"""
         directory = os.path.dirname(local_path)
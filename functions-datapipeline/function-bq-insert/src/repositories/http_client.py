@@ -0,0 +1,238 @@
+"""
+NodeAI APIなど外部APIへのHTTP通信の共通処理（接続プール・タイムアウト・再試行・サーキットブレーカー）
+"""
+import bisect
+import logging
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class CircuitOpenError(requests.RequestException):
+    """サーキットブレーカーが開いているためリクエストを送らなかったことを示す例外"""
+
+
+class CircuitBreaker:
+    """
+    連続した失敗でリクエストを止めるサーキットブレーカー
+
+    - closed: 通常どおり送信。連続失敗が failure_threshold 回に達すると open
+    - open: reset_seconds の間は送信せずに失敗させる
+    - half_open: reset_seconds 経過後に1件だけ試行し、成功すれば closed、失敗すれば再び open
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+
+    def allow_request(self) -> bool:
+        """リクエストを送ってよいか（half_open では同時に1件だけ許可）"""
+        with self._lock:
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.state = "half_open"
+                self.logger.info("サーキットブレーカーを half_open にして試行します")
+            if self.state == "half_open":
+                if self._trial_in_flight:
+                    return False
+                self._trial_in_flight = True
+                return True
+            return self.state == "closed"
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != "closed":
+                self.logger.info("サーキットブレーカーを closed に戻します")
+            self.state = "closed"
+            self.consecutive_failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.consecutive_failures += 1
+            self._trial_in_flight = False
+            if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+                if self.state != "open":
+                    self.logger.warning(
+                        f"連続 {self.consecutive_failures}回 失敗したため、サーキットブレーカーを open にします"
+                        f"（{self.reset_seconds:g}秒間）"
+                    )
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def get_status(self) -> Dict[str, Any]:
+        with self._lock:
+            status = {"state": self.state, "consecutive_failures": self.consecutive_failures}
+            if self.state == "open":
+                remaining = self.reset_seconds - (time.monotonic() - self.opened_at)
+                status["retry_after_seconds"] = round(max(remaining, 0.0), 1)
+            return status
+
+
+class ResilientHttpClient:
+    """
+    接続プール・タイムアウト・再試行・サーキットブレーカーを備えたHTTPクライアント
+
+    セッション（TLS接続）、サーキットブレーカー、統計はウォームインスタンス内で共有する。
+    再試行は接続エラー・タイムアウト・再試行可能なステータスのみで、待ち時間は
+    指数バックオフの範囲でランダムにする（Retry-After があれば上限内で従う）。
+    """
+
+    # 再試行するHTTPステータス
+    RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+    # 応答時間のヒストグラムの境界（秒）
+    LATENCY_BUCKETS = [0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0]
+
+    # ウォームインスタンスで共有する状態
+    _session: Optional[requests.Session] = None
+    _circuit_breaker: Optional[CircuitBreaker] = None
+    _metrics = {"requests": 0, "attempts": 0, "retries": 0, "failures": 0, "short_circuited": 0}
+    _latency_counts: List[int] = [0] * (len(LATENCY_BUCKETS) + 1)
+    _latency_sum = 0.0
+    _lock = threading.Lock()
+
+    def __init__(
+        self,
+        connect_timeout_seconds: float = 5.0,
+        read_timeout_seconds: float = 60.0,
+        max_retries: int = 2,
+        backoff_base_seconds: float = 0.5,
+        backoff_max_seconds: float = 8.0,
+        failure_threshold: int = 5,
+        reset_seconds: float = 60.0,
+    ):
+        """
+        ResilientHttpClientを初期化
+
+        Args:
+            connect_timeout_seconds: 接続のタイムアウト（秒）
+            read_timeout_seconds: 応答の読み込みのタイムアウト（秒）
+            max_retries: 再試行回数の上限
+            backoff_base_seconds: 再試行の待ち時間の基準（秒、回数ごとに2倍）
+            backoff_max_seconds: 再試行の待ち時間の上限（秒）
+            failure_threshold: サーキットブレーカーを開く連続失敗回数
+            reset_seconds: サーキットブレーカーを開いておく時間（秒）
+        """
+        self.timeout = (connect_timeout_seconds, read_timeout_seconds)
+        self.max_retries = max_retries
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+        with self._lock:
+            cls = type(self)
+            if cls._session is None:
+                session = requests.Session()
+                # 再試行はこのクラスで行うため、アダプターでは再試行しない
+                session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=4, max_retries=0))
+                session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=4, max_retries=0))
+                cls._session = session
+            if cls._circuit_breaker is None:
+                cls._circuit_breaker = CircuitBreaker(failure_threshold, reset_seconds)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        """
+        POSTリクエストを送信（一度しか読めないボディは body_factory で渡すと再試行ごとに作り直す）
+
+        Returns:
+            レスポンス（再試行しないステータスはそのまま返す）
+
+        Raises:
+            CircuitOpenError: サーキットブレーカーが開いている場合
+            requests.RequestException: 再試行しても成功しなかった場合
+        """
+        return self.request("POST", url, **kwargs)
+
+    def request(
+        self, method: str, url: str, body_factory: Optional[Callable[[], Any]] = None, **kwargs
+    ) -> requests.Response:
+        """リクエストを送信（再試行・サーキットブレーカー付き）"""
+        with self._lock:
+            self._metrics["requests"] += 1
+        if not self._circuit_breaker.allow_request():
+            with self._lock:
+                self._metrics["short_circuited"] += 1
+            raise CircuitOpenError("サーキットブレーカーが開いているため、リクエストを送信しません")
+
+        kwargs.setdefault("timeout", self.timeout)
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                with self._lock:
+                    self._metrics["retries"] += 1
+            with self._lock:
+                self._metrics["attempts"] += 1
+
+            if body_factory:
+                kwargs["data"] = body_factory()
+            start = time.monotonic()
+            try:
+                response = self._session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self._record_latency(time.monotonic() - start)
+                if attempt == self.max_retries:
+                    self._record_failure()
+                    raise
+                delay = self._get_backoff(attempt)
+                self.logger.warning(f"リクエストに失敗したため {delay:.2f}秒後に再試行します（{attempt + 1}回目）: {e}")
+                time.sleep(delay)
+                continue
+            except Exception:
+                self._record_failure()
+                raise
+
+            self._record_latency(time.monotonic() - start)
+            if response.status_code not in self.RETRYABLE_STATUSES:
+                self._circuit_breaker.record_success()
+                return response
+            if attempt == self.max_retries:
+                self._record_failure()
+                response.raise_for_status()
+            delay = self._get_backoff(attempt, response.headers.get("Retry-After"))
+            self.logger.warning(
+                f"ステータス {response.status_code} のため {delay:.2f}秒後に再試行します（{attempt + 1}回目）"
+            )
+            response.close()
+            time.sleep(delay)
+
+    @classmethod
+    def get_metrics(cls) -> Dict[str, Any]:
+        """サーキットブレーカーの状態と応答時間のヒストグラムを取得"""
+        with cls._lock:
+            metrics = dict(cls._metrics)
+            counts = list(cls._latency_counts)
+            latency_sum = cls._latency_sum
+        labels = [f"le_{bound:g}" for bound in cls.LATENCY_BUCKETS] + ["le_inf"]
+        total = sum(counts)
+        metrics["circuit"] = cls._circuit_breaker.get_status() if cls._circuit_breaker else {"state": "closed"}
+        metrics["latency_histogram"] = dict(zip(labels, counts))
+        metrics["latency_mean_seconds"] = round(latency_sum / total, 4) if total else None
+        return metrics
+
+    def _get_backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """再試行までの待ち時間（指数バックオフの範囲でランダム、Retry-After は上限内で優先）"""
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max_seconds)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_base_seconds * 2 ** attempt, self.backoff_max_seconds))
+
+    def _record_failure(self) -> None:
+        with self._lock:
+            self._metrics["failures"] += 1
+        self._circuit_breaker.record_failure()
+
+    @classmethod
+    def _record_latency(cls, latency: float) -> None:
+        with cls._lock:
+            cls._latency_counts[bisect.bisect_left(cls.LATENCY_BUCKETS, latency)] += 1
+            cls._latency_sum += latency
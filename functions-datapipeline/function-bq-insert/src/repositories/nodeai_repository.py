@@ -8,48 +8,79 @@ import base64
 import json
 import datetime
 import random
-from typing import Dict, Any
+from typing import Callable, Dict, Any, List, Optional
 
 from ..schemas import NodeAIApiResponse, AnomalyResult, ThresholdValues
 from ..config import Config
+from .http_client import ResilientHttpClient
+from .streaming_payload import StreamingJsonPayload
 
 
 class NodeaiRepository:
     """NodeAI API リポジトリ"""
 
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, http_client: Optional[ResilientHttpClient] = None):
         self.config = config
+        self.http_client = http_client or ResilientHttpClient(
+            connect_timeout_seconds=config.nodeai_connect_timeout_seconds,
+            read_timeout_seconds=config.nodeai_read_timeout_seconds,
+            max_retries=config.nodeai_max_retries,
+            failure_threshold=config.nodeai_circuit_failure_threshold,
+            reset_seconds=config.nodeai_circuit_reset_seconds,
+        )
         self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
 
     # =====================
     # パブリックメソッド
     # =====================
 
-    def get_inference_value(self) -> float:
-        """NodeAI APIから推論値を取得するメインメソッド"""
+    def get_inference_value(
+        self, payload_factory: Optional[Callable[[], StreamingJsonPayload]] = None
+    ) -> float:
+        """
+        NodeAI APIから推論値を取得するメインメソッド
+
+        Args:
+            payload_factory: ストリーミングするリクエストボディを作成する関数（省略時は CSV_FILE_PATH を読み込む）
+        """
         try:
             self.logger.info("NodeAI APIから推論値を取得します")
-            api_response = self._send_inference_request()
+            api_response = self._send_inference_request(payload_factory)
             return self._extract_inference_value_from_response(api_response)
         except Exception as e:
             self.logger.error(f"NodeAI API呼び出し中にエラーが発生: {str(e)}")
             return self._generate_fallback_inference()
 
+    def get_inference_results(
+        self, payload_factory: Optional[Callable[[], StreamingJsonPayload]] = None
+    ) -> List[AnomalyResult]:
+        """NodeAI APIから全ての推論結果を取得（失敗時は空のリスト。フォールバック値は生成しない）"""
+        try:
+            self.logger.info("NodeAI APIから全ての推論結果を取得します")
+            api_response = self._send_inference_request(payload_factory)
+            self.logger.info(f"NodeAI APIから{len(api_response.results)}件の推論結果を取得しました")
+            return api_response.results
+        except Exception as e:
+            self.logger.error(f"NodeAI API呼び出し中にエラーが発生: {str(e)}")
+            return []
+
     # =====================
     # プライベートメソッド - API通信
     # =====================
 
-    def _send_inference_request(self) -> NodeAIApiResponse:
+    def _send_inference_request(
+        self, payload_factory: Optional[Callable[[], StreamingJsonPayload]] = None
+    ) -> NodeAIApiResponse:
         """NodeAI APIにリクエストを送信し、レスポンスを取得"""
         headers = self._create_request_headers()
-        payload = self._create_payload()
+        payload = None if payload_factory else self._create_payload()
 
         self.logger.info("NodeAI APIにリクエスト送信")
         url = self._build_api_url()
         self.logger.info(f"リクエストURL: {url}")
 
         try:
-            response = self._execute_http_request(url, headers, payload)
+            response = self._execute_http_request(url, headers, payload, payload_factory)
             response_data = response.json()
             return self._parse_api_response(response_data)
 
@@ -68,12 +99,21 @@ class NodeaiRepository:
             return self._create_null_api_response()
 
     def _execute_http_request(
-        self, url: str, headers: Dict[str, str], payload: Dict[str, Any]
+        self,
+        url: str,
+        headers: Dict[str, str],
+        payload: Optional[Dict[str, Any]],
+        payload_factory: Optional[Callable[[], StreamingJsonPayload]] = None,
     ) -> requests.Response:
-        """HTTP リクエストを実行"""
+        """HTTP リクエストを実行（接続プール・タイムアウト・再試行・サーキットブレーカー付き）"""
         jst = datetime.timezone(datetime.timedelta(hours=9))
         start_time = datetime.datetime.now(jst)
-        response = requests.post(url=url, headers=headers, json=payload)
+        if payload_factory:
+            # ボディは送信しながら生成するため、再試行ごとに作り直す
+            self.logger.info("リクエストボディをストリーミングで送信します")
+            response = self.http_client.post(url=url, headers=headers, body_factory=payload_factory)
+        else:
+            response = self.http_client.post(url=url, headers=headers, json=payload)
         elapsed_time = (datetime.datetime.now(jst) - start_time).total_seconds()
 
         self.logger.info(
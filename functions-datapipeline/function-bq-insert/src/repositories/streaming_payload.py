@@ -0,0 +1,69 @@
+"""
+NodeAI APIのリクエストボディをファイル全体をメモリに載せずに生成する処理
+"""
+import base64
+import json
+from typing import Iterable, Iterator
+
+
+class StreamingJsonPayload:
+    """
+    {"<field>": "<base64>"} 形式のJSONボディを、元データのチャンクから逐次生成する読み込み可能なボディ
+
+    チャンクごとに base64 エンコードし（3バイト単位に満たない端数は次のチャンクに繰り越す）、
+    requests には read() と長さを持つファイルとして渡すため、Content-Length 付きで少しずつ送信される。
+    使用メモリはチャンクサイズの定数倍で、元データのサイズに依存しない。
+    """
+
+    def __init__(self, chunks: Iterable[bytes], source_size: int, field: str = "inferenceDataset"):
+        """
+        StreamingJsonPayloadを初期化
+
+        Args:
+            chunks: 元データのチャンク
+            source_size: 元データのバイト数（Content-Length の計算に使用）
+            field: base64 文字列を入れるJSONのキー
+        """
+        self.prefix = ('{' + json.dumps(field) + ': "').encode("utf-8")
+        self.suffix = b'"}'
+        self.length = len(self.prefix) + 4 * -(-source_size // 3) + len(self.suffix)
+        self._parts = self._generate(iter(chunks))
+        # 読み込み途中のパートと読み込み位置（小さい read() ごとにパート全体をコピーしないため）
+        self._buffer = b""
+        self._offset = 0
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __iter__(self) -> Iterator[bytes]:
+        if self._offset < len(self._buffer):
+            yield self._buffer[self._offset:]
+        self._buffer, self._offset = b"", 0
+        yield from self._parts
+
+    def read(self, size: int = -1) -> bytes:
+        """最大 size バイトを読み込む（-1 の場合は残り全て）"""
+        if size is None or size < 0:
+            return b"".join(self)
+        while len(self._buffer) - self._offset < size:
+            part = next(self._parts, None)
+            if part is None:
+                break
+            self._buffer = self._buffer[self._offset:] + part
+            self._offset = 0
+        data = self._buffer[self._offset:self._offset + size]
+        self._offset += len(data)
+        return data
+
+    def _generate(self, chunks: Iterator[bytes]) -> Iterator[bytes]:
+        yield self.prefix
+        carry = b""
+        for chunk in chunks:
+            data = carry + chunk
+            cut = len(data) - len(data) % 3
+            if cut:
+                yield base64.b64encode(data[:cut])
+            carry = data[cut:]
+        if carry:
+            yield base64.b64encode(carry)
+        yield self.suffix
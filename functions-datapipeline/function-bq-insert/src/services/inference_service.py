@@ -1,13 +1,14 @@
 import logging
 import random
 from datetime import datetime, timezone, timedelta
-from typing import Dict, Any
+from typing import Callable, Dict, Any, List, Optional
 
 from ..models import InferenceResult
 from ..repositories.bigquery_repository import BigQueryRepository
 from ..repositories.nodeai_repository import NodeaiRepository
 from ..repositories.cloud_storage_repository import CloudStorageRepository
-from ..schemas import NodeAIApiResponse
+from ..repositories.streaming_payload import StreamingJsonPayload
+from ..schemas import NodeAIApiResponse, AnomalyResult
 
 
 class InferenceService:
@@ -18,10 +19,20 @@ class InferenceService:
         bigquery_repository: BigQueryRepository,
         nodeai_repository: NodeaiRepository,
         cloud_storage_repository: CloudStorageRepository,
+        ingest_all_results: bool = False,
+        source: str = "",
+        stream_payload: bool = False,
+        payload_chunk_bytes: int = 1024 * 1024,
+        tail_window_rows: int = 0,
     ):
         self.bigquery_repository = bigquery_repository
         self.nodeai_repository = nodeai_repository
         self.cloud_storage_repository = cloud_storage_repository
+        self.ingest_all_results = ingest_all_results
+        self.source = source
+        self.stream_payload = stream_payload
+        self.payload_chunk_bytes = payload_chunk_bytes
+        self.tail_window_rows = tail_window_rows
         self.logger = logging.getLogger(self.__class__.__name__)
 
     def process_inference(self) -> Dict[str, Any]:
@@ -29,18 +40,28 @@ class InferenceService:
         try:
             self.logger.info("推論処理を開始します")
 
-            # Cloud StorageからCSVファイルをダウンロード
-            csv_ready = self.cloud_storage_repository.prepare_csv_file_for_inference(
-                self.nodeai_repository.config.csv_file_path
-            )
-            if not csv_ready:
-                raise Exception("CSVファイルの準備に失敗しました")
+            # Cloud StorageからCSVファイルを準備（ストリーミング時はダウンロードせずに送信時に読み込む）
+            payload_factory = None
+            if self.tail_window_rows:
+                payload_factory = self._create_tail_payload_factory()
+            elif self.stream_payload:
+                payload_factory = self._create_payload_factory()
+            else:
+                csv_ready = self.cloud_storage_repository.prepare_csv_file_for_inference(
+                    self.nodeai_repository.config.csv_file_path
+                )
+                if not csv_ready:
+                    raise Exception("CSVファイルの準備に失敗しました")
 
             # テーブルの存在確認と作成
             self.bigquery_repository.ensure_table_exists()
 
+            # レスポンスの全ての推論結果を取り込む
+            if self.ingest_all_results:
+                return self._process_all_results(payload_factory)
+
             # NodeAI APIで推論値を取得
-            inference_value = self.nodeai_repository.get_inference_value()
+            inference_value = self.nodeai_repository.get_inference_value(payload_factory)
             # JST（UTC+9）タイムゾーンで現在時刻を取得
             jst = timezone(timedelta(hours=9))
             current_time = datetime.now(jst)
@@ -73,3 +94,99 @@ class InferenceService:
         except Exception as e:
             self.logger.error(f"推論処理中にエラーが発生: {str(e)}")
             raise
+
+    def _create_payload_factory(self) -> Callable[[], StreamingJsonPayload]:
+        """
+        CSVのBlobをチャンクごとに読み込みながら base64 エンコードするリクエストボディの作成関数
+
+        /tmp へのダウンロードとファイル全体のエンコードを行わないため、使用メモリはチャンクサイズの定数倍になる。
+        """
+        blob = self.cloud_storage_repository.resolve_csv_blob()
+        if blob is None:
+            raise Exception("CSVファイルの準備に失敗しました")
+        self.logger.info(f"CSVを {self.payload_chunk_bytes} bytes ずつストリーミングで送信します")
+        return lambda: StreamingJsonPayload(
+            self.cloud_storage_repository.iter_blob_chunks(blob, self.payload_chunk_bytes), blob.size
+        )
+
+    def _create_tail_payload_factory(self) -> Callable[[], StreamingJsonPayload]:
+        """CSVのヘッダー行と末尾の TAIL_WINDOW_ROWS 行だけを送るリクエストボディの作成関数"""
+        blob = self.cloud_storage_repository.resolve_csv_blob()
+        if blob is None:
+            raise Exception("CSVファイルの準備に失敗しました")
+        data = self.cloud_storage_repository.download_csv_tail(blob, self.tail_window_rows)
+        if data is None:
+            raise Exception("CSVファイルにデータ行がないか、末尾の取得に失敗しました")
+        return lambda: StreamingJsonPayload([data], len(data))
+
+    def _process_all_results(
+        self, payload_factory: Optional[Callable[[], StreamingJsonPayload]] = None
+    ) -> Dict[str, Any]:
+        """
+        NodeAI APIの全ての推論結果をそれぞれの時刻の行として一括挿入
+
+        取り込み済みの最新時刻（ウォーターマーク）以前の行は挿入しないため、取得期間が重なっても
+        同じ時刻の行は二重に書き込まれない。ウォーターマークは条件付き書き込みで進め、時刻を戻さない。
+        行の挿入IDは (source, timestamp) から決まるが、挿入IDで重複を除くのは insert_rows（insertAll）のみで、
+        Storage Write API・バッチロードでは、同時に実行したリクエストの取得期間が重なると二重に書き込まれうる。
+        """
+        anomaly_results = self.nodeai_repository.get_inference_results(payload_factory)
+        results = self._build_inference_results(anomaly_results)
+
+        watermark = self.cloud_storage_repository.load_ingest_watermark(self.source)
+        new_results = [result for result in results if watermark is None or result.timestamp > watermark]
+        self.logger.info(
+            f"推論結果 {len(anomaly_results)}件のうち、有効な値 {len(results)}件、"
+            f"未取り込み {len(new_results)}件を挿入します（ウォーターマーク: {watermark}）"
+        )
+
+        summary = {
+            "received_count": len(anomaly_results),
+            "inference_count": len(new_results),
+            "skipped_count": len(results) - len(new_results),
+            "watermark": watermark.isoformat() if watermark else None,
+        }
+        if not new_results:
+            summary["bigquery_insert"] = "skipped"
+            return summary
+
+        summary.update({
+            "first_timestamp": new_results[0].timestamp.isoformat(),
+            "last_timestamp": new_results[-1].timestamp.isoformat(),
+            "inference_value": new_results[-1].inference_value,
+        })
+        if self.bigquery_repository.insert_inference_results(new_results):
+            self.cloud_storage_repository.save_ingest_watermark(self.source, new_results[-1].timestamp)
+            self.logger.info("BigQueryへの挿入が完了しました")
+            summary["bigquery_insert"] = "success"
+        else:
+            self.logger.error("BigQueryへの挿入に失敗しました")
+            summary["bigquery_insert"] = "failed"
+        return summary
+
+    def _build_inference_results(self, anomaly_results: List[AnomalyResult]) -> List[InferenceResult]:
+        """推論結果を時刻順の InferenceResult に変換（値のない結果と重複した時刻は除外）"""
+        by_timestamp: Dict[datetime, InferenceResult] = {}
+        for anomaly_result in anomaly_results:
+            if anomaly_result.reconstructionError is None:
+                continue
+            timestamp = self._parse_timestamp(anomaly_result.timestamp)
+            if timestamp is None:
+                continue
+            by_timestamp[timestamp] = InferenceResult(
+                timestamp=timestamp,
+                inference_value=float(anomaly_result.reconstructionError),
+                source=self.source,
+            )
+        return [by_timestamp[timestamp] for timestamp in sorted(by_timestamp)]
+
+    def _parse_timestamp(self, value: str) -> Optional[datetime]:
+        """推論結果の時刻を解析（タイムゾーンなしはUTC、解析できない場合はNone）"""
+        try:
+            timestamp = datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            self.logger.warning(f"推論結果の時刻を解析できないため除外します: {value}")
+            return None
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=timezone.utc)
+        return timestamp
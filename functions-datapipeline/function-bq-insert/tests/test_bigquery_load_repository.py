@@ -0,0 +1,102 @@
+import datetime
+import json
+import os
+
+import pytest
+
+from src.config import Config
+from src.models import InferenceResult
+from src.repositories.bigquery_load_repository import LocalLoadRepository
+
+
+DAY = datetime.datetime(2026, 10, 1, tzinfo=datetime.timezone.utc)
+
+
+@pytest.fixture
+def repository(tmp_path):
+    config = Config(
+        project_id="project", dataset_id="dataset", table_id="table",
+        nodeai_api_key="", nodeai_api_id="", nodeai_base_url="", csv_file_path="",
+        threshold=0.5, tc_data_delay_minutes=0, gcs_bucket_name="", gcs_file_name="",
+        bigquery_write_mode="batch_load", batch_load_local_path=str(tmp_path),
+    )
+    return LocalLoadRepository(config, str(tmp_path))
+
+
+def _loaded_rows(repository, partition):
+    path = os.path.join(repository.table_directory, f"{partition}.ndjson")
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_stage_writes_one_file_per_partition(repository):
+    names = repository.stage([
+        InferenceResult(DAY, 1.0),
+        InferenceResult(DAY + datetime.timedelta(hours=1), 2.0),
+        InferenceResult(DAY + datetime.timedelta(days=1), 3.0),
+    ])
+
+    staged = repository._list_staged()
+    assert sorted(staged_file.name for staged_file in staged) == sorted(names)
+    assert sorted(staged_file.partition for staged_file in staged) == ["20261001", "20261002"]
+
+
+def test_flush_loads_staged_rows_and_removes_files(repository):
+    repository.stage([InferenceResult(DAY, 1.0), InferenceResult(DAY + datetime.timedelta(days=1), 2.0)])
+
+    result = repository.flush()
+
+    assert result["files"] == 2
+    assert result["rows"] == 2
+    assert [row["inference_value"] for row in _loaded_rows(repository, "20261001")] == [1.0]
+    assert [row["inference_value"] for row in _loaded_rows(repository, "20261002")] == [2.0]
+    assert repository._list_staged() == []
+    assert os.listdir(os.path.join(repository.base_path, repository.staging_prefix, "_manifests")) == []
+    assert repository.flush() is None
+
+
+def test_flush_after_interrupted_delete_does_not_reload(repository, monkeypatch):
+    repository.stage([InferenceResult(DAY, 1.0)])
+    delete_staged = repository._delete_staged
+
+    def fail(names):
+        raise OSError("interrupted")
+
+    monkeypatch.setattr(repository, "_delete_staged", fail)
+    with pytest.raises(OSError):
+        repository.flush()
+    monkeypatch.setattr(repository, "_delete_staged", delete_staged)
+
+    # 残ったマニフェストを引き継ぎ、同じジョブIDのため二重に反映しない
+    result = repository.flush()
+
+    assert result["jobs"][0]["resumed"] is True
+    assert [row["inference_value"] for row in _loaded_rows(repository, "20261001")] == [1.0]
+    assert repository._list_staged() == []
+
+
+def test_flush_resumes_manifest_of_another_instance(repository):
+    repository.stage([InferenceResult(DAY, 1.0)])
+    claimed = [staged_file.name for staged_file in repository._list_staged()]
+    repository._create_manifest(
+        repository._manifest_name("20261001"), repository._encode_manifest("20261001", claimed, False)
+    )
+    repository.stage([InferenceResult(DAY, 2.0)])
+
+    # 確保済みのファイルのみ反映し、後から書き溜めたファイルは次回に反映する
+    first = repository.flush()
+    second = repository.flush()
+
+    assert first["files"] == 1 and first["jobs"][0]["resumed"] is True
+    assert second["files"] == 1 and second["jobs"][0]["resumed"] is False
+    assert [row["inference_value"] for row in _loaded_rows(repository, "20261001")] == [1.0, 2.0]
+
+
+def test_replace_partitions_truncates_loaded_rows(repository):
+    repository.stage([InferenceResult(DAY, 1.0)])
+    repository.flush()
+    repository.stage([InferenceResult(DAY, 5.0)])
+
+    repository.flush(replace_partitions=True)
+
+    assert [row["inference_value"] for row in _loaded_rows(repository, "20261001")] == [5.0]
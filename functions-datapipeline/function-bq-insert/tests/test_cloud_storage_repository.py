@@ -0,0 +1,218 @@
+import datetime
+import json
+
+import pytest
+from google.cloud.exceptions import NotFound, PreconditionFailed
+
+from src.config import Config
+from src.repositories import cloud_storage_repository
+from src.repositories.cloud_storage_repository import CloudStorageRepository
+
+
+class FakeBlob:
+    """範囲指定の取得回数を数える Blob"""
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.size = len(data)
+        self.ranges = []
+
+    def download_as_bytes(self, start: int, end: int) -> bytes:
+        self.ranges.append((start, end))
+        return self.data[start:end + 1]
+
+
+class FakeStoredBlob:
+    """FakeBucket に保存されるオブジェクト（世代付き）"""
+
+    def __init__(self, bucket: "FakeBucket", name: str, generation=None, updated=None):
+        self.bucket = bucket
+        self.name = name
+        self.generation = generation
+        self.updated = updated
+
+    def download_as_bytes(self) -> bytes:
+        if self.name not in self.bucket.objects:
+            raise NotFound(self.name)
+        data, self.generation = self.bucket.objects[self.name]
+        return data
+
+    def upload_from_string(self, data, content_type=None, if_generation_match=None):
+        current = self.bucket.objects.get(self.name, (None, 0))[1]
+        if if_generation_match is not None and current != if_generation_match:
+            raise PreconditionFailed(self.name)
+        self.bucket.put(self.name, data.encode("utf-8") if isinstance(data, str) else data)
+        self.generation = self.bucket.objects[self.name][1]
+
+
+class FakeBucket:
+    """名前と世代だけを保持するバケット"""
+
+    def __init__(self):
+        self.objects = {}
+        self.updated = {}
+        self.next_generation = 1
+        self.get_blob_calls = []
+        self.list_calls = []
+
+    def put(self, name: str, data: bytes, updated=None) -> None:
+        self.objects[name] = (data, self.next_generation)
+        self.updated[name] = updated
+        self.next_generation += 1
+
+    def blob(self, name: str) -> FakeStoredBlob:
+        return FakeStoredBlob(self, name)
+
+    def get_blob(self, name: str, generation=None):
+        self.get_blob_calls.append(name)
+        if name not in self.objects or generation not in (None, self.objects[name][1]):
+            return None
+        return FakeStoredBlob(self, name, self.objects[name][1], self.updated[name])
+
+    def list_blobs(self, prefix: str, start_offset=None):
+        self.list_calls.append((prefix, start_offset))
+        return [
+            FakeStoredBlob(self, name, generation, self.updated[name])
+            for name, (_, generation) in sorted(self.objects.items())
+            if name.startswith(prefix) and (start_offset is None or name >= start_offset)
+        ]
+
+
+@pytest.fixture
+def bucket():
+    return FakeBucket()
+
+
+@pytest.fixture
+def repository(monkeypatch, bucket):
+    monkeypatch.setattr(cloud_storage_repository.storage, "Client", lambda project: None)
+    config = Config(
+        project_id="project", dataset_id="dataset", table_id="table",
+        nodeai_api_key="", nodeai_api_id="", nodeai_base_url="", csv_file_path="",
+        threshold=0.5, tc_data_delay_minutes=0, gcs_bucket_name="bucket", gcs_file_name="",
+    )
+    repository = CloudStorageRepository(config)
+    repository.client = type("FakeClient", (), {"bucket": lambda self, name: bucket})()
+    return repository
+
+
+def _csv(rows: int) -> bytes:
+    lines = ["timestamp,sensor_min,sensor_max"]
+    lines += [f"2026-10-01T{k // 60:02d}:{k % 60:02d}:00,{k},{k + 1}" for k in range(rows)]
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def test_small_file_is_read_in_one_request(repository):
+    blob = FakeBlob(_csv(10))
+
+    data = repository.download_csv_tail(blob, 3)
+
+    assert data.decode("utf-8").splitlines() == [
+        "timestamp,sensor_min,sensor_max",
+        "2026-10-01T00:07:00,7,8",
+        "2026-10-01T00:08:00,8,9",
+        "2026-10-01T00:09:00,9,10",
+    ]
+    assert len(blob.ranges) == 1
+
+
+def test_large_file_reads_header_and_tail_only(repository, monkeypatch):
+    monkeypatch.setattr(CloudStorageRepository, "HEAD_RANGE_BYTES", 256)
+    content = _csv(1000)
+    blob = FakeBlob(content)
+
+    data = repository.download_csv_tail(blob, 5)
+
+    lines = data.decode("utf-8").splitlines()
+    assert lines[0] == "timestamp,sensor_min,sensor_max"
+    assert lines[1:] == content.decode("utf-8").splitlines()[-5:]
+    assert sum(end + 1 - start for start, end in blob.ranges) < len(content) // 10
+
+
+def test_window_larger_than_file_returns_all_rows(repository, monkeypatch):
+    monkeypatch.setattr(CloudStorageRepository, "HEAD_RANGE_BYTES", 64)
+    content = _csv(20)
+    blob = FakeBlob(content)
+
+    data = repository.download_csv_tail(blob, 100)
+
+    assert data == content
+
+
+@pytest.mark.parametrize("content", [b"", b"timestamp,sensor_min,sensor_max\n", b"timestamp,sensor_min,sensor_max\n\n"])
+def test_no_data_rows_returns_none(repository, content):
+    assert repository.download_csv_tail(FakeBlob(content), 5) is None
+
+
+def test_ingest_watermark_only_moves_forward(repository):
+    earlier = datetime.datetime(2026, 10, 1, 0, 0, tzinfo=datetime.timezone.utc)
+    later = earlier + datetime.timedelta(minutes=5)
+
+    assert repository.load_ingest_watermark("source") is None
+    assert repository.save_ingest_watermark("source", later) is True
+    assert repository.save_ingest_watermark("source", earlier) is False
+    assert repository.load_ingest_watermark("source") == later
+
+
+def test_ingest_watermark_retries_on_concurrent_update(repository, bucket, monkeypatch):
+    monkeypatch.setattr(cloud_storage_repository.time, "sleep", lambda seconds: None)
+    path = repository._get_watermark_path("source")
+    original_upload = FakeStoredBlob.upload_from_string
+    uploads = []
+
+    def racing_upload(blob, data, content_type=None, if_generation_match=None):
+        uploads.append(if_generation_match)
+        if len(uploads) == 1:
+            # 読み込み後に他のリクエストがより古い時刻を保存した状態を再現する
+            bucket.put(path, b'{"latest_timestamp": "2026-10-01T00:01:00+00:00"}')
+        return original_upload(blob, data, content_type=content_type, if_generation_match=if_generation_match)
+
+    monkeypatch.setattr(FakeStoredBlob, "upload_from_string", racing_upload)
+    latest = datetime.datetime(2026, 10, 1, 0, 5, tzinfo=datetime.timezone.utc)
+
+    assert repository.save_ingest_watermark("source", latest) is True
+    assert uploads == [0, 1]
+    assert repository.load_ingest_watermark("source") == latest
+
+
+def _today_name(time_of_day: str) -> str:
+    return f"timeseries_data/{datetime.datetime.now(datetime.timezone.utc):%Y%m%d}_{time_of_day}.csv"
+
+
+def test_latest_blob_is_resolved_from_pointer_and_cached(repository, bucket):
+    bucket.put("timeseries_data/20200101_000000.csv", b"old")
+    bucket.put("timeseries_data/20200102_000000.csv", b"new")
+    generation = bucket.objects["timeseries_data/20200102_000000.csv"][1]
+    bucket.put(
+        CloudStorageRepository.LATEST_POINTER_PATH,
+        json.dumps({"name": "timeseries_data/20200102_000000.csv", "generation": generation}).encode("utf-8"),
+    )
+
+    first = repository._find_latest_timeseries_blob()
+    second = repository._find_latest_timeseries_blob()
+
+    assert first.name == second.name == "timeseries_data/20200102_000000.csv"
+    # ポインタの世代が変わらなければ、指す先のファイルを取得し直さない
+    assert bucket.get_blob_calls.count("timeseries_data/20200102_000000.csv") == 1
+    assert bucket.list_calls == []
+
+
+def test_latest_blob_falls_back_to_date_prefix_listing(repository, bucket):
+    bucket.put(_today_name("010000"), b"a")
+    bucket.put(_today_name("020000"), b"b")
+    bucket.put(_today_name("020000").replace(".csv", ".stats.json"), b"{}")
+
+    assert repository._find_latest_timeseries_blob().name == _today_name("020000")
+
+    bucket.put(_today_name("030000"), b"c")
+    assert repository._find_latest_timeseries_blob().name == _today_name("030000")
+    # 2回目は前回見つけたファイル以降だけを一覧する
+    assert bucket.list_calls[-1] == (_today_name("")[:-len("_.csv")], _today_name("020000"))
+
+
+def test_latest_blob_falls_back_to_full_listing_by_update_time(repository, bucket):
+    updated = datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc)
+    bucket.put("timeseries_data/20200101_000000.csv", b"a", updated=updated + datetime.timedelta(hours=1))
+    bucket.put("timeseries_data/20200102_000000.csv", b"b", updated=updated)
+
+    assert repository._find_latest_timeseries_blob().name == "timeseries_data/20200101_000000.csv"
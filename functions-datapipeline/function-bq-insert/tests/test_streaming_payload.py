@@ -0,0 +1,43 @@
+import base64
+import json
+
+import pytest
+
+from src.repositories.streaming_payload import StreamingJsonPayload
+
+
+DATA = bytes(range(256)) * 3 + b"tail"
+
+
+def _chunks(data: bytes, size: int):
+    return [data[k:k + size] for k in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 4, 5, 7, 1024])
+def test_body_matches_whole_file_encoding(chunk_size):
+    payload = StreamingJsonPayload(_chunks(DATA, chunk_size), len(DATA))
+
+    body = payload.read()
+
+    assert json.loads(body) == {"inferenceDataset": base64.b64encode(DATA).decode("ascii")}
+    assert len(body) == len(payload)
+
+
+@pytest.mark.parametrize("size", [0, 1, 2, 3, 4])
+def test_content_length_accounts_for_padding(size):
+    data = DATA[:size]
+
+    payload = StreamingJsonPayload(_chunks(data, 2), size, field="data")
+
+    assert len(payload) == len(json.dumps({"data": base64.b64encode(data).decode("ascii")}, separators=(",", ": ")))
+    assert len(payload.read()) == len(payload)
+
+
+def test_small_reads_and_iteration_resume_where_reading_stopped():
+    payload = StreamingJsonPayload(_chunks(DATA, 10), len(DATA))
+    expected = json.dumps({"inferenceDataset": base64.b64encode(DATA).decode("ascii")}).encode("utf-8")
+
+    head = payload.read(7) + payload.read(5)
+
+    assert head + b"".join(payload) == expected
+    assert payload.read(10) == b""
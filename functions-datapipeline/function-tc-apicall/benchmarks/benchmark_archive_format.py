@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+アーカイブ形式（.gts）のベンチマーク
+
+CSV・gzip圧縮したCSVとのサイズ比較、符号化・復号の処理時間を列数ごとに計測します。
+復号結果が元データと一致することも併せて検証します。
+
+使い方:
+    python benchmarks/benchmark_archive_format.py --days 7 --columns 50 200
+"""
+
+import argparse
+import gzip
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# function-tc-apicall 直下をインポートパスに追加
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from sample_data import generate_timeseries
+from src.models import SensorSchema
+from src.repositories.archive_format import GorillaArchiveFormat
+from src.services.csv_service import CSVService
+from src.services.timeseries_arrays import to_timestamp_ms, to_value_matrices
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="アーカイブ形式のベンチマーク")
+    parser.add_argument("--days", type=int, default=1, help="日数（1日 = 1440行）")
+    parser.add_argument("--columns", type=int, nargs="+", default=[50, 200, 500], help="CSVのデータ列数")
+    parser.add_argument("--fill-ratio", type=float, default=0.3, help="値が存在するセンサーの割合")
+    args = parser.parse_args()
+
+    archive_format = GorillaArchiveFormat()
+    print(
+        f"{'列数':>6} {'CSV[KB]':>10} {'CSV.gz[KB]':>11} {'gts[KB]':>9} {'対CSV':>7} {'対gz':>6} "
+        f"{'符号化[ms]':>11} {'復号[ms]':>9}  一致"
+    )
+    for columns in args.columns:
+        sensor_count = max(columns // 2, 1)
+        schemas = [SensorSchema(name=f"device:sensor{j}", unit="", type="") for j in range(sensor_count)]
+        timeseries_data = {}
+        for day in range(args.days):
+            for timestamp, measurements in generate_timeseries(1440, sensor_count, args.fill_ratio, seed=day).items():
+                timeseries_data[timestamp.replace("2025-08-28", f"2025-08-{day + 1:02d}")] = measurements
+
+        csv_path = CSVService().create_csv_from_timeseries(schemas, timeseries_data)
+        try:
+            with open(csv_path, "rb") as f:
+                csv_bytes = f.read()
+        finally:
+            os.unlink(csv_path)
+        gzip_size = len(gzip.compress(csv_bytes, 6))
+
+        timestamps_ms = to_timestamp_ms(timeseries_data.keys())
+        min_values, max_values = to_value_matrices(sensor_count, timeseries_data.values())
+        start = time.perf_counter()
+        archive = archive_format.encode([s.name for s in schemas], timestamps_ms, min_values, max_values)
+        encode_time = time.perf_counter() - start
+        start = time.perf_counter()
+        decoded = archive_format.decode_bytes(archive)
+        decode_time = time.perf_counter() - start
+
+        identical = (
+            np.array_equal(decoded.timestamps.astype(np.int64), timestamps_ms)
+            and np.array_equal(decoded.min_values, min_values, equal_nan=True)
+            and np.array_equal(decoded.max_values, max_values, equal_nan=True)
+        )
+        print(
+            f"{sensor_count * 2:>6} {len(csv_bytes) / 1024:>10.1f} {gzip_size / 1024:>11.1f} "
+            f"{len(archive) / 1024:>9.1f} {len(csv_bytes) / len(archive):>6.1f}x {gzip_size / len(archive):>5.1f}x "
+            f"{encode_time * 1000:>11.1f} {decode_time * 1000:>9.1f}  {'OK' if identical else 'NG'}"
+        )
+        if not identical:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+CSVエンコーダのベンチマーク
+
+csv.writer で1行ずつ書き込む標準エンコーダと、列ブロック単位の
+BulkCSVEncoder のエンコード時間（メモリ上、ディスクI/Oを除く）を列数ごとに比較します。
+bulk は MeasurementPoint からの変換を含む時間、block は変換済みの数値列
+（timeseries_arrays.CellBlock）からの文字列化のみの時間です。
+CSVService が作成するファイルがバイト単位で同一であることも併せて検証します。
+
+使い方:
+    python benchmarks/benchmark_csv_encoder.py --rows 1440 --columns 50 100 200 500
+"""
+
+import argparse
+import csv
+import gc
+import io
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Callable
+
+# function-tc-apicall 直下をインポートパスに追加
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from sample_data import generate_timeseries
+from src.models import SensorSchema
+from src.services.csv_encoder import BulkCSVEncoder
+from src.services.csv_service import CSVService
+from src.services.timeseries_arrays import to_cell_block
+
+
+def encode_standard(timeseries_data, sensor_count: int) -> str:
+    """CSVService の標準エンコーダと同じ csv.writer ループでデータ行を書き込む"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for timestamp, measurements in timeseries_data.items():
+        row = [timestamp]
+        for measurement in measurements:
+            if measurement:
+                row.extend([measurement.min_value, measurement.max_value])
+            else:
+                row.extend([None, None])
+        writer.writerow(row)
+    return buffer.getvalue()
+
+
+def encode_bulk(timeseries_data, sensor_count: int) -> str:
+    """BulkCSVEncoder でデータ行を書き込む"""
+    buffer = io.StringIO()
+    BulkCSVEncoder().write_rows(buffer, sensor_count, timeseries_data.items())
+    return buffer.getvalue()
+
+
+def encode_block(block, sensor_count: int) -> str:
+    """変換済みの数値列から BulkCSVEncoder でデータ行を文字列化する"""
+    return BulkCSVEncoder().encode_block(block)
+
+
+def measure(encode: Callable, data, sensor_count: int, repeat: int) -> float:
+    """エンコードを繰り返し実行し、最短時間を返す（timeit と同様にGCを止めて計測）"""
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            encode(data, sensor_count)
+            best = min(best, time.perf_counter() - start)
+        finally:
+            gc.enable()
+    return best
+
+
+def create_csv_bytes(csv_service: CSVService, schemas, timeseries_data) -> bytes:
+    """CSVService でCSVファイルを作成し、内容を返す"""
+    path = csv_service.create_csv_from_timeseries(schemas, timeseries_data)
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    finally:
+        os.unlink(path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="CSVエンコーダのベンチマーク")
+    parser.add_argument("--rows", type=int, default=1440, help="タイムスタンプ数（デフォルト: 1日分の分単位データ）")
+    parser.add_argument("--columns", type=int, nargs="+", default=[50, 100, 200, 500], help="CSVのデータ列数")
+    parser.add_argument("--fill-ratio", type=float, default=0.3, help="値が存在するセンサーの割合")
+    parser.add_argument("--repeat", type=int, default=9, help="計測回数（最短時間を採用）")
+    args = parser.parse_args()
+
+    standard = CSVService(encoder=CSVService.ENCODER_STANDARD)
+    bulk = CSVService(encoder=CSVService.ENCODER_BULK)
+
+    print(
+        f"{'列数':>6} {'standard[ms]':>14} {'bulk[ms]':>10} {'高速化':>8} "
+        f"{'block[ms]':>10} {'高速化':>8} {'サイズ[KB]':>11}  同一"
+    )
+    for columns in args.columns:
+        sensor_count = max(columns // 2, 1)
+        schemas = [SensorSchema(name=f"device:sensor{j}", unit="", type="") for j in range(sensor_count)]
+        timeseries_data = generate_timeseries(args.rows, sensor_count, args.fill_ratio)
+
+        standard_time = measure(encode_standard, timeseries_data, sensor_count, args.repeat)
+        bulk_time = measure(encode_bulk, timeseries_data, sensor_count, args.repeat)
+        block = to_cell_block(list(timeseries_data), list(timeseries_data.values()), sensor_count)
+        block_time = measure(encode_block, block, sensor_count, args.repeat)
+        standard_content = create_csv_bytes(standard, schemas, timeseries_data)
+        bulk_content = create_csv_bytes(bulk, schemas, timeseries_data)
+
+        print(
+            f"{sensor_count * 2:>6} {standard_time * 1000:>14.1f} {bulk_time * 1000:>10.1f} "
+            f"{standard_time / bulk_time:>7.2f}x {block_time * 1000:>10.1f} "
+            f"{standard_time / block_time:>7.2f}x {len(bulk_content) / 1024:>11.1f}  "
+            f"{'OK' if standard_content == bulk_content else 'NG'}"
+        )
+        if standard_content != bulk_content:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+JSONデコーダのベンチマーク
+
+response.json() + MeasurementPoint.from_dict による標準の解析と、
+msgspec によるスキーマ付きデコードの処理時間を比較します。
+解析結果（CSV出力）が同一であることも併せて検証します。
+
+使い方:
+    python benchmarks/benchmark_json_decoder.py --rows 1440 --sensors 25 100 250
+"""
+
+import argparse
+import gc
+import json
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Callable
+
+# function-tc-apicall 直下をインポートパスに追加
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from sample_data import generate_timeseries
+from src.config import Config
+from src.repositories.time_series_repository import APITimeSeriesRepository
+from src.services.csv_service import CSVService
+
+
+def build_payload(row_count: int, sensor_count: int, fill_ratio: float) -> bytes:
+    """/measurement/measurements/series 形式のレスポンス本文を生成"""
+    timeseries_data = generate_timeseries(row_count, sensor_count, fill_ratio)
+    payload = {
+        "series": [
+            {"name": f"device:sensor{j}", "unit": "", "type": "float"} for j in range(sensor_count)
+        ],
+        "values": {
+            timestamp: [
+                {"min": m.min_value, "max": m.max_value} if m else None for m in measurements
+            ]
+            for timestamp, measurements in timeseries_data.items()
+        },
+        "truncated": False,
+    }
+    return json.dumps(payload).encode("utf-8")
+
+
+def measure(parse: Callable, content: bytes, repeat: int) -> float:
+    """解析を繰り返し実行し、最短時間を返す（timeit と同様にGCを止めて計測）"""
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            parse(content)
+            best = min(best, time.perf_counter() - start)
+        finally:
+            gc.enable()
+    return best
+
+
+def create_csv_bytes(schemas, timeseries_data) -> bytes:
+    """解析結果からCSVファイルを作成し、内容を返す"""
+    path = CSVService().create_csv_from_timeseries(schemas, timeseries_data)
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    finally:
+        os.unlink(path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="JSONデコーダのベンチマーク")
+    parser.add_argument("--rows", type=int, default=1440, help="タイムスタンプ数（デフォルト: 1日分の分単位データ）")
+    parser.add_argument("--sensors", type=int, nargs="+", default=[25, 100, 250], help="センサー数")
+    parser.add_argument("--fill-ratio", type=float, default=0.3, help="値が存在するセンサーの割合")
+    parser.add_argument("--repeat", type=int, default=5, help="計測回数（最短時間を採用）")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    repository = APITimeSeriesRepository(Config(tenant_domain="", authorization="", source=""))
+    if repository.typed_decoder is None:
+        sys.exit("msgspec がインストールされていません")
+
+    def parse_standard(content: bytes):
+        return repository._parse_response(json.loads(content))
+
+    print(f"{'センサー数':>8} {'standard[ms]':>14} {'typed[ms]':>10} {'高速化':>8} {'サイズ[KB]':>11}  同一")
+    for sensor_count in args.sensors:
+        content = build_payload(args.rows, sensor_count, args.fill_ratio)
+
+        standard_time = measure(parse_standard, content, args.repeat)
+        typed_time = measure(repository._parse_response_typed, content, args.repeat)
+        identical = create_csv_bytes(*parse_standard(content)) == create_csv_bytes(
+            *repository._parse_response_typed(content)
+        )
+
+        print(
+            f"{sensor_count:>8} {standard_time * 1000:>14.1f} {typed_time * 1000:>10.1f} "
+            f"{standard_time / typed_time:>7.2f}x {len(content) / 1024:>11.1f}  "
+            f"{'OK' if identical else 'NG'}"
+        )
+        if not identical:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
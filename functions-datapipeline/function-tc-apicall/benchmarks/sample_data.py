@@ -0,0 +1,48 @@
+"""
+ベンチマーク用の時系列データ生成
+"""
+
+import random
+from typing import Dict, List, Optional
+
+from src.models import MeasurementPoint
+
+
+def generate_timeseries(
+    row_count: int, sensor_count: int, fill_ratio: float, seed: int = 42
+) -> Dict[str, List[Optional[MeasurementPoint]]]:
+    """
+    実データに近い時系列データを生成（欠損多め・値はゆっくり変化）
+
+    Args:
+        row_count: タイムスタンプ数
+        sensor_count: センサー数
+        fill_ratio: 値が存在するセルの割合
+        seed: 乱数シード
+
+    Returns:
+        時系列データ（timestamp -> measurements）
+    """
+    rng = random.Random(seed)
+    # センサーごとに整数センサー/小数センサーを割り当てる
+    integer_sensors = [rng.random() < 0.4 for _ in range(sensor_count)]
+    levels = [rng.uniform(-80, 1000) for _ in range(sensor_count)]
+    present = [rng.random() < fill_ratio for _ in range(sensor_count)]
+
+    timeseries_data = {}
+    for i in range(row_count):
+        timestamp = f"2025-08-28T{i // 60 % 24:02d}:{i % 60:02d}:39.000Z"
+        measurements = []
+        for j in range(sensor_count):
+            if not present[j] or rng.random() < 0.05:
+                measurements.append(None)
+                continue
+            levels[j] += rng.choice([-0.1, 0.0, 0.0, 0.1])
+            if integer_sensors[j]:
+                value = int(levels[j])
+                measurements.append(MeasurementPoint(min_value=value, max_value=value))
+            else:
+                value = round(levels[j], 2)
+                measurements.append(MeasurementPoint(min_value=value, max_value=round(value + 0.01, 2)))
+        timeseries_data[timestamp] = measurements
+    return timeseries_data
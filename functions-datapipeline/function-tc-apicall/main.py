@@ -1,12 +1,42 @@
-import functions_framework
 import datetime
 import json
 import logging
+import os
+from typing import Dict, Optional
+
+from src.startup_profile import StartupProfiler
+
+# 起動時のインポート時間の計測（STARTUP_PROFILE=true で有効）
+startup_profiler = StartupProfiler(enabled=os.environ.get("STARTUP_PROFILE", "false").lower() == "true")
+startup_profiler.start()
+
+import functions_framework
 
 from src.config import Config
-from src.repositories.time_series_repository import APITimeSeriesRepository
-from src.repositories.storage_repository import CloudStorageRepository
+from src.repositories.hedging import HedgingPolicy
+from src.repositories.time_series_repository import (
+    APITimeSeriesRepository,
+    LatestMeasurementTimeSeriesRepository,
+    StreamingTimeSeriesRepository,
+)
+from src.repositories.storage_repository import (
+    CloudStorageRepository,
+    CompositeStorageRepository,
+    LocalStorageRepository,
+    ObjectStorageRepository,
+    StorageRepository,
+)
+from src.services.csv_service import CSVService
+from src.services.device_output_service import DeviceOutputService
+from src.services.memory_service import MemoryEstimator, MemoryProfiler
+from src.services.new_data_probe_service import NewDataProbeService
+from src.services.partition_service import PartitionReconciliationService
 from src.services.time_series_service import TimeSeriesService
+from src.services.zone_map_service import ZoneMapIndexService
+
+# ウォームインスタンスで再利用する検証済みの設定と Cloud Storage リポジトリ
+_cached_config: Optional[Config] = None
+_storage_repositories: Dict[str, StorageRepository] = {}
 
 
 # ログ設定 - Cloud Runの標準出力対応
@@ -38,6 +68,7 @@ def setup_logging():
 
 # ログ設定を実行
 setup_logging()
+startup_profiler.stop()
 
 
 # Cloud Functions Entry Point
@@ -69,38 +100,184 @@ def fetch_timeseries_data(request):
     }
 
     try:
-        # 設定読み込みと検証
-        logger.info("設定読み込み中...")
-        config = Config.from_environment()
-        
-        # 設定検証
-        validation_error = _validate_config(config)
-        if validation_error:
-            return _create_error_response(validation_error, 400, headers, request_start_time, logger)
-        
-        logger.info("設定検証完了")
+        # 設定読み込みと検証（ウォームインスタンスでは検証済みの設定を再利用）
+        global _cached_config
+        config = _cached_config
+        if config is None:
+            logger.info("設定読み込み中...")
+            config = Config.from_environment()
+            
+            # 設定検証
+            validation_error = _validate_config(config)
+            if validation_error:
+                return _create_error_response(validation_error, 400, headers, request_start_time, logger)
+            
+            _cached_config = config
+            logger.info("設定検証完了")
 
         # 依存関係の構築
-        time_series_repository = APITimeSeriesRepository(config)
+        hedging_policy = None
+        if config.hedge_requests:
+            hedging_policy = HedgingPolicy(
+                percentile=config.hedge_percentile,
+                max_hedge_ratio=config.hedge_max_ratio,
+            )
+            logger.info(f"ヘッジリクエスト有効: p{config.hedge_percentile:g}, 上限 {config.hedge_max_ratio:.0%}")
+        time_series_repository = APITimeSeriesRepository(config, hedging_policy=hedging_policy)
         
         # Cloud Storage設定があれば有効化
         storage_repository = None
         bucket_name = config.get_env_var("GCS_BUCKET_NAME")
         if bucket_name:
-            storage_repository = CloudStorageRepository(bucket_name)
+            storage_repository = _get_storage_repository(config, bucket_name)
             logger.info(f"Cloud Storage連携有効: {bucket_name}")
+        elif config.local_storage_path:
+            storage_repository = LocalStorageRepository(
+                config.local_storage_path, directory_sync_batch=config.local_storage_sync_batch
+            )
+            logger.info(f"ローカルストレージ有効: {config.local_storage_path}")
         else:
-            logger.info("GCS_BUCKET_NAME が設定されていないため、CSV格納をスキップします")
+            logger.info("GCS_BUCKET_NAME / LOCAL_STORAGE_PATH が設定されていないため、CSV格納をスキップします")
+
+        # BigQuery シンク（both: ストレージと同時に書き込み、bigquery: ストレージの代わりに書き込み）
+        if config.sink_mode != "gcs":
+            bigquery_sink = _get_bigquery_sink(config)
+            if config.sink_mode == "both" and storage_repository:
+                storage_repository = CompositeStorageRepository(storage_repository, [bigquery_sink])
+            else:
+                storage_repository = bigquery_sink
+            logger.info(f"BigQueryシンク有効（{config.sink_mode}）: {config.bigquery_sink_table}")
+
+        # 状態ファイル・サイドカー・索引などを保存する機能は、読み書き・条件付き書き込みに対応したストレージでのみ有効にする
+        object_storage = storage_repository if isinstance(storage_repository, ObjectStorageRepository) else None
+
+        # CSV出力形式
+        csv_service = CSVService(encoder=config.csv_encoder)
+        device_output_service = None
+        if object_storage and config.output_mode in ("device", "both"):
+            device_output_service = DeviceOutputService(
+                object_storage, csv_service, max_workers=config.device_output_workers
+            )
+            logger.info(f"デバイス別出力有効（出力形式: {config.output_mode}）")
+
+        # 長期保存用の圧縮アーカイブ（ストレージ必須）
+        archive_service = None
+        if object_storage and config.archive_output:
+            from src.services.archive_service import ArchiveService
+            archive_service = ArchiveService(object_storage, config.source)
+            logger.info("アーカイブ出力有効")
+
+        # 多段階ロールアップ（ストレージ必須）
+        rollup_service = None
+        if object_storage and config.rollups:
+            from src.services.rollup_service import RollupService
+            rollup_service = RollupService(object_storage, config.source)
+            logger.info("ロールアップ有効")
+
+        # 保存オブジェクトの索引（ストレージ必須）
+        zone_map_service = None
+        if object_storage and config.zone_map_index:
+            zone_map_service = ZoneMapIndexService(object_storage, config.source)
+            logger.info("索引（ゾーンマップ）有効")
+
+        # 新規データの事前確認（ウォーターマークの保存にストレージ必須）
+        new_data_probe_service = None
+        if object_storage and config.new_data_probe:
+            if not isinstance(time_series_repository, LatestMeasurementTimeSeriesRepository):
+                raise ValueError("NEW_DATA_PROBE は最新計測時刻の取得に対応した取得元でのみ使用できます")
+            new_data_probe_service = NewDataProbeService(
+                time_series_repository, object_storage, config.source
+            )
+            logger.info("新規データの事前確認有効")
+
+        # 遅延データのパーティションマージ（ストレージ必須）
+        partition_service = None
+        if object_storage and config.reconcile_partitions:
+            partition_service = PartitionReconciliationService(object_storage, config.source)
+            logger.info("パーティションマージ有効")
+
+        # 直近データのリングバッファ（ストレージ必須）
+        ring_buffer_service = None
+        if object_storage and config.ring_buffer_hours > 0:
+            from src.services.ring_buffer_service import RingBufferService
+            ring_buffer_service = RingBufferService(
+                object_storage,
+                config.source,
+                hours=config.ring_buffer_hours,
+                interval_seconds=config.sampling_interval_seconds,
+            )
+            logger.info(f"リングバッファ有効: 直近 {config.ring_buffer_hours} 時間")
+
+        # センサーごとの要約統計量（ストレージ未設定時はレスポンスのダイジェストのみ）
+        statistics_service = None
+        if config.summary_statistics:
+            from src.services.statistics_service import SummaryStatisticsService
+            statistics_service = SummaryStatisticsService(object_storage)
+            logger.info("要約統計量の出力有効")
+
+        # 取得時の異常スコア（状態の保存にストレージ必須）
+        anomaly_service = None
+        if object_storage and config.anomaly_scoring:
+            from src.services.anomaly_service import AnomalyScoringService
+            anomaly_service = AnomalyScoringService(
+                object_storage,
+                config.source,
+                alpha=config.anomaly_alpha,
+                threshold=config.anomaly_threshold,
+                warmup=config.anomaly_warmup,
+            )
+            logger.info(f"異常スコア有効: alpha={config.anomaly_alpha}, 閾値={config.anomaly_threshold}")
+
+        # メモリ計測とメモリガード
+        memory_profiler = MemoryProfiler(enabled=config.memory_profile)
+        memory_estimator = None
+        if config.memory_budget_mb > 0:
+            if not isinstance(time_series_repository, StreamingTimeSeriesRepository):
+                raise ValueError("MEMORY_BUDGET_MB は逐次取得に対応した取得元でのみ使用できます")
+            memory_estimator = MemoryEstimator(
+                budget_bytes=config.memory_budget_mb * 1024 * 1024,
+                series_count_hint=config.series_count_hint,
+                sampling_interval_seconds=config.sampling_interval_seconds,
+            )
+            logger.info(f"メモリガード有効: 予算 {config.memory_budget_mb}MB")
 
         # サービスの作成
         time_series_service = TimeSeriesService(
             time_series_repository=time_series_repository,
-            storage_repository=storage_repository
+            storage_repository=storage_repository,
+            csv_service=csv_service,
+            partition_service=partition_service,
+            memory_profiler=memory_profiler,
+            memory_estimator=memory_estimator,
+            statistics_service=statistics_service,
+            ring_buffer_service=ring_buffer_service,
+            device_output_service=device_output_service,
+            wide_output=config.output_mode != "device",
+            archive_service=archive_service,
+            new_data_probe_service=new_data_probe_service,
+            anomaly_service=anomaly_service,
+            rollup_service=rollup_service,
+            zone_map_service=zone_map_service
         )
 
+        setup_seconds = (datetime.datetime.now() - request_start_time).total_seconds()
+        logger.info(f"設定読み込み・依存関係の構築時間: {setup_seconds:.3f}秒")
+
         # 時系列データ処理
         logger.info("時系列データ処理開始")
-        result = time_series_service.process_time_series_data()
+        processing_failed = True
+        try:
+            result = time_series_service.process_time_series_data()
+            processing_failed = False
+        finally:
+            # 処理が途中で失敗しても、それまでの書き込みを確定する（その場合は元のエラーを優先して返す）
+            if storage_repository:
+                try:
+                    storage_repository.flush()
+                except Exception as e:
+                    if not processing_failed:
+                        raise
+                    logger.error(f"保留中の書き込みの確定に失敗しました: {e}")
 
         # 成功レスポンス
         request_elapsed = (datetime.datetime.now() - request_start_time).total_seconds()
@@ -108,12 +285,19 @@ def fetch_timeseries_data(request):
         logger.info(f"総リクエスト時間: {request_elapsed:.2f}秒")
 
         # レスポンスデータを構築
+        message = "時系列データの取得が完了しました"
+        if result.get("status") == "no_new_data":
+            message = "新しいデータがないため処理をスキップしました"
         response_data = {
-            "message": "時系列データの取得が完了しました",
+            "message": message,
             "status": "success",
             "processing_time_seconds": round(request_elapsed, 2),
             **result
         }
+        if hedging_policy:
+            response_data["hedging"] = HedgingPolicy.get_metrics()
+        if startup_profiler.enabled:
+            response_data["startup_profile"] = startup_profiler.get_report(setup_seconds)
 
         return (json.dumps(response_data, ensure_ascii=False), 200, headers)
 
@@ -140,6 +324,33 @@ def fetch_timeseries_data(request):
         )
 
 
+def _get_storage_repository(config: Config, bucket_name: str) -> CloudStorageRepository:
+    """Cloud Storage リポジトリを取得（ウォームインスタンスではクライアントごと再利用）"""
+    storage_repository = _storage_repositories.get(bucket_name)
+    if storage_repository is None:
+        storage_repository = CloudStorageRepository(
+            bucket_name,
+            parallel_upload_threshold_bytes=config.parallel_upload_threshold_mb * 1024 * 1024,
+            parallel_upload_part_bytes=config.parallel_upload_part_mb * 1024 * 1024,
+            parallel_upload_workers=config.parallel_upload_workers,
+        )
+        _storage_repositories[bucket_name] = storage_repository
+    return storage_repository
+
+
+def _get_bigquery_sink(config: Config) -> StorageRepository:
+    """BigQuery シンクを取得（ウォームインスタンスではクライアントごと再利用）"""
+    key = f"bq://{config.bigquery_sink_table}"
+    sink = _storage_repositories.get(key)
+    if sink is None:
+        from src.repositories.bigquery_sink_repository import BigQuerySinkRepository
+        sink = BigQuerySinkRepository(
+            config.bigquery_sink_table, config.source, batch_rows=config.bigquery_sink_batch_rows
+        )
+        _storage_repositories[key] = sink
+    return sink
+
+
 def _validate_config(config: Config) -> str:
     """設定の検証"""
     try:
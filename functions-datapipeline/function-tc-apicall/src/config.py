@@ -10,6 +10,63 @@ class Config:
     authorization: str
     source: str
 
+    # CSVエンコーダ（standard / bulk）
+    csv_encoder: str = "standard"
+
+    # 出力形式（wide: 全センサーを1ファイル / device: デバイス別 / both: 両方）
+    output_mode: str = "wide"
+    device_output_workers: int = 8
+    archive_output: bool = False
+
+    # 並列分割アップロード設定（閾値0で無効）
+    parallel_upload_threshold_mb: int = 32
+    parallel_upload_part_mb: int = 8
+    parallel_upload_workers: int = 8
+
+    # ローカル / NFS ストレージ設定（GCS_BUCKET_NAME 未設定時のみ使用）
+    local_storage_path: str = ""
+    local_storage_sync_batch: int = 32
+
+    # BigQuery シンク設定（gcs / bigquery / both）
+    sink_mode: str = "gcs"
+    bigquery_sink_table: str = ""
+    bigquery_sink_batch_rows: int = 50000
+
+    # センサーごとの要約統計量（サイドカーJSON）設定
+    summary_statistics: bool = False
+
+    # 直近データのリングバッファ設定（0で無効）
+    ring_buffer_hours: int = 0
+
+    # 取得時の異常スコア設定
+    anomaly_scoring: bool = False
+    anomaly_alpha: float = 0.05
+    anomaly_threshold: float = 4.0
+    anomaly_warmup: int = 30
+
+    # 多段階ロールアップ設定
+    rollups: bool = False
+
+    # 保存オブジェクトの索引（ゾーンマップ）設定
+    zone_map_index: bool = False
+
+    # 新規データの事前確認設定
+    new_data_probe: bool = False
+
+    # ヘッジリクエスト設定
+    hedge_requests: bool = False
+    hedge_percentile: float = 95.0
+    hedge_max_ratio: float = 0.1
+
+    # 遅延データのパーティションマージ設定
+    reconcile_partitions: bool = False
+
+    # メモリ計測・メモリガード設定
+    memory_profile: bool = False
+    memory_budget_mb: int = 0
+    series_count_hint: int = 0
+    sampling_interval_seconds: int = 60
+
     @classmethod
     def from_environment(cls) -> "Config":
         """環境変数から設定を読み込み"""
@@ -17,6 +74,35 @@ class Config:
             tenant_domain=os.environ.get("TENANT_DOMAIN", ""),
             authorization=os.environ.get("AUTHORIZATION", ""),
             source=os.environ.get("SOURCE", ""),
+            csv_encoder=os.environ.get("CSV_ENCODER", "standard"),
+            output_mode=os.environ.get("OUTPUT_MODE", "wide"),
+            device_output_workers=int(os.environ.get("DEVICE_OUTPUT_WORKERS", "8")),
+            archive_output=os.environ.get("ARCHIVE_OUTPUT", "false").lower() == "true",
+            parallel_upload_threshold_mb=int(os.environ.get("PARALLEL_UPLOAD_THRESHOLD_MB", "32")),
+            parallel_upload_part_mb=int(os.environ.get("PARALLEL_UPLOAD_PART_MB", "8")),
+            parallel_upload_workers=int(os.environ.get("PARALLEL_UPLOAD_WORKERS", "8")),
+            local_storage_path=os.environ.get("LOCAL_STORAGE_PATH", ""),
+            local_storage_sync_batch=int(os.environ.get("LOCAL_STORAGE_SYNC_BATCH", "32")),
+            sink_mode=os.environ.get("SINK_MODE", "gcs"),
+            bigquery_sink_table=os.environ.get("BIGQUERY_SINK_TABLE", ""),
+            bigquery_sink_batch_rows=int(os.environ.get("BIGQUERY_SINK_BATCH_ROWS", "50000")),
+            summary_statistics=os.environ.get("SUMMARY_STATISTICS", "false").lower() == "true",
+            ring_buffer_hours=int(os.environ.get("RING_BUFFER_HOURS", "0")),
+            anomaly_scoring=os.environ.get("ANOMALY_SCORING", "false").lower() == "true",
+            anomaly_alpha=float(os.environ.get("ANOMALY_ALPHA", "0.05")),
+            anomaly_threshold=float(os.environ.get("ANOMALY_THRESHOLD", "4.0")),
+            anomaly_warmup=int(os.environ.get("ANOMALY_WARMUP", "30")),
+            rollups=os.environ.get("ROLLUPS", "false").lower() == "true",
+            zone_map_index=os.environ.get("ZONE_MAP_INDEX", "false").lower() == "true",
+            new_data_probe=os.environ.get("NEW_DATA_PROBE", "false").lower() == "true",
+            hedge_requests=os.environ.get("HEDGE_REQUESTS", "false").lower() == "true",
+            hedge_percentile=float(os.environ.get("HEDGE_PERCENTILE", "95")),
+            hedge_max_ratio=float(os.environ.get("HEDGE_MAX_RATIO", "0.1")),
+            reconcile_partitions=os.environ.get("RECONCILE_PARTITIONS", "false").lower() == "true",
+            memory_profile=os.environ.get("MEMORY_PROFILE", "false").lower() == "true",
+            memory_budget_mb=int(os.environ.get("MEMORY_BUDGET_MB", "0")),
+            series_count_hint=int(os.environ.get("SERIES_COUNT_HINT", "0")),
+            sampling_interval_seconds=int(os.environ.get("SAMPLING_INTERVAL_SECONDS", "60")),
         )
 
     def validate(self) -> None:
@@ -27,6 +113,45 @@ class Config:
             raise ValueError("AUTHORIZATION環境変数が設定されていません")
         if not self.source:
             raise ValueError("SOURCE環境変数が設定されていません")
+        if self.csv_encoder not in ("standard", "bulk"):
+            raise ValueError(f"CSV_ENCODERの値が不正です: {self.csv_encoder}")
+        if not 0 < self.hedge_percentile <= 100:
+            raise ValueError(f"HEDGE_PERCENTILEの値が不正です: {self.hedge_percentile}")
+        if not 0 < self.anomaly_alpha <= 1:
+            raise ValueError(f"ANOMALY_ALPHAの値が不正です: {self.anomaly_alpha}")
+        if self.anomaly_threshold <= 0:
+            raise ValueError(f"ANOMALY_THRESHOLDの値が不正です: {self.anomaly_threshold}")
+        if self.output_mode not in ("wide", "device", "both"):
+            raise ValueError(f"OUTPUT_MODEの値が不正です: {self.output_mode}")
+        if self.sink_mode not in ("gcs", "bigquery", "both"):
+            raise ValueError(f"SINK_MODEの値が不正です: {self.sink_mode}")
+        if self.sink_mode != "gcs" and len(self.bigquery_sink_table.split(".")) != 3:
+            raise ValueError("SINK_MODE が bigquery / both の場合は BIGQUERY_SINK_TABLE を project.dataset.table 形式で指定してください")
+        if self.new_data_probe and self.reconcile_partitions:
+            # 確認は最新の計測時刻のみのため、遅れて届いた過去の行だけがある実行を省略してしまう
+            raise ValueError("NEW_DATA_PROBE と RECONCILE_PARTITIONS は同時に有効にできません（遅延データのマージが省略されるため）")
+        if self.sink_mode == "bigquery" or (
+            self.sink_mode == "both" and not (self.get_env_var("GCS_BUCKET_NAME") or self.local_storage_path)
+        ):
+            # BigQuery シンクのみの場合は、状態ファイル・サイドカー・索引などを読み書きするストレージがない
+            features = [
+                name for name, enabled in [
+                    ("OUTPUT_MODE=device/both", self.output_mode != "wide"),
+                    ("ARCHIVE_OUTPUT", self.archive_output),
+                    ("RING_BUFFER_HOURS", self.ring_buffer_hours > 0),
+                    ("ANOMALY_SCORING", self.anomaly_scoring),
+                    ("ROLLUPS", self.rollups),
+                    ("ZONE_MAP_INDEX", self.zone_map_index),
+                    ("NEW_DATA_PROBE", self.new_data_probe),
+                    ("RECONCILE_PARTITIONS", self.reconcile_partitions),
+                ] if enabled
+            ]
+            if features:
+                raise ValueError(
+                    f"ストレージを使わず BigQuery シンクのみに書き込む場合は次の機能を使用できません: {', '.join(features)}"
+                )
+        if self.parallel_upload_part_mb <= 0 or self.parallel_upload_workers <= 0:
+            raise ValueError("PARALLEL_UPLOAD_PART_MB と PARALLEL_UPLOAD_WORKERS は1以上を指定してください")
     
     def get_env_var(self, key: str) -> str:
         """環境変数を取得"""
@@ -0,0 +1,311 @@
+import json
+import struct
+import zlib
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+
+@dataclass
+class ArchiveBlockIndex:
+    """ブロックの索引（時刻範囲とファイル内の位置）"""
+
+    first_timestamp_ms: int
+    last_timestamp_ms: int
+    row_count: int
+    offset: int
+    length: int
+
+
+@dataclass
+class ArchiveData:
+    """アーカイブから復号したデータ（時刻昇順、欠損はNaN）"""
+
+    sensor_names: List[str]
+    timestamps: np.ndarray
+    min_values: np.ndarray
+    max_values: np.ndarray
+
+
+class GorillaArchiveFormat:
+    """
+    センサー時系列のアーカイブ形式（Gorilla 方式をバイト境界に揃えた列指向の圧縮形式）
+
+    ファイルレイアウト:
+        [固定ヘッダー][センサー名(JSON)][ブロック索引 × ブロック数][ブロック0][ブロック1]...
+
+    各ブロックは一定行数の時刻列と、センサーごとの min/max 列を持つ。
+        - 時刻: 先頭時刻と先頭差分 + 差分の差分（zigzag）をブロック内で最小のバイト幅で格納
+          （一定間隔なら差分の差分は全て0となり、0バイトになる）
+        - 値: 欠損ビットマップ + 直前値との XOR を「制御バイト（有効バイト数・末尾0バイト数）+ 有効バイト」で格納
+    ブロックは zlib で圧縮し、索引の時刻範囲から必要なブロックだけを範囲読み出しできる。
+    int と float の区別は保持せず、値は float64 として復号する。
+    """
+
+    MAGIC = b"GTS1"
+    VERSION = 1
+    # magic, version, compression, sensor_count, block_rows, block_count, names_length
+    FIXED = struct.Struct("<4sHHIIII")
+    # first_timestamp_ms, last_timestamp_ms, row_count, offset, length
+    INDEX_ENTRY = struct.Struct("<qqIQI")
+    # row_count, first_timestamp_ms, first_delta_ms, timestamp_width
+    BLOCK_HEADER = struct.Struct("<IqqB")
+    # present_count, payload_length
+    COLUMN_HEADER = struct.Struct("<II")
+
+    COMPRESSION_NONE = 0
+    COMPRESSION_ZLIB = 1
+
+    _WIDTH_DTYPES = {1: "<u1", 2: "<u2", 4: "<u4", 8: "<u8"}
+
+    def __init__(self, block_rows: int = 1440, compression: int = COMPRESSION_ZLIB):
+        self.block_rows = block_rows
+        self.compression = compression
+
+    def encode(
+        self,
+        sensor_names: List[str],
+        timestamps_ms: np.ndarray,
+        min_values: np.ndarray,
+        max_values: np.ndarray,
+    ) -> bytes:
+        """
+        時系列データをアーカイブ形式に変換
+
+        Args:
+            sensor_names: センサー名
+            timestamps_ms: 時刻（epoch ms, int64）
+            min_values: 最小値（行数 × センサー数, float64, 欠損はNaN）
+            max_values: 最大値（行数 × センサー数, float64, 欠損はNaN）
+
+        Returns:
+            アーカイブのバイト列
+        """
+        order = np.argsort(timestamps_ms, kind="stable")
+        timestamps_ms = np.asarray(timestamps_ms, dtype=np.int64)[order]
+        min_values = np.asarray(min_values, dtype=np.float64)[order]
+        max_values = np.asarray(max_values, dtype=np.float64)[order]
+
+        blocks = []
+        for start in range(0, len(timestamps_ms), self.block_rows):
+            end = start + self.block_rows
+            blocks.append((
+                timestamps_ms[start:end],
+                self._encode_block(timestamps_ms[start:end], min_values[start:end], max_values[start:end]),
+            ))
+
+        names = json.dumps(sensor_names, ensure_ascii=False).encode("utf-8")
+        fixed = self.FIXED.pack(
+            self.MAGIC, self.VERSION, self.compression, len(sensor_names),
+            self.block_rows, len(blocks), len(names),
+        )
+        offset = len(fixed) + len(names) + len(blocks) * self.INDEX_ENTRY.size
+        index = []
+        for block_timestamps, payload in blocks:
+            index.append(self.INDEX_ENTRY.pack(
+                int(block_timestamps[0]), int(block_timestamps[-1]), len(block_timestamps), offset, len(payload)
+            ))
+            offset += len(payload)
+        return b"".join([fixed, names, *index, *(payload for _, payload in blocks)])
+
+    def read_header(
+        self, read_range: Callable[[int, int], Optional[bytes]]
+    ) -> Optional[Tuple[List[str], List[ArchiveBlockIndex], int]]:
+        """
+        センサー名とブロック索引を読み込む
+
+        Args:
+            read_range: (offset, length) を受け取りバイト列を返す関数（存在しない場合はNone）
+
+        Returns:
+            センサー名、ブロック索引、圧縮方式（アーカイブが存在しない場合はNone）
+        """
+        fixed = read_range(0, self.FIXED.size)
+        if fixed is None:
+            return None
+        magic, version, compression, sensor_count, _, block_count, names_length = self.FIXED.unpack(fixed)
+        if magic != self.MAGIC:
+            raise ValueError("アーカイブのファイル形式が正しくありません")
+        if version != self.VERSION:
+            raise ValueError(f"未対応のアーカイブのバージョンです: {version}")
+
+        rest = read_range(self.FIXED.size, names_length + block_count * self.INDEX_ENTRY.size)
+        sensor_names = json.loads(rest[:names_length].decode("utf-8"))
+        if len(sensor_names) != sensor_count:
+            raise ValueError("アーカイブのセンサー数が一致しません")
+        index = [
+            ArchiveBlockIndex(*self.INDEX_ENTRY.unpack_from(rest, names_length + k * self.INDEX_ENTRY.size))
+            for k in range(block_count)
+        ]
+        return sensor_names, index, compression
+
+    def decode(
+        self,
+        read_range: Callable[[int, int], Optional[bytes]],
+        start_ms: Optional[int] = None,
+        end_ms: Optional[int] = None,
+    ) -> Optional[ArchiveData]:
+        """
+        指定時刻範囲（両端を含む）と重なるブロックだけを読み出して復号
+
+        Args:
+            read_range: (offset, length) を受け取りバイト列を返す関数（存在しない場合はNone）
+            start_ms: 開始時刻（epoch ms, 省略時は先頭から）
+            end_ms: 終了時刻（epoch ms, 省略時は末尾まで）
+
+        Returns:
+            復号したデータ（アーカイブが存在しない場合はNone）
+        """
+        header = self.read_header(read_range)
+        if header is None:
+            return None
+        sensor_names, index, compression = header
+
+        low = np.iinfo(np.int64).min if start_ms is None else start_ms
+        high = np.iinfo(np.int64).max if end_ms is None else end_ms
+        parts = [
+            self._decode_block(read_range(entry.offset, entry.length), len(sensor_names), compression)
+            for entry in index
+            if entry.last_timestamp_ms >= low and entry.first_timestamp_ms <= high
+        ]
+
+        sensor_count = len(sensor_names)
+        if parts:
+            timestamps_ms = np.concatenate([part[0] for part in parts])
+            min_values = np.concatenate([part[1] for part in parts])
+            max_values = np.concatenate([part[2] for part in parts])
+        else:
+            timestamps_ms = np.zeros(0, dtype=np.int64)
+            min_values = np.zeros((0, sensor_count))
+            max_values = np.zeros((0, sensor_count))
+
+        keep = (timestamps_ms >= low) & (timestamps_ms <= high)
+        return ArchiveData(
+            sensor_names=sensor_names,
+            timestamps=timestamps_ms[keep].astype("datetime64[ms]"),
+            min_values=min_values[keep],
+            max_values=max_values[keep],
+        )
+
+    def decode_bytes(self, data: bytes, start_ms: Optional[int] = None, end_ms: Optional[int] = None) -> ArchiveData:
+        """メモリ上のアーカイブを復号"""
+        return self.decode(lambda offset, length: data[offset: offset + length], start_ms, end_ms)
+
+    def _encode_block(self, timestamps_ms: np.ndarray, min_values: np.ndarray, max_values: np.ndarray) -> bytes:
+        """1ブロックを符号化"""
+        row_count = len(timestamps_ms)
+        deltas = np.diff(timestamps_ms)
+        first_delta = int(deltas[0]) if row_count > 1 else 0
+        width, dod_bytes = self._encode_integers(_zigzag(np.diff(deltas)))
+
+        parts = [self.BLOCK_HEADER.pack(row_count, int(timestamps_ms[0]), first_delta, width), dod_bytes]
+        for k in range(min_values.shape[1]):
+            parts.append(self._encode_float_column(min_values[:, k]))
+            parts.append(self._encode_float_column(max_values[:, k]))
+
+        payload = b"".join(parts)
+        if self.compression == self.COMPRESSION_ZLIB:
+            return zlib.compress(payload, 6)
+        return payload
+
+    def _decode_block(self, data: bytes, sensor_count: int, compression: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """1ブロックを復号"""
+        if compression == self.COMPRESSION_ZLIB:
+            data = zlib.decompress(data)
+        row_count, first_timestamp_ms, first_delta, width = self.BLOCK_HEADER.unpack_from(data)
+        position = self.BLOCK_HEADER.size
+
+        dod_length = width * max(row_count - 2, 0)
+        dod = _unzigzag(self._decode_integers(data[position: position + dod_length], width, max(row_count - 2, 0)))
+        position += dod_length
+        deltas = np.concatenate([[first_delta], first_delta + np.cumsum(dod)])[: max(row_count - 1, 0)]
+        timestamps_ms = np.concatenate([[first_timestamp_ms], first_timestamp_ms + np.cumsum(deltas)]).astype(np.int64)
+
+        min_values = np.empty((row_count, sensor_count))
+        max_values = np.empty((row_count, sensor_count))
+        for k in range(sensor_count):
+            min_values[:, k], position = self._decode_float_column(data, position, row_count)
+            max_values[:, k], position = self._decode_float_column(data, position, row_count)
+        return timestamps_ms, min_values, max_values
+
+    def _encode_float_column(self, values: np.ndarray) -> bytes:
+        """
+        1列の浮動小数点値を符号化
+
+        欠損ビットマップ（全件あり・全件欠損の場合は省略）に続けて、存在する値の
+        直前値との XOR を制御バイト（上位4bit: 末尾0バイト数, 下位4bit: 有効バイト数）と有効バイトで格納する。
+        """
+        present = ~np.isnan(values)
+        present_count = int(present.sum())
+        bitmap = b"" if present_count in (0, len(values)) else np.packbits(present).tobytes()
+
+        bits = values[present].view(np.uint64)
+        xor = bits ^ np.concatenate([[np.uint64(0)], bits[:-1]])
+        xor_bytes = xor.view(np.uint8).reshape(-1, 8)
+        nonzero = xor_bytes != 0
+        any_nonzero = nonzero.any(axis=1)
+        trailing = np.where(any_nonzero, nonzero.argmax(axis=1), 0)
+        meaningful = np.where(any_nonzero, 8 - nonzero[:, ::-1].argmax(axis=1) - trailing, 0)
+
+        columns = np.arange(8)
+        mask = (columns >= trailing[:, None]) & (columns < (trailing + meaningful)[:, None])
+        controls = ((trailing << 4) | meaningful).astype(np.uint8)
+        payload = xor_bytes[mask].tobytes()
+        return b"".join([
+            self.COLUMN_HEADER.pack(present_count, len(payload)), bitmap, controls.tobytes(), payload
+        ])
+
+    def _decode_float_column(self, data: bytes, position: int, row_count: int) -> Tuple[np.ndarray, int]:
+        """1列の浮動小数点値を復号（ビット列の XOR 累積でベクトル化）"""
+        present_count, payload_length = self.COLUMN_HEADER.unpack_from(data, position)
+        position += self.COLUMN_HEADER.size
+
+        if present_count in (0, row_count):
+            present = np.full(row_count, present_count == row_count)
+        else:
+            bitmap_length = (row_count + 7) // 8
+            present = np.unpackbits(
+                np.frombuffer(data, dtype=np.uint8, count=bitmap_length, offset=position), count=row_count
+            ).astype(bool)
+            position += bitmap_length
+
+        controls = np.frombuffer(data, dtype=np.uint8, count=present_count, offset=position)
+        position += present_count
+        payload = np.frombuffer(data, dtype=np.uint8, count=payload_length, offset=position)
+        position += payload_length
+
+        trailing = (controls >> 4).astype(np.int64)
+        meaningful = (controls & 0x0F).astype(np.int64)
+        columns = np.arange(8)
+        mask = (columns >= trailing[:, None]) & (columns < (trailing + meaningful)[:, None])
+        xor_bytes = np.zeros((present_count, 8), dtype=np.uint8)
+        xor_bytes[mask] = payload
+
+        values = np.full(row_count, np.nan)
+        values[present] = np.bitwise_xor.accumulate(xor_bytes.view(np.uint64).ravel()).view(np.float64)
+        return values, position
+
+    def _encode_integers(self, values: np.ndarray) -> Tuple[int, bytes]:
+        """非負整数列をブロック内の最小バイト幅で格納（全て0なら0バイト）"""
+        if not len(values) or not values.any():
+            return 0, b""
+        maximum = int(values.max())
+        width = next(w for w in (1, 2, 4, 8) if maximum < 1 << (8 * w))
+        return width, values.astype(self._WIDTH_DTYPES[width]).tobytes()
+
+    def _decode_integers(self, data: bytes, width: int, count: int) -> np.ndarray:
+        if width == 0:
+            return np.zeros(count, dtype=np.uint64)
+        return np.frombuffer(data, dtype=self._WIDTH_DTYPES[width], count=count).astype(np.uint64)
+
+
+def _zigzag(values: np.ndarray) -> np.ndarray:
+    """符号付き整数を非負整数に変換（0, -1, 1, -2, ... → 0, 1, 2, 3, ...）"""
+    values = values.astype(np.int64)
+    return ((values << 1) ^ (values >> 63)).view(np.uint64)
+
+
+def _unzigzag(values: np.ndarray) -> np.ndarray:
+    values = values.astype(np.uint64)
+    return ((values >> np.uint64(1)).view(np.int64)) ^ -((values & np.uint64(1)).view(np.int64))
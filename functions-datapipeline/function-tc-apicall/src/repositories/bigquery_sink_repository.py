@@ -0,0 +1,270 @@
+import csv
+import datetime
+import logging
+from typing import Iterator, List, Optional, Tuple
+
+from .storage_repository import StorageRepository
+
+
+class BigQuerySinkRepository(StorageRepository):
+    """
+    取得データのCSVを縦持ち（timestamp, source, sensor, min_value, max_value）で BigQuery に書き込むシンク
+
+    timeseries_data/ 配下のCSVのアップロードを受け取り、BigQuery Storage Write API の
+    PENDING ストリームへバッチ単位で追記して、ファイル全体を1回のコミットで反映する。
+    コミットまで行は見えないため、途中で失敗しても一部の時刻だけが書き込まれることはない。
+    各バッチは行オフセットを指定して送るため、再送しても同じ行が二重に書き込まれることはない
+    （ALREADY_EXISTS は書き込み済みとして扱う）。
+    取得期間は実行ごとに重なるため、テーブル内の最新時刻（ソース単位）以前の行は書き込まない。
+    テーブルは timestamp の日単位でパーティション分割し、source, sensor でクラスタ化する。
+    CSV以外のオブジェクト（サイドカー・状態ファイルなど）は保存できない（accepts が False）。
+    """
+
+    # 書き込み対象のオブジェクトパスの接頭辞
+    SOURCE_PREFIX = "timeseries_data/"
+    # 最新時刻を調べる期間（パーティションの絞り込み）
+    WATERMARK_LOOKBACK_DAYS = 7
+    # 1リクエストの上限（10MB）に余裕を持たせたバッチのバイト数
+    MAX_BATCH_BYTES = 8 * 1024 * 1024
+    # 1バッチの再送回数
+    MAX_APPEND_ATTEMPTS = 3
+
+    def __init__(
+        self,
+        table_id: str,
+        source: str,
+        batch_rows: int = 50000,
+        location: str = "asia-northeast1",
+    ):
+        """
+        BigQuerySinkRepositoryを初期化
+
+        Args:
+            table_id: 書き込み先テーブル（project.dataset.table）
+            source: デバイスID（source 列の値）
+            batch_rows: 1回の追記リクエストにまとめる行数
+            location: テーブル作成時のデータセットのロケーション
+        """
+        # 起動時間短縮のため、BigQuery のライブラリは使うときに読み込む
+        from google.cloud import bigquery
+        from google.cloud import bigquery_storage_v1
+
+        self.table_id = table_id
+        self.source = source
+        self.batch_rows = batch_rows
+        self.location = location
+        self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+
+        project_id, dataset_id, table_name = table_id.split(".")
+        self.bigquery_client = bigquery.Client(project=project_id)
+        self.write_client = bigquery_storage_v1.BigQueryWriteClient()
+        self.table_path = self.write_client.table_path(project_id, dataset_id, table_name)
+        self.row_class, self.proto_schema = self._build_row_schema()
+        self._table_ready = False
+
+    def accepts(self, destination_path: str) -> bool:
+        """timeseries_data/ 配下のCSVのみ保存できる"""
+        return destination_path.startswith(self.SOURCE_PREFIX) and destination_path.endswith(".csv")
+
+    def upload_file(self, local_file_path: str, destination_path: str) -> str:
+        """
+        取得データのCSVを縦持ちに変換して BigQuery に追記
+
+        Args:
+            local_file_path: CSVファイルパス
+            destination_path: 本来の保存先パス（timeseries_data/ 配下のCSVのみ）
+
+        Returns:
+            書き込み先テーブルのURL
+
+        Raises:
+            ValueError: 保存できないパスが指定された場合
+        """
+        if not self.accepts(destination_path):
+            raise ValueError(f"BigQueryシンクには timeseries_data/ 配下のCSV以外は保存できません: {destination_path}")
+
+        table_url = f"bq://{self.table_id}"
+        self._ensure_table()
+        watermark_micros = self._get_watermark_micros()
+        self.logger.info(f"BigQuery書き込み開始: {table_url} (最新時刻: {watermark_micros})")
+
+        row_count = self._append_rows(self._read_long_rows(local_file_path, watermark_micros))
+        self.logger.info(f"BigQuery書き込み完了: {table_url} ({row_count}行)")
+        return table_url
+
+    def _read_long_rows(self, local_file_path: str, watermark_micros: Optional[int]) -> Iterator[bytes]:
+        """CSVの各セルを縦持ちの行（シリアライズ済み）に変換（最新時刻以前と欠損は除外）"""
+        with open(local_file_path, newline="") as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if not header:
+                return
+            sensors = [name[: -len("_min")] for name in header[1::2]]
+            for row in reader:
+                timestamp_micros = _to_micros(row[0])
+                if watermark_micros is not None and timestamp_micros <= watermark_micros:
+                    continue
+                for k, sensor in enumerate(sensors):
+                    min_text, max_text = row[1 + 2 * k], row[2 + 2 * k]
+                    if not min_text and not max_text:
+                        continue
+                    message = self.row_class(timestamp=timestamp_micros, source=self.source, sensor=sensor)
+                    if min_text:
+                        message.min_value = float(min_text)
+                    if max_text:
+                        message.max_value = float(max_text)
+                    yield message.SerializeToString()
+
+    def _append_rows(self, rows: Iterator[bytes]) -> int:
+        """
+        PENDING ストリームにバッチ単位でオフセット付き追記し、確定後にまとめてコミット
+
+        追記に失敗した場合はコミットしないため、ストリームの行は破棄される。
+
+        Returns:
+            書き込んだ行数
+        """
+        from google.cloud.bigquery_storage_v1 import types
+
+        write_stream = self.write_client.create_write_stream(
+            parent=self.table_path,
+            write_stream=types.WriteStream(type_=types.WriteStream.Type.PENDING),
+        )
+        offset = 0
+        for batch in self._batches(rows):
+            self._append_batch(write_stream.name, batch, offset)
+            offset += len(batch)
+        self.write_client.finalize_write_stream(name=write_stream.name)
+
+        response = self.write_client.batch_commit_write_streams(
+            types.BatchCommitWriteStreamsRequest(parent=self.table_path, write_streams=[write_stream.name])
+        )
+        if response.stream_errors:
+            messages = "; ".join(error.error_message for error in response.stream_errors)
+            raise RuntimeError(f"BigQueryへのコミットに失敗しました: {messages}")
+        return offset
+
+    def _append_batch(self, stream_name: str, batch: List[bytes], offset: int) -> None:
+        """1バッチを追記（失敗時は同じオフセットで再送し、書き込み済みなら成功とみなす）"""
+        from google.api_core.exceptions import AlreadyExists
+        from google.cloud.bigquery_storage_v1 import types
+        from google.rpc import code_pb2
+
+        request = types.AppendRowsRequest(
+            write_stream=stream_name,
+            offset=offset,
+            proto_rows=types.AppendRowsRequest.ProtoData(
+                writer_schema=self.proto_schema,
+                rows=types.ProtoRows(serialized_rows=batch),
+            ),
+        )
+        for attempt in range(1, self.MAX_APPEND_ATTEMPTS + 1):
+            try:
+                responses = self.write_client.append_rows(iter([request]))
+                for response in responses:
+                    if response.error.code == code_pb2.ALREADY_EXISTS:
+                        raise AlreadyExists(response.error.message)
+                    if response.error.code:
+                        raise RuntimeError(f"追記エラー: {response.error.message}")
+                return
+            except AlreadyExists:
+                self.logger.info(f"オフセット {offset} は書き込み済みです")
+                return
+            except Exception as e:
+                if attempt == self.MAX_APPEND_ATTEMPTS:
+                    raise
+                self.logger.warning(f"追記に失敗したため再送します（{attempt}回目, オフセット {offset}）: {e}")
+
+    def _batches(self, rows: Iterator[bytes]) -> Iterator[List[bytes]]:
+        """行数・バイト数の上限ごとにまとめる"""
+        batch: List[bytes] = []
+        batch_bytes = 0
+        for row in rows:
+            if batch and (len(batch) >= self.batch_rows or batch_bytes + len(row) > self.MAX_BATCH_BYTES):
+                yield batch
+                batch, batch_bytes = [], 0
+            batch.append(row)
+            batch_bytes += len(row)
+        if batch:
+            yield batch
+
+    def _ensure_table(self) -> None:
+        """テーブルが存在しない場合はパーティション分割・クラスタ化して作成"""
+        if self._table_ready:
+            return
+        from google.cloud import bigquery
+        from google.cloud.exceptions import NotFound
+
+        try:
+            self.bigquery_client.get_table(self.table_id)
+        except NotFound:
+            project_id, dataset_id, _ = self.table_id.split(".")
+            dataset = bigquery.Dataset(f"{project_id}.{dataset_id}")
+            dataset.location = self.location
+            self.bigquery_client.create_dataset(dataset, exists_ok=True)
+
+            table = bigquery.Table(self.table_id, schema=[
+                bigquery.SchemaField("timestamp", "TIMESTAMP", mode="REQUIRED"),
+                bigquery.SchemaField("source", "STRING", mode="REQUIRED"),
+                bigquery.SchemaField("sensor", "STRING", mode="REQUIRED"),
+                bigquery.SchemaField("min_value", "FLOAT", mode="NULLABLE"),
+                bigquery.SchemaField("max_value", "FLOAT", mode="NULLABLE"),
+            ])
+            table.time_partitioning = bigquery.TimePartitioning(
+                type_=bigquery.TimePartitioningType.DAY, field="timestamp"
+            )
+            table.clustering_fields = ["source", "sensor"]
+            self.bigquery_client.create_table(table, exists_ok=True)
+            self.logger.info(f"テーブル {self.table_id} を作成しました")
+        self._table_ready = True
+
+    def _get_watermark_micros(self) -> Optional[int]:
+        """テーブル内のこのソースの最新時刻（epoch マイクロ秒、直近の期間のパーティションのみ参照）"""
+        from google.cloud import bigquery
+
+        query = (
+            f"SELECT UNIX_MICROS(MAX(timestamp)) AS watermark FROM `{self.table_id}` "
+            f"WHERE source = @source "
+            f"AND timestamp >= TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL {self.WATERMARK_LOOKBACK_DAYS} DAY)"
+        )
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=[bigquery.ScalarQueryParameter("source", "STRING", self.source)]
+        )
+        rows = list(self.bigquery_client.query(query, job_config=job_config).result())
+        return rows[0]["watermark"] if rows else None
+
+    @staticmethod
+    def _build_row_schema() -> Tuple[type, object]:
+        """縦持ちの行の protobuf メッセージクラスと Write API 用のスキーマを作成"""
+        from google.cloud.bigquery_storage_v1 import types
+        from google.protobuf import descriptor_pb2, descriptor_pool, message_factory
+
+        field = descriptor_pb2.FieldDescriptorProto
+        file_proto = descriptor_pb2.FileDescriptorProto(
+            name="timeseries_long_row.proto", package="timeseries", syntax="proto2"
+        )
+        message_proto = file_proto.message_type.add(name="LongRow")
+        for number, (name, field_type) in enumerate([
+            ("timestamp", field.TYPE_INT64),
+            ("source", field.TYPE_STRING),
+            ("sensor", field.TYPE_STRING),
+            ("min_value", field.TYPE_DOUBLE),
+            ("max_value", field.TYPE_DOUBLE),
+        ], start=1):
+            message_proto.field.add(name=name, number=number, type=field_type, label=field.LABEL_OPTIONAL)
+
+        pool = descriptor_pool.DescriptorPool()
+        pool.Add(file_proto)
+        descriptor = pool.FindMessageTypeByName("timeseries.LongRow")
+        proto_descriptor = descriptor_pb2.DescriptorProto()
+        descriptor.CopyToProto(proto_descriptor)
+        return message_factory.GetMessageClass(descriptor), types.ProtoSchema(proto_descriptor=proto_descriptor)
+
+
+def _to_micros(timestamp: str) -> int:
+    """ISO 8601 のタイムスタンプを epoch マイクロ秒に変換（タイムゾーンなしはUTC）"""
+    parsed = datetime.datetime.fromisoformat(timestamp)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+    delta = parsed - datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
@@ -0,0 +1,65 @@
+import base64
+import hashlib
+import math
+from typing import Dict, Iterable
+
+
+class SensorBloomFilter:
+    """
+    センサー名のブルームフィルタ
+
+    blake2b の128ビットを2つの64ビット値に分け、二重ハッシュで k 個の位置を求める。
+    含まれないセンサーは必ず False、含まれるセンサーは誤検出率 false_positive_rate 程度で True になる。
+    """
+
+    def __init__(self, bit_count: int, hash_count: int, bits: bytearray = None):
+        self.bit_count = bit_count
+        self.hash_count = hash_count
+        self.bits = bits if bits is not None else bytearray(-(-bit_count // 8))
+
+    @classmethod
+    def build(cls, names: Iterable[str], false_positive_rate: float = 0.01) -> "SensorBloomFilter":
+        """
+        センサー名の集合からフィルタを作成
+
+        Args:
+            names: センサー名
+            false_positive_rate: 目標の誤検出率
+
+        Returns:
+            作成したフィルタ
+        """
+        names = list(names)
+        item_count = max(len(names), 1)
+        bit_count = max(int(math.ceil(-item_count * math.log(false_positive_rate) / math.log(2) ** 2)), 8)
+        hash_count = max(int(round(bit_count / item_count * math.log(2))), 1)
+        bloom_filter = cls(bit_count, hash_count)
+        for name in names:
+            bloom_filter.add(name)
+        return bloom_filter
+
+    def add(self, name: str) -> None:
+        for position in self._positions(name):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def might_contain(self, name: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(name))
+
+    def to_dict(self) -> Dict:
+        """JSONに変換可能な辞書を作成"""
+        return {
+            "bits": base64.b64encode(bytes(self.bits)).decode("ascii"),
+            "bit_count": self.bit_count,
+            "hash_count": self.hash_count,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "SensorBloomFilter":
+        return cls(data["bit_count"], data["hash_count"], bytearray(base64.b64decode(data["bits"])))
+
+    def _positions(self, name: str):
+        digest = hashlib.blake2b(name.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hash_count):
+            yield (first + i * second) % self.bit_count
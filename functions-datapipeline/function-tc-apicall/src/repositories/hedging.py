@@ -0,0 +1,151 @@
+import collections
+import logging
+import math
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Deque, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class HedgingPolicy:
+    """
+    ヘッジリクエストのポリシー
+
+    最初のリクエストが直近の応答時間のパーセンタイルを過ぎても完了しない場合に
+    同じリクエストをもう1本送り、先に成功した方を採用する。
+    ヘッジの割合は上限を設けて追加負荷を抑える。
+    応答時間の履歴と統計はウォームインスタンス内で共有する。
+    """
+
+    # ウォームインスタンス間で共有する応答時間の履歴と統計
+    _latencies: Deque[float] = collections.deque(maxlen=200)
+    _metrics = {"requests": 0, "hedged": 0, "hedge_wins": 0, "budget_denied": 0}
+    _lock = threading.Lock()
+
+    def __init__(
+        self,
+        percentile: float = 95.0,
+        initial_delay_seconds: float = 5.0,
+        min_delay_seconds: float = 0.5,
+        max_hedge_ratio: float = 0.1,
+        min_samples: int = 10,
+    ):
+        """
+        HedgingPolicyを初期化
+
+        Args:
+            percentile: ヘッジを送るまでの待ち時間に使う応答時間のパーセンタイル
+            initial_delay_seconds: 履歴が min_samples 件未満のときの待ち時間
+            min_delay_seconds: 待ち時間の下限
+            max_hedge_ratio: 全リクエストに対するヘッジの割合の上限
+            min_samples: パーセンタイルを使い始める履歴件数
+        """
+        self.percentile = percentile
+        self.initial_delay_seconds = initial_delay_seconds
+        self.min_delay_seconds = min_delay_seconds
+        self.max_hedge_ratio = max_hedge_ratio
+        self.min_samples = min_samples
+        self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+
+    def get_delay(self) -> float:
+        """ヘッジを送るまでの待ち時間（秒）"""
+        with self._lock:
+            latencies = sorted(self._latencies)
+        if len(latencies) < self.min_samples:
+            return self.initial_delay_seconds
+        rank = max(math.ceil(self.percentile / 100 * len(latencies)) - 1, 0)
+        return max(latencies[rank], self.min_delay_seconds)
+
+    def execute(self, send: Callable[[], T], close: Optional[Callable[[T], None]] = None) -> T:
+        """
+        リクエストを実行し、必要ならヘッジする
+
+        Args:
+            send: リクエストを送信して結果を返す関数（失敗時は例外）
+            close: 採用されなかった結果を解放する関数
+
+        Returns:
+            先に成功した結果（両方失敗した場合は最初のリクエストの例外を送出）
+        """
+        delay = self.get_delay()
+        executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="hedge")
+
+        def timed_send() -> T:
+            start = time.monotonic()
+            result = send()
+            self._record_latency(time.monotonic() - start)
+            return result
+
+        try:
+            with self._lock:
+                self._metrics["requests"] += 1
+
+            primary = executor.submit(timed_send)
+            done, _ = wait([primary], timeout=delay)
+            if done or not self._acquire_hedge_budget():
+                return primary.result()
+
+            self.logger.info(f"応答が {delay:.2f}秒 を超えたため、ヘッジリクエストを送信します")
+            hedge = executor.submit(timed_send)
+            winner = self._first_success([primary, hedge])
+            if winner is hedge:
+                with self._lock:
+                    self._metrics["hedge_wins"] += 1
+                self.logger.info("ヘッジリクエストの応答を採用しました")
+
+            loser = primary if winner is hedge else hedge
+            if close:
+                # 応答待ちのリクエストは中断できないため、完了時に結果を解放する
+                loser.add_done_callback(lambda future: self._close_result(future, close))
+            return winner.result()
+
+        finally:
+            # 採用されなかったリクエストの完了は待たない
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    @classmethod
+    def get_metrics(cls) -> Dict:
+        """ヘッジの統計（ヘッジ率・勝率）を取得"""
+        with cls._lock:
+            metrics = dict(cls._metrics)
+            sample_count = len(cls._latencies)
+        metrics["hedge_rate"] = round(metrics["hedged"] / metrics["requests"], 4) if metrics["requests"] else 0.0
+        metrics["win_rate"] = round(metrics["hedge_wins"] / metrics["hedged"], 4) if metrics["hedged"] else 0.0
+        metrics["latency_samples"] = sample_count
+        return metrics
+
+    def _acquire_hedge_budget(self) -> bool:
+        """ヘッジの割合が上限以内ならヘッジ数を加算して許可（上限が0より大きければ最初の1回は許可）"""
+        with self._lock:
+            allowance = max(1.0, self.max_hedge_ratio * self._metrics["requests"])
+            if self.max_hedge_ratio <= 0 or self._metrics["hedged"] >= allowance:
+                self._metrics["budget_denied"] += 1
+                self.logger.info("ヘッジの上限に達しているため、ヘッジせずに応答を待ちます")
+                return False
+            self._metrics["hedged"] += 1
+            return True
+
+    def _first_success(self, futures) -> Future:
+        """先に成功した Future を返す（全て失敗した場合は最初の Future）"""
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in futures:
+                if future in done and future.exception() is None:
+                    return future
+        return futures[0]
+
+    @classmethod
+    def _record_latency(cls, latency: float) -> None:
+        with cls._lock:
+            cls._latencies.append(latency)
+
+    def _close_result(self, future: Future, close: Callable) -> None:
+        if future.cancelled() or future.exception() is not None:
+            return
+        try:
+            close(future.result())
+        except Exception as e:
+            self.logger.debug(f"ヘッジ結果の解放に失敗しました: {e}")
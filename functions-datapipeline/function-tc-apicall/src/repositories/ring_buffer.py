@@ -0,0 +1,299 @@
+import json
+import struct
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+
+# 空きスロットのタイムスタンプ
+EMPTY_TIMESTAMP = np.iinfo(np.int64).min
+
+
+@dataclass
+class RingBufferHeader:
+    """
+    リングバッファファイルのヘッダー
+
+    ファイルレイアウト:
+        [固定ヘッダー][センサー名(JSON)][パディング][スロット0][スロット1]...
+        スロット = timestamp(int64, epoch ms) + min(float32 × センサー数) + max(float32 × センサー数)
+
+    スロット位置は時刻から決まる（(timestamp // 間隔) % 容量）ため、
+    ヘッダーだけ読めば任意の期間のバイト範囲を計算できる。
+    """
+
+    capacity: int
+    interval_seconds: int
+    sensor_names: List[str]
+    last_timestamp_ms: int = EMPTY_TIMESTAMP
+    data_offset: int = 0
+
+    MAGIC = b"TSRB"
+    VERSION = 1
+    # magic, version, reserved, capacity, sensor_count, interval_seconds, data_offset, last_timestamp_ms, names_length
+    FIXED = struct.Struct("<4sHHIIIIqI")
+    # データ領域の開始位置の境界
+    ALIGNMENT = 4096
+
+    @property
+    def sensor_count(self) -> int:
+        return len(self.sensor_names)
+
+    @property
+    def row_dtype(self) -> np.dtype:
+        """1スロットの構造化dtype"""
+        return np.dtype([
+            ("timestamp", "<i8"),
+            ("min", "<f4", (self.sensor_count,)),
+            ("max", "<f4", (self.sensor_count,)),
+        ])
+
+    @property
+    def file_size(self) -> int:
+        return self.data_offset + self.capacity * self.row_dtype.itemsize
+
+    @property
+    def interval_ms(self) -> int:
+        return self.interval_seconds * 1000
+
+    def rows_for_minutes(self, minutes: float) -> int:
+        """指定分数をカバーするスロット数"""
+        return int(np.ceil(minutes * 60 / self.interval_seconds))
+
+    def slot_of(self, timestamp_ms: int) -> int:
+        """時刻に対応するスロット番号"""
+        return (timestamp_ms // self.interval_ms) % self.capacity
+
+    def row_offset(self, slot: int) -> int:
+        """スロットのファイル内オフセット"""
+        return self.data_offset + slot * self.row_dtype.itemsize
+
+    def last_slot_ranges(self, row_count: int) -> List[Tuple[int, int]]:
+        """
+        最新時刻から遡って row_count スロット分のバイト範囲（古い順）
+
+        Args:
+            row_count: スロット数（容量で頭打ち）
+
+        Returns:
+            (開始オフセット, バイト数) のリスト（折り返し時は2件）
+        """
+        if self.last_timestamp_ms == EMPTY_TIMESTAMP or row_count <= 0:
+            return []
+        row_count = min(row_count, self.capacity)
+        end_slot = self.slot_of(self.last_timestamp_ms)
+        start_slot = (end_slot - row_count + 1) % self.capacity
+        itemsize = self.row_dtype.itemsize
+        if start_slot <= end_slot:
+            return [(self.row_offset(start_slot), row_count * itemsize)]
+        return [
+            (self.row_offset(start_slot), (self.capacity - start_slot) * itemsize),
+            (self.row_offset(0), (end_slot + 1) * itemsize),
+        ]
+
+    def encode(self) -> bytes:
+        """ヘッダーをバイト列に変換（データ領域の開始位置まで0埋め）"""
+        names = json.dumps(self.sensor_names, ensure_ascii=False).encode("utf-8")
+        header_length = self.FIXED.size + len(names)
+        self.data_offset = -(-header_length // self.ALIGNMENT) * self.ALIGNMENT
+        fixed = self.FIXED.pack(
+            self.MAGIC, self.VERSION, 0, self.capacity, self.sensor_count,
+            self.interval_seconds, self.data_offset, self.last_timestamp_ms, len(names),
+        )
+        return (fixed + names).ljust(self.data_offset, b"\0")
+
+    @classmethod
+    def decode_fixed(cls, data: bytes) -> Tuple["RingBufferHeader", int]:
+        """
+        固定ヘッダーを解析
+
+        Args:
+            data: ファイル先頭の FIXED.size バイト以上
+
+        Returns:
+            センサー名が未設定のヘッダーと、センサー名(JSON)のバイト数
+        """
+        (magic, version, _, capacity, sensor_count, interval_seconds,
+         data_offset, last_timestamp_ms, names_length) = cls.FIXED.unpack_from(data)
+        if magic != cls.MAGIC:
+            raise ValueError("リングバッファのファイル形式が正しくありません")
+        if version != cls.VERSION:
+            raise ValueError(f"未対応のリングバッファのバージョンです: {version}")
+        header = cls(
+            capacity=capacity,
+            interval_seconds=interval_seconds,
+            sensor_names=[None] * sensor_count,
+            last_timestamp_ms=last_timestamp_ms,
+            data_offset=data_offset,
+        )
+        return header, names_length
+
+    @classmethod
+    def decode(cls, data: bytes) -> "RingBufferHeader":
+        """ヘッダー全体（固定ヘッダー + センサー名）を解析"""
+        header, names_length = cls.decode_fixed(data)
+        names = data[cls.FIXED.size: cls.FIXED.size + names_length]
+        if len(names) != names_length:
+            raise ValueError("リングバッファのヘッダーが途中で終了しています")
+        header.sensor_names = json.loads(names.decode("utf-8"))
+        return header
+
+
+@dataclass
+class RingBufferWindow:
+    """リングバッファから読み出した期間のデータ（時刻昇順）"""
+
+    sensor_names: List[str]
+    timestamps: np.ndarray
+    min_values: np.ndarray
+    max_values: np.ndarray
+
+
+class RingBufferFile:
+    """mmap でリングバッファファイルを読み書きする"""
+
+    def __init__(self, path: str, mode: str = "r+"):
+        """
+        既存のリングバッファファイルを開く
+
+        Args:
+            path: ファイルパス
+            mode: np.memmap のモード（"r" / "r+"）
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            _, names_length = RingBufferHeader.decode_fixed(f.read(RingBufferHeader.FIXED.size))
+            f.seek(0)
+            self.header = RingBufferHeader.decode(f.read(RingBufferHeader.FIXED.size + names_length))
+        self.rows = np.memmap(
+            path, dtype=self.header.row_dtype, mode=mode,
+            offset=self.header.data_offset, shape=(self.header.capacity,),
+        )
+
+    @classmethod
+    def create(
+        cls, path: str, capacity: int, interval_seconds: int, sensor_names: List[str]
+    ) -> "RingBufferFile":
+        """
+        空のリングバッファファイルを作成
+
+        Args:
+            path: ファイルパス
+            capacity: スロット数
+            interval_seconds: スロットの時間間隔（秒）
+            sensor_names: センサー名
+
+        Returns:
+            作成したリングバッファ
+        """
+        header = RingBufferHeader(
+            capacity=capacity, interval_seconds=interval_seconds, sensor_names=list(sensor_names)
+        )
+        header_bytes = header.encode()
+        empty_rows = np.zeros(capacity, dtype=header.row_dtype)
+        empty_rows["timestamp"] = EMPTY_TIMESTAMP
+        empty_rows["min"] = np.nan
+        empty_rows["max"] = np.nan
+        with open(path, "wb") as f:
+            f.write(header_bytes)
+            f.write(empty_rows.tobytes())
+        return cls(path)
+
+    def write_rows(self, timestamps_ms: np.ndarray, min_values: np.ndarray, max_values: np.ndarray) -> int:
+        """
+        行を時刻に対応するスロットへ書き込む（同一スロットは後勝ち）
+
+        保持期間より古い行は書き込まない。
+
+        Args:
+            timestamps_ms: 時刻（epoch ms, int64）
+            min_values: 最小値（行数 × センサー数, NaNは欠損）
+            max_values: 最大値（行数 × センサー数, NaNは欠損）
+
+        Returns:
+            書き込んだ行数
+        """
+        if not len(timestamps_ms):
+            return 0
+        header = self.header
+        last_timestamp_ms = max(int(timestamps_ms.max()), header.last_timestamp_ms)
+        oldest_ms = (last_timestamp_ms // header.interval_ms - header.capacity + 1) * header.interval_ms
+        # 同一スロットの行は新しい時刻を後に書き込む
+        order = np.argsort(timestamps_ms, kind="stable")
+        order = order[timestamps_ms[order] >= oldest_ms]
+
+        slots = (timestamps_ms[order] // header.interval_ms) % header.capacity
+        self.rows["timestamp"][slots] = timestamps_ms[order]
+        self.rows["min"][slots] = min_values[order]
+        self.rows["max"][slots] = max_values[order]
+        self.rows.flush()
+
+        header.last_timestamp_ms = last_timestamp_ms
+        with open(self.path, "r+b") as f:
+            f.write(header.encode())
+        return len(order)
+
+    def read_last(self, minutes: float) -> RingBufferWindow:
+        """
+        最新時刻から指定分数のデータを読み出す（O(K) スロットのみ参照）
+
+        Args:
+            minutes: 読み出す期間（分）
+
+        Returns:
+            期間のデータ
+        """
+        itemsize = self.header.row_dtype.itemsize
+        chunks = []
+        for offset, length in self.header.last_slot_ranges(self.header.rows_for_minutes(minutes)):
+            start = (offset - self.header.data_offset) // itemsize
+            chunks.append(self.rows[start: start + length // itemsize])
+        return build_window(self.header, chunks, minutes)
+
+    def close(self) -> None:
+        """mmap を解放"""
+        self.rows.flush()
+        del self.rows
+
+
+def build_window(header: RingBufferHeader, chunks: List[np.ndarray], minutes: float) -> RingBufferWindow:
+    """
+    スロットの配列から期間内の行だけを取り出す（古い周回の行と空きスロットを除外）
+
+    Args:
+        header: ヘッダー
+        chunks: スロットの構造化配列（古い順）
+        minutes: 期間（分）
+
+    Returns:
+        期間のデータ
+    """
+    rows = np.concatenate(chunks) if chunks else np.zeros(0, dtype=header.row_dtype)
+    oldest_ms = header.last_timestamp_ms - int(minutes * 60 * 1000)
+    rows = rows[(rows["timestamp"] != EMPTY_TIMESTAMP) & (rows["timestamp"] > oldest_ms)]
+    rows = rows[np.argsort(rows["timestamp"], kind="stable")]
+    return RingBufferWindow(
+        sensor_names=list(header.sensor_names),
+        timestamps=rows["timestamp"].astype("datetime64[ms]"),
+        min_values=np.array(rows["min"]),
+        max_values=np.array(rows["max"]),
+    )
+
+
+def read_header(read_range: Callable[[int, int], Optional[bytes]]) -> Optional[RingBufferHeader]:
+    """
+    バイト範囲の読み出し関数でヘッダーを取得（固定ヘッダーとセンサー名の2回の範囲読み出し）
+
+    Args:
+        read_range: (offset, length) を受け取りバイト列を返す関数（存在しない場合はNone）
+
+    Returns:
+        ヘッダー（ファイルが存在しない場合はNone）
+    """
+    fixed = read_range(0, RingBufferHeader.FIXED.size)
+    if fixed is None:
+        return None
+    _, names_length = RingBufferHeader.decode_fixed(fixed)
+    names = read_range(RingBufferHeader.FIXED.size, names_length) if names_length else b""
+    return RingBufferHeader.decode(fixed + names)
@@ -0,0 +1,157 @@
+import io
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+
+
+@dataclass
+class RollupLevel:
+    """
+    1つの集計粒度のロールアップ（バケット × センサーの最小・最大・合計・件数）
+
+    バケットは開始時刻（epoch ms）の昇順。平均は合計 / 件数で求める（件数0はNaN）。
+    """
+
+    bucket_ms: int
+    sensor_names: List[str]
+    buckets: np.ndarray
+    minimums: np.ndarray
+    maximums: np.ndarray
+    sums: np.ndarray
+    counts: np.ndarray
+
+    @classmethod
+    def empty(cls, bucket_ms: int, sensor_names: List[str]) -> "RollupLevel":
+        sensor_count = len(sensor_names)
+        return cls(
+            bucket_ms=bucket_ms,
+            sensor_names=list(sensor_names),
+            buckets=np.zeros(0, dtype=np.int64),
+            minimums=np.zeros((0, sensor_count), dtype=np.float32),
+            maximums=np.zeros((0, sensor_count), dtype=np.float32),
+            sums=np.zeros((0, sensor_count), dtype=np.float64),
+            counts=np.zeros((0, sensor_count), dtype=np.uint32),
+        )
+
+    @property
+    def means(self) -> np.ndarray:
+        return np.divide(
+            self.sums, self.counts, out=np.full(self.sums.shape, np.nan), where=self.counts > 0
+        )
+
+    def upsert(self, other: "RollupLevel") -> None:
+        """other のバケットで置き換え（存在しないバケットは追加）"""
+        keep = ~np.isin(self.buckets, other.buckets)
+        order = np.argsort(np.concatenate([self.buckets[keep], other.buckets]), kind="stable")
+        for name in ("buckets", "minimums", "maximums", "sums", "counts"):
+            merged = np.concatenate([getattr(self, name)[keep], getattr(other, name)])
+            setattr(self, name, merged[order])
+
+    def trim(self, oldest_bucket: int) -> None:
+        """oldest_bucket より前のバケットを削除"""
+        keep = self.buckets >= oldest_bucket
+        for name in ("buckets", "minimums", "maximums", "sums", "counts"):
+            setattr(self, name, getattr(self, name)[keep])
+
+    def select(self, start_ms: Optional[int] = None, end_ms: Optional[int] = None) -> "RollupLevel":
+        """[start_ms, end_ms) と重なるバケットを取り出す"""
+        keep = np.ones(len(self.buckets), dtype=bool)
+        if start_ms is not None:
+            keep &= self.buckets + self.bucket_ms > start_ms
+        if end_ms is not None:
+            keep &= self.buckets < end_ms
+        return RollupLevel(
+            self.bucket_ms, list(self.sensor_names), self.buckets[keep],
+            self.minimums[keep], self.maximums[keep], self.sums[keep], self.counts[keep],
+        )
+
+    def with_sensors(self, sensor_names: List[str]) -> "RollupLevel":
+        """センサー名で列を対応付け直す（存在しないセンサーは欠損）"""
+        if sensor_names == self.sensor_names:
+            return self
+        resized = RollupLevel.empty(self.bucket_ms, sensor_names)
+        row_count = len(self.buckets)
+        resized.buckets = self.buckets
+        resized.minimums = np.full((row_count, len(sensor_names)), np.nan, dtype=np.float32)
+        resized.maximums = np.full((row_count, len(sensor_names)), np.nan, dtype=np.float32)
+        resized.sums = np.zeros((row_count, len(sensor_names)), dtype=np.float64)
+        resized.counts = np.zeros((row_count, len(sensor_names)), dtype=np.uint32)
+        old_columns = {name: k for k, name in enumerate(self.sensor_names)}
+        for k, name in enumerate(sensor_names):
+            if name in old_columns:
+                j = old_columns[name]
+                resized.minimums[:, k] = self.minimums[:, j]
+                resized.maximums[:, k] = self.maximums[:, j]
+                resized.sums[:, k] = self.sums[:, j]
+                resized.counts[:, k] = self.counts[:, j]
+        return resized
+
+    def encode(self) -> bytes:
+        """npz 形式のバイト列に変換"""
+        buffer = io.BytesIO()
+        np.savez_compressed(
+            buffer,
+            bucket_ms=np.array(self.bucket_ms, dtype=np.int64),
+            sensor_names=np.array(self.sensor_names, dtype=str),
+            buckets=self.buckets,
+            minimums=self.minimums,
+            maximums=self.maximums,
+            sums=self.sums,
+            counts=self.counts,
+        )
+        return buffer.getvalue()
+
+    @classmethod
+    def decode(cls, data: bytes) -> "RollupLevel":
+        """npz 形式のバイト列から復元"""
+        with np.load(io.BytesIO(data), allow_pickle=False) as arrays:
+            return cls(
+                bucket_ms=int(arrays["bucket_ms"]),
+                sensor_names=arrays["sensor_names"].tolist(),
+                buckets=arrays["buckets"],
+                minimums=arrays["minimums"],
+                maximums=arrays["maximums"],
+                sums=arrays["sums"],
+                counts=arrays["counts"],
+            )
+
+
+def aggregate(
+    bucket_ms: int,
+    sensor_names: List[str],
+    timestamps_ms: np.ndarray,
+    minimums: np.ndarray,
+    maximums: np.ndarray,
+    sums: np.ndarray,
+    counts: np.ndarray,
+) -> RollupLevel:
+    """
+    行（時刻 × センサー）をバケットごとに集計
+
+    Args:
+        bucket_ms: バケットの幅（ms）
+        sensor_names: センサー名
+        timestamps_ms: 各行の時刻（epoch ms）
+        minimums: 各行の最小値（NaNは欠損）
+        maximums: 各行の最大値（NaNは欠損）
+        sums: 各行の合計
+        counts: 各行の件数
+
+    Returns:
+        バケットごとの集計
+    """
+    buckets, inverse = np.unique(timestamps_ms // bucket_ms * bucket_ms, return_inverse=True)
+    shape = (len(buckets), len(sensor_names))
+    level = RollupLevel.empty(bucket_ms, sensor_names)
+    level.buckets = buckets.astype(np.int64)
+    level.minimums = np.full(shape, np.nan, dtype=np.float32)
+    level.maximums = np.full(shape, np.nan, dtype=np.float32)
+    level.sums = np.zeros(shape, dtype=np.float64)
+    level.counts = np.zeros(shape, dtype=np.uint32)
+    # fmin/fmax はNaNを無視する（全てNaNのバケットはNaNのまま）
+    np.fmin.at(level.minimums, inverse, minimums.astype(np.float32))
+    np.fmax.at(level.maximums, inverse, maximums.astype(np.float32))
+    np.add.at(level.sums, inverse, sums)
+    np.add.at(level.counts, inverse, counts.astype(np.uint32))
+    return level
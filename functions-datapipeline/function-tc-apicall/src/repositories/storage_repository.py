@@ -1,39 +1,154 @@
+import base64
+import hashlib
 import logging
+import mimetypes
+import os
+import shutil
+import tempfile
+import threading
+import uuid
 from abc import ABC, abstractmethod
-from typing import Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, BinaryIO, Callable, Dict, Iterator, List, Optional, Set, Tuple
 
-from google.cloud import storage
+if TYPE_CHECKING:
+    from google.cloud import storage
+
+
+class GenerationMismatchError(Exception):
+    """条件付き書き込みで、オブジェクトの世代が指定と一致しなかった"""
 
 
 class StorageRepository(ABC):
-    """ストレージ操作の抽象インターフェース"""
+    """ストレージ操作の抽象インターフェース（CSVなどのファイルの保存先）"""
 
     @abstractmethod
     def upload_file(self, local_file_path: str, destination_path: str) -> str:
         """ファイルをアップロードする"""
         pass
 
+    def accepts(self, destination_path: str) -> bool:
+        """指定パスのオブジェクトを保存できるか（既定では全て保存できる）"""
+        return True
+
+    def flush(self) -> None:
+        """保留中の書き込みを確定する（既定では何もしない）"""
+        pass
+
+
+class ObjectStorageRepository(StorageRepository):
+    """
+    オブジェクトの読み書き・範囲取得・条件付き書き込みに対応したストレージ
+
+    状態ファイル・サイドカー・索引などを保存する機能はこのインターフェースを必要とする。
+    main.py でストレージがこのインターフェースを実装している場合のみ、それらの機能を有効にする。
+    """
+
+    @abstractmethod
+    def upload_bytes(
+        self, data: bytes, destination_path: str, content_type: str = "application/octet-stream"
+    ) -> str:
+        """バイト列をアップロードする"""
+        pass
+
+    @abstractmethod
+    def download_bytes(self, source_path: str) -> Optional[bytes]:
+        """オブジェクトをバイト列として取得する（存在しない場合はNone）"""
+        pass
+
+    @abstractmethod
+    def download_range(self, source_path: str, start: int, length: int) -> Optional[bytes]:
+        """オブジェクトの指定バイト範囲を取得する（存在しない場合はNone）"""
+        pass
+
+    @abstractmethod
+    def open_writer(self, destination_path: str):
+        """
+        書き込み用のファイルオブジェクトを返すコンテキストマネージャ
+
+        with ブロックを正常に抜けた時点でオブジェクトが確定し、例外時は何も作成しない。
+        """
+        pass
+
+    @abstractmethod
+    def get_object_url(self, destination_path: str) -> str:
+        """オブジェクトのURL（upload_file などが返すものと同じ形式）を取得する"""
+        pass
+
+    @abstractmethod
+    def get_object_metadata(self, source_path: str) -> Optional[Dict]:
+        """オブジェクトの世代（generation）とサイズ（size_bytes）を取得する（存在しない場合はNone）"""
+        pass
+
+    @abstractmethod
+    def download_bytes_with_generation(self, source_path: str) -> Tuple[Optional[bytes], int]:
+        """オブジェクトの内容と世代を取得する（存在しない場合は (None, 0)）"""
+        pass
+
+    @abstractmethod
+    def upload_bytes_if_generation_match(
+        self,
+        data: bytes,
+        destination_path: str,
+        generation: int,
+        content_type: str = "application/octet-stream",
+    ) -> int:
+        """
+        オブジェクトの世代が一致する場合のみ書き込み、新しい世代を返す（0は存在しない場合のみ書き込み）
+
+        一致しない場合は GenerationMismatchError を送出する。
+        """
+        pass
+
 
-class CloudStorageRepository(StorageRepository):
+class CloudStorageRepository(ObjectStorageRepository):
     """Google Cloud Storage へのファイルアップロード"""
 
-    def __init__(self, bucket_name: str, project_id: Optional[str] = None):
+    # compose で結合できるオブジェクト数の上限
+    MAX_COMPOSE_SOURCES = 32
+    # 分割アップロードのパーツ配置先（timeseries_data 配下の一覧に混ざらないようにする）
+    PARTS_PREFIX = "_composite_parts"
+    # CRC32C 計算時の読み込みサイズ
+    CHECKSUM_READ_SIZE = 1024 * 1024
+    # 再開可能アップロードのチャンクサイズの単位
+    RESUMABLE_CHUNK_UNIT = 256 * 1024
+
+    def __init__(
+        self,
+        bucket_name: str,
+        project_id: Optional[str] = None,
+        parallel_upload_threshold_bytes: int = 0,
+        parallel_upload_part_bytes: int = 8 * 1024 * 1024,
+        parallel_upload_workers: int = 8,
+        storage_client: Optional["storage.Client"] = None,
+    ):
         """
         CloudStorageRepositoryを初期化
         
         Args:
             bucket_name: Cloud Storage バケット名
             project_id: Google Cloud プロジェクトID（省略時は環境から取得）
+            parallel_upload_threshold_bytes: 並列分割アップロードを行うファイルサイズの閾値（0で無効）
+            parallel_upload_part_bytes: 分割アップロードのパーツサイズ（最小値）
+            parallel_upload_workers: 分割アップロードの並列数
+            storage_client: 再利用する Cloud Storage クライアント（省略時は新規作成）
         """
         self.bucket_name = bucket_name
         self.project_id = project_id
+        self.parallel_upload_threshold_bytes = parallel_upload_threshold_bytes
+        self.parallel_upload_part_bytes = parallel_upload_part_bytes
+        self.parallel_upload_workers = parallel_upload_workers
         self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
         
-        # Cloud Storage クライアントを初期化
-        if project_id:
-            self.storage_client = storage.Client(project=project_id)
-        else:
-            self.storage_client = storage.Client()
+        # Cloud Storage クライアントを初期化（起動時間短縮のため、使うときに読み込む）
+        if storage_client is None:
+            from google.cloud import storage
+            if project_id:
+                storage_client = storage.Client(project=project_id)
+            else:
+                storage_client = storage.Client()
+        self.storage_client = storage_client
 
     def upload_file(self, local_file_path: str, destination_path: str) -> str:
         """
@@ -53,8 +168,12 @@ class CloudStorageRepository(StorageRepository):
             bucket = self.storage_client.bucket(self.bucket_name)
             blob = bucket.blob(destination_path)
             
-            # ファイルをアップロード
-            blob.upload_from_filename(local_file_path)
+            # ファイルをアップロード（閾値以上は並列分割アップロード）
+            file_size = os.path.getsize(local_file_path)
+            if self.parallel_upload_threshold_bytes and file_size >= self.parallel_upload_threshold_bytes:
+                self._upload_file_composite(bucket, blob, local_file_path, file_size)
+            else:
+                blob.upload_from_filename(local_file_path)
             
             # アップロードされたファイルのURL
             file_url = f"gs://{self.bucket_name}/{destination_path}"
@@ -66,34 +185,740 @@ class CloudStorageRepository(StorageRepository):
             self.logger.error(f"Cloud Storageアップロード失敗: {e}")
             raise e
 
+    def _upload_file_composite(
+        self, bucket: "storage.Bucket", blob: "storage.Blob", local_file_path: str, file_size: int
+    ) -> None:
+        """
+        ファイルを分割して並列アップロードし、compose で1つのオブジェクトに結合
+        
+        結合後のオブジェクト全体の CRC32C をローカルファイルと照合し、
+        成否にかかわらずパーツは削除する。
+        
+        Args:
+            bucket: アップロード先バケット
+            blob: 結合先のblob
+            local_file_path: アップロードするローカルファイルパス
+            file_size: ファイルサイズ
+        """
+        # パーツ数が compose の上限を超えないようにパーツサイズを決める
+        part_size = max(
+            self.parallel_upload_part_bytes,
+            -(-file_size // self.MAX_COMPOSE_SOURCES),
+        )
+        ranges = [
+            (offset, min(part_size, file_size - offset))
+            for offset in range(0, file_size, part_size)
+        ]
+        upload_id = uuid.uuid4().hex
+        parts = [
+            bucket.blob(f"{self.PARTS_PREFIX}/{upload_id}/{index:02d}")
+            for index in range(len(ranges))
+        ]
+        self.logger.info(
+            f"並列分割アップロード開始: {blob.name} "
+            f"({file_size} bytes, パーツ数: {len(parts)}, 並列数: {self.parallel_upload_workers})"
+        )
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.parallel_upload_workers) as executor:
+                futures = [
+                    executor.submit(self._upload_part, part, local_file_path, offset, size)
+                    for part, (offset, size) in zip(parts, ranges)
+                ]
+                for future in futures:
+                    future.result()
+
+            blob.content_type = mimetypes.guess_type(local_file_path)[0] or "application/octet-stream"
+            blob.compose(parts)
+
+            expected_crc32c = self._calculate_crc32c(local_file_path)
+            if blob.crc32c != expected_crc32c:
+                blob.delete()
+                raise ValueError(
+                    f"結合後のCRC32Cが一致しません: {blob.name} "
+                    f"(期待値: {expected_crc32c}, 実際: {blob.crc32c})"
+                )
+            self.logger.info(f"並列分割アップロード完了: {blob.name} (CRC32C: {expected_crc32c})")
+        finally:
+            self._delete_parts(parts)
+
+    def _upload_part(self, part: "storage.Blob", local_file_path: str, offset: int, size: int) -> None:
+        """ファイルの指定範囲を1パーツとしてアップロード（パーツ単位でもCRC32Cを検証）"""
+        with open(local_file_path, "rb") as f:
+            f.seek(offset)
+            part.upload_from_file(f, size=size, checksum="crc32c")
+
+    def _delete_parts(self, parts: List["storage.Blob"]) -> None:
+        """分割アップロードのパーツを削除（存在しないパーツは無視）"""
+        from google.cloud.exceptions import NotFound
+        for part in parts:
+            try:
+                part.delete()
+            except NotFound:
+                pass
+            except Exception as e:
+                self.logger.warning(f"パーツの削除に失敗しました: {part.name}: {e}")
+
+    def _calculate_crc32c(self, local_file_path: str) -> str:
+        """ファイル全体の CRC32C を Cloud Storage と同じ形式（base64）で計算"""
+        import google_crc32c
+        checksum = google_crc32c.Checksum()
+        with open(local_file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(self.CHECKSUM_READ_SIZE), b""):
+                checksum.update(chunk)
+        return base64.b64encode(checksum.digest()).decode("utf-8")
+
+    def upload_bytes(
+        self, data: bytes, destination_path: str, content_type: str = "application/octet-stream"
+    ) -> str:
+        """
+        バイト列をCloud Storageにアップロード
+        
+        Args:
+            data: アップロードするデータ
+            destination_path: Cloud Storage内のファイルパス
+            content_type: Content-Type
+            
+        Returns:
+            アップロードされたファイルのURL
+        """
+        self.logger.info(f"Cloud Storageアップロード開始: {destination_path} ({len(data)} bytes)")
+        
+        try:
+            bucket = self.storage_client.bucket(self.bucket_name)
+            blob = bucket.blob(destination_path)
+            blob.upload_from_string(data, content_type=content_type)
+            
+            file_url = f"gs://{self.bucket_name}/{destination_path}"
+            self.logger.info(f"Cloud Storageアップロード完了: {file_url}")
+            
+            return file_url
+            
+        except Exception as e:
+            self.logger.error(f"Cloud Storageアップロード失敗: {e}")
+            raise e
+
+    @contextmanager
+    def open_writer(self, destination_path: str) -> Iterator[BinaryIO]:
+        """
+        書き込み用のファイルオブジェクトを返し、書き込みながら再開可能アップロードで送信
+        
+        一時ファイルを使わず、チャンク（分割アップロードのパーツサイズを256KB単位に切り捨てたサイズ）ごとに
+        送信するため、使用メモリはチャンク1つ分に抑えられる。送信先は分割アップロードのパーツと同じ
+        一時オブジェクトで、with ブロックを正常に抜けた時点でアップロードを確定して CRC32C を検証し、
+        compose で書き込み先にコピーする。一時オブジェクトは成否にかかわらず削除するため、
+        例外時に途中までの内容が書き込み先に作成されることはない。
+        Content-Type は destination_path の拡張子から判定する。
+        
+        Args:
+            destination_path: Cloud Storage内のファイルパス
+            
+        Yields:
+            書き込み用のファイルオブジェクト
+        """
+        self.logger.info(f"Cloud Storageストリーミングアップロード開始: {destination_path}")
+        
+        bucket = self.storage_client.bucket(self.bucket_name)
+        blob = bucket.blob(destination_path)
+        staging = bucket.blob(f"{self.PARTS_PREFIX}/{uuid.uuid4().hex}/stream")
+        chunk_size = max(self.parallel_upload_part_bytes // self.RESUMABLE_CHUNK_UNIT, 1) * self.RESUMABLE_CHUNK_UNIT
+        content_type = mimetypes.guess_type(destination_path)[0] or "application/octet-stream"
+        writer = staging.open(
+            "wb", chunk_size=chunk_size, ignore_flush=True, content_type=content_type, checksum="crc32c"
+        )
+        try:
+            try:
+                yield writer
+            except BaseException:
+                # 未確定のまま残すとGC時の close() で確定されるため、ここで確定してから削除する
+                try:
+                    writer.close()
+                except Exception as e:
+                    self.logger.debug(f"中止したアップロードの確定に失敗しました: {staging.name}: {e}")
+                self.logger.error(f"Cloud Storageストリーミングアップロードを中止しました: {destination_path}")
+                raise
+            writer.close()
+            blob.content_type = content_type
+            blob.compose([staging])
+        finally:
+            self._delete_parts([staging])
+        self.logger.info(f"Cloud Storageアップロード完了: {self.get_object_url(destination_path)}")
+
+    def get_object_url(self, destination_path: str) -> str:
+        return f"gs://{self.bucket_name}/{destination_path}"
+
+    def download_bytes(self, source_path: str) -> Optional[bytes]:
+        """
+        Cloud Storageのオブジェクトをバイト列として取得
+        
+        Args:
+            source_path: Cloud Storage内のファイルパス
+            
+        Returns:
+            オブジェクトの内容（存在しない場合はNone）
+        """
+        from google.cloud.exceptions import NotFound
+        bucket = self.storage_client.bucket(self.bucket_name)
+        blob = bucket.blob(source_path)
+        
+        try:
+            data = blob.download_as_bytes()
+        except NotFound:
+            self.logger.info(f"オブジェクトが存在しません: gs://{self.bucket_name}/{source_path}")
+            return None
+        
+        self.logger.info(f"Cloud Storageダウンロード完了: {source_path} ({len(data)} bytes)")
+        return data
+
+    def get_object_metadata(self, source_path: str) -> Optional[Dict]:
+        """
+        Cloud Storageのオブジェクトの世代とサイズを取得
+        
+        Args:
+            source_path: Cloud Storage内のファイルパス
+            
+        Returns:
+            generation と size_bytes の辞書（存在しない場合はNone）
+        """
+        blob = self.storage_client.bucket(self.bucket_name).get_blob(source_path)
+        if blob is None:
+            return None
+        return {"generation": blob.generation, "size_bytes": blob.size}
+
+    def download_bytes_with_generation(self, source_path: str) -> Tuple[Optional[bytes], int]:
+        """
+        Cloud Storageのオブジェクトの内容と、読み込んだ世代を取得
+        
+        Args:
+            source_path: Cloud Storage内のファイルパス
+            
+        Returns:
+            内容と世代（存在しない場合は (None, 0)）
+        """
+        from google.cloud.exceptions import NotFound
+        blob = self.storage_client.bucket(self.bucket_name).blob(source_path)
+        
+        try:
+            # 応答ヘッダーの世代が blob に反映される
+            data = blob.download_as_bytes()
+        except NotFound:
+            return None, 0
+        return data, blob.generation
+
+    def upload_bytes_if_generation_match(
+        self,
+        data: bytes,
+        destination_path: str,
+        generation: int,
+        content_type: str = "application/octet-stream",
+    ) -> int:
+        """
+        オブジェクトの世代が一致する場合のみアップロード（if_generation_match）
+        
+        Args:
+            data: アップロードするデータ
+            destination_path: Cloud Storage内のファイルパス
+            generation: 期待する世代（0は存在しない場合のみ）
+            content_type: Content-Type
+            
+        Returns:
+            新しい世代
+        """
+        from google.api_core.exceptions import PreconditionFailed
+        blob = self.storage_client.bucket(self.bucket_name).blob(destination_path)
+        
+        try:
+            blob.upload_from_string(data, content_type=content_type, if_generation_match=generation)
+        except PreconditionFailed as e:
+            raise GenerationMismatchError(f"世代が一致しません: {destination_path} (期待値: {generation})") from e
+        
+        self.logger.info(f"Cloud Storage条件付きアップロード完了: {destination_path} (世代: {blob.generation})")
+        return blob.generation
+
+    def download_range(self, source_path: str, start: int, length: int) -> Optional[bytes]:
+        """
+        Cloud Storageのオブジェクトの指定バイト範囲を取得（Rangeリクエスト）
+        
+        Args:
+            source_path: Cloud Storage内のファイルパス
+            start: 開始オフセット
+            length: バイト数
+            
+        Returns:
+            指定範囲の内容（存在しない場合はNone）
+        """
+        from google.cloud.exceptions import NotFound
+        bucket = self.storage_client.bucket(self.bucket_name)
+        blob = bucket.blob(source_path)
+        
+        try:
+            # end は終端を含む
+            data = blob.download_as_bytes(start=start, end=start + length - 1)
+        except NotFound:
+            self.logger.info(f"オブジェクトが存在しません: gs://{self.bucket_name}/{source_path}")
+            return None
+        
+        self.logger.debug(f"Cloud Storage範囲ダウンロード完了: {source_path} ({start}-{start + length - 1})")
+        return data
+
+
+class LocalStorageRepository(ObjectStorageRepository):
+    """
+    ローカル / NFS ファイルシステムへの書き込み
 
-class LocalStorageRepository(StorageRepository):
-    """ローカルファイルシステムでのファイル操作（テスト用）"""
+    全ての書き込みは書き込み先と同じディレクトリの一時ファイル（".{name}.{uuid}.tmp"）に行い、
+    fsync してから rename で置き換えるため、読み手が書き込み途中のファイルを見ることはない。
+    同じファイルシステム上のファイルは reflink（対応FSのみ）またはハードリンクで取り込み、
+    データをコピーしない。rename を永続化するディレクトリの fsync はまとめて行う。
+    """
 
-    def __init__(self, base_path: str):
+    # 一時ファイルの接頭辞（一覧・集計の対象から外れるよう隠しファイルにする）
+    TEMP_PREFIX = "."
+    TEMP_SUFFIX = ".tmp"
+    # reflink 用の ioctl（linux/fs.h の FICLONE）
+    FICLONE = 0x40049409
+
+    def __init__(self, base_path: str, link_files: bool = True, directory_sync_batch: int = 32):
+        """
+        LocalStorageRepositoryを初期化
+        
+        Args:
+            base_path: 保存先のルートディレクトリ
+            link_files: 同じファイルシステム上のファイルを reflink / ハードリンクで取り込む
+                （ハードリンクの場合、取り込み後にコピー元を書き換えると保存先にも反映される）
+            directory_sync_batch: ディレクトリの fsync をまとめる rename の件数（1で毎回）
+        """
         self.base_path = base_path
+        self.link_files = link_files
+        self.directory_sync_batch = max(directory_sync_batch, 1)
         self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+        self._dirty_directories: Set[str] = set()
+        self._pending_renames = 0
+        self._lock = threading.Lock()
+        # 条件付き書き込みの比較と置き換えを排他するロック（_commit が _lock を取るため別にする）
+        self._generation_lock = threading.Lock()
 
     def upload_file(self, local_file_path: str, destination_path: str) -> str:
         """
-        ローカルファイルを指定パスにコピー
+        ローカルファイルを指定パスに保存（同じファイルシステムならリンク、異なればコピー）
         
         Args:
-            local_file_path: コピー元ファイルパス
-            destination_path: コピー先ファイルパス
+            local_file_path: 保存するファイルパス
+            destination_path: 保存先ファイルパス
             
         Returns:
-            コピーされたファイルのパス
+            保存されたファイルのパス
         """
-        import shutil
-        import os
+        full_destination_path = self._prepare_destination(destination_path)
         
-        full_destination_path = os.path.join(self.base_path, destination_path)
+        method = self._link_file(local_file_path, full_destination_path) if self.link_files else None
+        if method is None:
+            def copy(f: BinaryIO) -> None:
+                with open(local_file_path, "rb") as source:
+                    shutil.copyfileobj(source, f, length=1024 * 1024)
+            self._write_atomic(full_destination_path, copy)
+            method = "copy"
+        
+        self.logger.info(f"ローカルファイル保存完了（{method}）: {full_destination_path}")
+        return full_destination_path
+
+    def upload_bytes(
+        self, data: bytes, destination_path: str, content_type: str = "application/octet-stream"
+    ) -> str:
+        """
+        バイト列を指定パスに書き込み
+        
+        Args:
+            data: 書き込むデータ
+            destination_path: 書き込み先ファイルパス
+            content_type: Content-Type（ローカルでは未使用）
+            
+        Returns:
+            書き込まれたファイルのパス
+        """
+        full_destination_path = self._prepare_destination(destination_path)
+        self._write_atomic(full_destination_path, lambda f: f.write(data))
+        self.logger.info(f"ローカルファイル書き込み完了: {full_destination_path}")
+        
+        return full_destination_path
+
+    @contextmanager
+    def open_writer(self, destination_path: str) -> Iterator[BinaryIO]:
+        """
+        書き込み用のファイルオブジェクトを返し、with ブロックを正常に抜けたら置き換え
+        
+        Args:
+            destination_path: 書き込み先ファイルパス
+            
+        Yields:
+            書き込み用のファイルオブジェクト（一時ファイル）
+        """
+        full_destination_path = self._prepare_destination(destination_path)
+        temp_path = self._get_temp_path(full_destination_path)
+        try:
+            with open(temp_path, "wb") as f:
+                yield f
+                f.flush()
+                os.fsync(f.fileno())
+            self._commit(temp_path, full_destination_path)
+        except BaseException:
+            self._remove_quietly(temp_path)
+            raise
+        self.logger.info(f"ローカルファイル書き込み完了: {full_destination_path}")
+
+    def get_object_url(self, destination_path: str) -> str:
+        return os.path.join(self.base_path, destination_path)
+
+    def flush(self) -> None:
+        """保留中のディレクトリの fsync を実行し、rename を永続化"""
+        with self._lock:
+            directories = self._dirty_directories
+            self._dirty_directories = set()
+            self._pending_renames = 0
+        for directory in directories:
+            self._fsync_directory(directory)
+
+    def download_bytes(self, source_path: str) -> Optional[bytes]:
+        """
+        指定パスのファイルをバイト列として取得
+        
+        Args:
+            source_path: 読み込むファイルパス
+            
+        Returns:
+            ファイルの内容（存在しない場合はNone）
+        """
+        full_source_path = os.path.join(self.base_path, source_path)
+        if not os.path.exists(full_source_path):
+            return None
+        
+        with open(full_source_path, "rb") as f:
+            return f.read()
+
+    def download_range(self, source_path: str, start: int, length: int) -> Optional[bytes]:
+        """
+        指定パスのファイルの指定バイト範囲を取得
+        
+        Args:
+            source_path: 読み込むファイルパス
+            start: 開始オフセット
+            length: バイト数
+            
+        Returns:
+            指定範囲の内容（存在しない場合はNone）
+        """
+        full_source_path = os.path.join(self.base_path, source_path)
+        if not os.path.exists(full_source_path):
+            return None
+        
+        with open(full_source_path, "rb") as f:
+            f.seek(start)
+            return f.read(length)
+
+    def get_object_metadata(self, source_path: str) -> Optional[Dict]:
+        """
+        ファイルの世代とサイズを取得
+        
+        Args:
+            source_path: ファイルパス
+            
+        Returns:
+            generation と size_bytes の辞書（存在しない場合はNone）
+        """
+        try:
+            stat = os.stat(os.path.join(self.base_path, source_path))
+        except FileNotFoundError:
+            return None
+        return {"generation": self._generation(stat), "size_bytes": stat.st_size}
+
+    def download_bytes_with_generation(self, source_path: str) -> Tuple[Optional[bytes], int]:
+        """
+        ファイルの内容と世代を取得
+        
+        Args:
+            source_path: ファイルパス
+            
+        Returns:
+            内容と世代（存在しない場合は (None, 0)）
+        """
+        full_source_path = os.path.join(self.base_path, source_path)
+        try:
+            with open(full_source_path, "rb") as f:
+                # rename で置き換えられるため、開いたファイルの世代と内容は一致する
+                return f.read(), self._generation(os.fstat(f.fileno()))
+        except FileNotFoundError:
+            return None, 0
+
+    def upload_bytes_if_generation_match(
+        self,
+        data: bytes,
+        destination_path: str,
+        generation: int,
+        content_type: str = "application/octet-stream",
+    ) -> int:
+        """
+        ファイルの世代が一致する場合のみ書き込み
+        
+        同じディレクトリのロックファイルを flock で排他し、プロセス間でも比較と置き換えを不可分にする。
+        
+        Args:
+            data: 書き込むデータ
+            destination_path: 書き込み先ファイルパス
+            generation: 期待する世代（0は存在しない場合のみ）
+            content_type: Content-Type（ローカルでは未使用）
+            
+        Returns:
+            新しい世代
+        """
+        full_destination_path = self._prepare_destination(destination_path)
+        directory, name = os.path.split(full_destination_path)
+        with self._generation_lock, open(os.path.join(directory, f".{name}.lock"), "a") as lock_file:
+            try:
+                import fcntl
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            except ImportError:
+                pass
+            current = self.get_object_metadata(destination_path)
+            if (current["generation"] if current else 0) != generation:
+                raise GenerationMismatchError(f"世代が一致しません: {destination_path} (期待値: {generation})")
+            self._write_atomic(full_destination_path, lambda f: f.write(data))
+            new_generation = self._generation(os.stat(full_destination_path))
         
-        # ディレクトリが存在しない場合は作成
+        self.logger.info(f"ローカルファイル条件付き書き込み完了: {full_destination_path} (世代: {new_generation})")
+        return new_generation
+
+    def _prepare_destination(self, destination_path: str) -> str:
+        """保存先の絶対パスを取得（ディレクトリが存在しない場合は作成）"""
+        full_destination_path = os.path.join(self.base_path, destination_path)
         os.makedirs(os.path.dirname(full_destination_path), exist_ok=True)
+        return full_destination_path
+
+    def _get_temp_path(self, full_destination_path: str) -> str:
+        """書き込み先と同じディレクトリの一時ファイルパス（rename を同一FS内にするため）"""
+        directory, name = os.path.split(full_destination_path)
+        return os.path.join(directory, f"{self.TEMP_PREFIX}{name}.{uuid.uuid4().hex}{self.TEMP_SUFFIX}")
+
+    def _write_atomic(self, full_destination_path: str, write: Callable[[BinaryIO], None]) -> None:
+        """一時ファイルに書き込んで fsync し、rename で置き換え"""
+        temp_path = self._get_temp_path(full_destination_path)
+        try:
+            with open(temp_path, "wb") as f:
+                write(f)
+                f.flush()
+                os.fsync(f.fileno())
+            self._commit(temp_path, full_destination_path)
+        except BaseException:
+            self._remove_quietly(temp_path)
+            raise
+
+    def _link_file(self, local_file_path: str, full_destination_path: str) -> Optional[str]:
+        """
+        コピー元を reflink またはハードリンクで一時ファイルにし、rename で置き換え
         
-        shutil.copy2(local_file_path, full_destination_path)
-        self.logger.info(f"ローカルファイルコピー完了: {full_destination_path}")
+        Returns:
+            使った方法（"reflink" / "hardlink"）。別のファイルシステムなどでリンクできない場合はNone
+        """
+        destination_directory = os.path.dirname(full_destination_path)
+        if os.stat(local_file_path).st_dev != os.stat(destination_directory).st_dev:
+            return None
         
-        return full_destination_path
\ No newline at end of file
+        # リンクはデータを複製しないため、コピー元の内容を先に永続化する
+        with open(local_file_path, "rb") as source:
+            os.fsync(source.fileno())
+            temp_path = self._get_temp_path(full_destination_path)
+            try:
+                method = "reflink" if self._reflink(source, temp_path) else None
+                if method is None:
+                    os.link(local_file_path, temp_path)
+                    method = "hardlink"
+                self._commit(temp_path, full_destination_path)
+                return method
+            except OSError as e:
+                self._remove_quietly(temp_path)
+                self.logger.debug(f"リンクできないためコピーします: {e}")
+                return None
+
+    def _reflink(self, source: BinaryIO, temp_path: str) -> bool:
+        """reflink（コピーオンライト）で複製（未対応のFS・OSではFalse）"""
+        try:
+            import fcntl
+        except ImportError:
+            return False
+        with open(temp_path, "wb") as f:
+            try:
+                fcntl.ioctl(f.fileno(), self.FICLONE, source.fileno())
+            except OSError:
+                ok = False
+            else:
+                os.fsync(f.fileno())
+                ok = True
+        if not ok:
+            os.unlink(temp_path)
+        return ok
+
+    def _commit(self, temp_path: str, full_destination_path: str) -> None:
+        """一時ファイルを rename で置き換え、ディレクトリの fsync を予約（件数に達したらまとめて実行）"""
+        os.replace(temp_path, full_destination_path)
+        with self._lock:
+            self._dirty_directories.add(os.path.dirname(full_destination_path))
+            self._pending_renames += 1
+            should_flush = self._pending_renames >= self.directory_sync_batch
+        if should_flush:
+            self.flush()
+
+    def _fsync_directory(self, directory: str) -> None:
+        """ディレクトリを fsync（ディレクトリを開けないOSでは何もしない）"""
+        try:
+            fd = os.open(directory, os.O_RDONLY | getattr(os, "O_DIRECTORY", 0))
+        except OSError as e:
+            self.logger.debug(f"ディレクトリを開けないため fsync をスキップします: {directory}: {e}")
+            return
+        try:
+            os.fsync(fd)
+        except OSError as e:
+            self.logger.debug(f"ディレクトリの fsync に失敗しました: {directory}: {e}")
+        finally:
+            os.close(fd)
+
+    @staticmethod
+    def _generation(stat: os.stat_result) -> int:
+        """
+        更新時刻 ns・inode・サイズのハッシュから世代を算出（rename で置き換えると inode も変わる）
+
+        Cloud Storage の世代と同様に扱えるよう、JSON の数値（float64）で正確に表せる53ビットに収める。
+        0 は「存在しない」を表すため使わない。
+        """
+        key = f"{stat.st_mtime_ns}:{stat.st_ino}:{stat.st_size}".encode("ascii")
+        digest = int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "big")
+        return (digest & ((1 << 53) - 1)) or 1
+
+    @staticmethod
+    def _remove_quietly(path: str) -> None:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+class CompositeStorageRepository(ObjectStorageRepository):
+    """
+    主ストレージと追加のシンクへ同時に書き込む
+
+    書き込みは主ストレージとシンクへ並列に行い、読み込みは主ストレージから行う。
+    シンクへはそのシンクが保存できるパス（accepts）のみ書き込み、
+    バイト列の書き込みは ObjectStorageRepository を実装したシンクにのみ行う。
+    シンクの失敗はログに出力するのみで、主ストレージの結果を返す。
+    """
+
+    def __init__(self, primary: ObjectStorageRepository, sinks: List[StorageRepository]):
+        self.primary = primary
+        self.sinks = sinks
+        self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+
+    def upload_file(self, local_file_path: str, destination_path: str) -> str:
+        """ファイルを主ストレージとシンクへ並列に保存"""
+        return self._write_all(
+            lambda repository: repository.upload_file(local_file_path, destination_path),
+            self._get_sinks(destination_path),
+        )
+
+    def upload_bytes(
+        self, data: bytes, destination_path: str, content_type: str = "application/octet-stream"
+    ) -> str:
+        """バイト列を主ストレージとシンクへ並列に保存"""
+        sinks = [sink for sink in self._get_sinks(destination_path) if isinstance(sink, ObjectStorageRepository)]
+        return self._write_all(
+            lambda repository: repository.upload_bytes(data, destination_path, content_type=content_type), sinks
+        )
+
+    @contextmanager
+    def open_writer(self, destination_path: str) -> Iterator[BinaryIO]:
+        """
+        主ストレージの書き込み用ファイルオブジェクトを返す
+
+        シンクがある場合は、シンクへ渡すファイルとして一時ファイルにも同じ内容を書き込み、
+        主ストレージへの書き込みが確定した後にシンクへ保存する。
+        """
+        sinks = self._get_sinks(destination_path)
+        if not sinks:
+            with self.primary.open_writer(destination_path) as f:
+                yield f
+            return
+
+        suffix = os.path.splitext(destination_path)[1]
+        with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as temp_file:
+            temp_file_path = temp_file.name
+        try:
+            with self.primary.open_writer(destination_path) as f, open(temp_file_path, "wb") as copy:
+                yield _TeeWriter(f, copy)
+            for sink in sinks:
+                try:
+                    sink.upload_file(temp_file_path, destination_path)
+                except Exception as e:
+                    self.logger.error(f"シンクへの書き込みに失敗しました（{sink.__class__.__name__}）: {e}")
+        finally:
+            os.unlink(temp_file_path)
+
+    def get_object_url(self, destination_path: str) -> str:
+        return self.primary.get_object_url(destination_path)
+
+    def download_bytes(self, source_path: str) -> Optional[bytes]:
+        return self.primary.download_bytes(source_path)
+
+    def download_range(self, source_path: str, start: int, length: int) -> Optional[bytes]:
+        return self.primary.download_range(source_path, start, length)
+
+    def get_object_metadata(self, source_path: str) -> Optional[Dict]:
+        return self.primary.get_object_metadata(source_path)
+
+    def download_bytes_with_generation(self, source_path: str) -> Tuple[Optional[bytes], int]:
+        return self.primary.download_bytes_with_generation(source_path)
+
+    def upload_bytes_if_generation_match(
+        self,
+        data: bytes,
+        destination_path: str,
+        generation: int,
+        content_type: str = "application/octet-stream",
+    ) -> int:
+        """条件付き書き込みは主ストレージのみに行う"""
+        return self.primary.upload_bytes_if_generation_match(data, destination_path, generation, content_type)
+
+    def flush(self) -> None:
+        for repository in [self.primary, *self.sinks]:
+            repository.flush()
+
+    def _get_sinks(self, destination_path: str) -> List[StorageRepository]:
+        """指定パスを保存できるシンク"""
+        return [sink for sink in self.sinks if sink.accepts(destination_path)]
+
+    def _write_all(self, write: Callable[[StorageRepository], str], sinks: List[StorageRepository]) -> str:
+        """主ストレージと指定したシンクへ並列に書き込み、主ストレージの結果を返す"""
+        with ThreadPoolExecutor(max_workers=1 + len(sinks)) as executor:
+            primary_future = executor.submit(write, self.primary)
+            sink_futures = [(sink, executor.submit(write, sink)) for sink in sinks]
+            for sink, future in sink_futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    self.logger.error(f"シンクへの書き込みに失敗しました（{sink.__class__.__name__}）: {e}")
+            return primary_future.result()
+
+
+class _TeeWriter:
+    """書き込みを2つのファイルオブジェクトへ複製する（位置は主側のものを返す）"""
+
+    def __init__(self, primary: BinaryIO, copy: BinaryIO):
+        self.primary = primary
+        self.copy = copy
+
+    def write(self, data: bytes) -> int:
+        self.copy.write(data)
+        return self.primary.write(data)
+
+    def tell(self) -> int:
+        return self.primary.tell()
+
+    def flush(self) -> None:
+        self.primary.flush()
+        self.copy.flush()
@@ -0,0 +1,109 @@
+import json
+from typing import Any, Iterator, TextIO, Tuple
+
+
+class StreamingJSONReader:
+    """
+    ファイルからJSONを少しずつ読み込むリーダー
+
+    巨大なオブジェクトの要素を1件ずつデコードするため、
+    メモリ使用量はバッファサイズ＋1要素分に抑えられる。
+    """
+
+    _WHITESPACE = " \t\n\r"
+
+    def __init__(self, fp: TextIO, chunk_size: int = 64 * 1024):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def iter_object_keys(self) -> Iterator[str]:
+        """
+        オブジェクトのキーを順に返す
+
+        呼び出し側は次のキーを要求する前に、値を decode_value / iter_object_items /
+        skip_value のいずれかで必ず読み進めること。
+        """
+        self._expect("{")
+        if self._peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.decode_value()
+            if not isinstance(key, str):
+                raise ValueError(f"オブジェクトのキーが文字列ではありません: {key!r}")
+            self._expect(":")
+            yield key
+            separator = self._next_char()
+            if separator == "}":
+                return
+            if separator != ",":
+                raise ValueError(f"JSONの区切り文字が不正です: {separator!r}")
+
+    def iter_object_items(self) -> Iterator[Tuple[str, Any]]:
+        """オブジェクトの (キー, 値) を1件ずつデコードして返す"""
+        for key in self.iter_object_keys():
+            yield key, self.decode_value()
+
+    def decode_value(self) -> Any:
+        """現在位置の値を1つデコード"""
+        self._skip_whitespace()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # 数値はバッファ末尾で途切れている可能性があるため、後続文字を確認する
+            if end >= len(self.buffer) and not self.eof:
+                self._fill()
+                continue
+            self.pos = end
+            return value
+
+    def skip_value(self) -> None:
+        """現在位置の値を読み飛ばす（オブジェクトは要素単位で読み飛ばす）"""
+        if self._peek() == "{":
+            for _ in self.iter_object_items():
+                pass
+        else:
+            self.decode_value()
+
+    def _fill(self) -> bool:
+        """バッファに追加で読み込む（消費済み部分は破棄）"""
+        if self.eof:
+            return False
+        chunk = self.fp.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return True
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def _skip_whitespace(self) -> None:
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in self._WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self._fill():
+                return
+
+    def _peek(self) -> str:
+        self._skip_whitespace()
+        if self.pos >= len(self.buffer):
+            raise ValueError("JSONが途中で終了しています")
+        return self.buffer[self.pos]
+
+    def _next_char(self) -> str:
+        char = self._peek()
+        self.pos += 1
+        return char
+
+    def _expect(self, expected: str) -> None:
+        char = self._next_char()
+        if char != expected:
+            raise ValueError(f"JSONの構造が不正です: '{expected}' を期待しましたが '{char}' でした")
@@ -1,30 +1,60 @@
+import codecs
 import datetime
 import json
 import logging
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, Iterator, List, Optional, Any, TextIO, Tuple
 
 import requests
 
 from ..config import Config
 from ..models import MeasurementPoint, SensorSchema
+from .hedging import HedgingPolicy
+from .streaming_json import StreamingJSONReader
+from .typed_json import TypedSeriesDecoder
 
 
 class TimeSeriesRepository(ABC):
     """時系列データ取得の抽象インターフェース"""
 
+    # 1回の取得で対象とする期間
+    fetch_window = datetime.timedelta(days=1)
+
     @abstractmethod
     def fetch_time_series_data(self) -> Tuple[List[SensorSchema], Dict[str, List[Optional[MeasurementPoint]]]]:
         """時系列データとスキーマを取得する"""
         pass
 
 
-class APITimeSeriesRepository(TimeSeriesRepository):
+class StreamingTimeSeriesRepository(TimeSeriesRepository):
+    """逐次取得（省メモリモード）に対応した時系列データ取得（メモリガードで使用）"""
+
+    @abstractmethod
+    def fetch_time_series_stream(
+        self,
+    ) -> Tuple[List[SensorSchema], Iterator[Tuple[str, List[Optional[MeasurementPoint]]]]]:
+        """時系列データを1タイムスタンプずつ逐次取得する"""
+        pass
+
+
+class LatestMeasurementTimeSeriesRepository(TimeSeriesRepository):
+    """最新の計測時刻だけを取得できる時系列データ取得（新規データの事前確認で使用）"""
+
+    @abstractmethod
+    def fetch_latest_measurement_time(self) -> Optional[str]:
+        """取得期間内の最新の計測時刻を取得する（計測がない場合はNone）"""
+        pass
+
+
+class APITimeSeriesRepository(StreamingTimeSeriesRepository, LatestMeasurementTimeSeriesRepository):
     """外部API経由での時系列データ取得"""
 
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, hedging_policy: Optional[HedgingPolicy] = None):
         self.config = config
+        self.hedging_policy = hedging_policy
         self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+        # msgspec が利用可能な場合はスキーマ付きの高速デコードを使用
+        self.typed_decoder = TypedSeriesDecoder() if TypedSeriesDecoder.is_available() else None
 
     def fetch_time_series_data(self) -> Tuple[List[SensorSchema], Dict[str, List[Optional[MeasurementPoint]]]]:
         """APIから時系列データとスキーマを取得"""
@@ -36,8 +66,17 @@ class APITimeSeriesRepository(TimeSeriesRepository):
 
         try:
             start_time = datetime.datetime.now()
-            response = requests.get(url, headers=headers, timeout=30)
-            response.raise_for_status()
+
+            def send() -> requests.Response:
+                response = requests.get(url, headers=headers, timeout=30)
+                response.raise_for_status()
+                return response
+
+            if self.hedging_policy:
+                # 応答が遅い場合は同じリクエストを追加で送り、先に成功した方を採用
+                response = self.hedging_policy.execute(send, close=lambda r: r.close())
+            else:
+                response = send()
 
             elapsed_time = (datetime.datetime.now() - start_time).total_seconds()
             self.logger.info(
@@ -45,6 +84,9 @@ class APITimeSeriesRepository(TimeSeriesRepository):
             )
             self.logger.debug(f"レスポンスサイズ: {len(response.content)} bytes")
 
+            if self.typed_decoder:
+                return self._parse_response_typed(response.content)
+
             data = response.json()
             return self._parse_response(data)
 
@@ -58,13 +100,168 @@ class APITimeSeriesRepository(TimeSeriesRepository):
             self.logger.error(f"JSONデコードエラー - 位置 {e.pos}: {e.msg}")
             raise ValueError("APIレスポンスのJSON形式が正しくありません")
 
-    def _build_api_url(self) -> str:
-        """API URLを構築"""
+    def fetch_time_series_stream(
+        self,
+    ) -> Tuple[List[SensorSchema], Iterator[Tuple[str, List[Optional[MeasurementPoint]]]]]:
+        """
+        APIレスポンスを受信しながら、時系列データを1タイムスタンプずつデコードして返す
+        
+        レスポンスを一時ファイル（Cloud Functions ではメモリ上の /tmp）に保存せず、受信したチャンクから
+        直接デコードするため、使用メモリは受信バッファと1タイムスタンプ分に抑えられる。
+        CSVのヘッダーに必要なスキーマ（"series"）が値（"values"）より後にある場合は、1回目の受信で値を
+        読み飛ばしてスキーマを取得し、同じ期間をもう一度受信して値を読む（2回目のスキーマが異なる場合はエラー）。
+        
+        Returns:
+            スキーマ情報と (timestamp, measurements) のイテレータ
+        """
+        url = self._build_api_url()
+        headers = {"Authorization": f"Basic {self.config.authorization}"}
+
+        self.logger.info(f"API呼び出し開始（ストリーミングモード） - URL: {url}")
+
+        response = None
+        try:
+            response = self._open_stream(url, headers)
+            reader = StreamingJSONReader(self._open_text_stream(response))
+            keys = reader.iter_object_keys()
+            schemas = []
+            values_skipped = False
+            for key in keys:
+                if key == "series":
+                    schemas = self._to_schemas(reader.decode_value())
+                    break
+                values_skipped = values_skipped or key == "values"
+                reader.skip_value()
+            self.logger.info(f"センサースキーマを解析 - センサー数: {len(schemas)}")
+
+            if not values_skipped:
+                return schemas, self._iter_values(response, reader, keys)
+
+            # 値がスキーマより前にあるため、同じ期間をもう一度受信して値を読む
+            response.close()
+            self.logger.info("レスポンスの values が series より前にあるため、値を読むためにもう一度受信します")
+            response = self._open_stream(url, headers)
+            reader = StreamingJSONReader(self._open_text_stream(response))
+            return schemas, self._iter_values(
+                response, reader, reader.iter_object_keys(), expected_schemas=schemas
+            )
+
+        except requests.Timeout as e:
+            self._close_quietly(response)
+            self.logger.error(f"APIリクエストがタイムアウトしました: {str(e)}")
+            raise Exception(f"APIリクエストがタイムアウトしました: {str(e)}")
+        except requests.RequestException as e:
+            self._close_quietly(response)
+            self.logger.error(f"APIリクエストエラー - {type(e).__name__}: {str(e)}")
+            raise Exception(f"APIからのデータ取得に失敗しました: {str(e)}")
+        except ValueError as e:
+            self._close_quietly(response)
+            self.logger.error(f"JSONデコードエラー: {e}")
+            raise ValueError("APIレスポンスのJSON形式が正しくありません")
+
+    def fetch_latest_measurement_time(self) -> Optional[str]:
+        """
+        取得期間内の最新の計測を1件だけ取得し、その時刻を返す
+        
+        Returns:
+            最新の計測時刻（計測がない場合はNone）
+        """
+        date_from, date_to = self._get_date_range()
+        url = (
+            f"https://{self.config.tenant_domain}/measurement/measurements"
+            f"?source={self.config.source}&dateFrom={date_from}&dateTo={date_to}"
+            f"&pageSize=1&revert=true"
+        )
+        headers = {"Authorization": f"Basic {self.config.authorization}"}
+
+        self.logger.info(f"最新計測時刻の確認 - URL: {url}")
+        response = requests.get(url, headers=headers, timeout=10)
+        response.raise_for_status()
+
+        measurements = response.json().get("measurements", [])
+        if not measurements:
+            return None
+        return measurements[0].get("time")
+
+    def _open_stream(self, url: str, headers: Dict[str, str]) -> requests.Response:
+        """レスポンス本文を受信しながら読むリクエストを送信"""
+        start_time = datetime.datetime.now()
+        response = requests.get(url, headers=headers, timeout=30, stream=True)
+        try:
+            response.raise_for_status()
+        except requests.RequestException:
+            response.close()
+            raise
+        elapsed_time = (datetime.datetime.now() - start_time).total_seconds()
+        self.logger.info(
+            f"APIリクエスト成功 - ステータス: {response.status_code}, 応答時間: {elapsed_time:.2f}秒"
+        )
+        return response
+
+    @staticmethod
+    def _open_text_stream(response: requests.Response) -> TextIO:
+        """受信中のレスポンス本文をテキストとして読むストリーム（gzip などは展開する）"""
+        response.raw.decode_content = True
+        return codecs.getreader(response.encoding or "utf-8")(response.raw)
+
+    @staticmethod
+    def _to_schemas(series_data: List[Dict[str, Any]]) -> List[SensorSchema]:
+        return [
+            SensorSchema(name=series["name"], unit=series["unit"], type=series["type"])
+            for series in series_data
+        ]
+
+    def _iter_values(
+        self,
+        response: requests.Response,
+        reader: StreamingJSONReader,
+        keys: Iterator[str],
+        expected_schemas: Optional[List[SensorSchema]] = None,
+    ) -> Iterator[Tuple[str, List[Optional[MeasurementPoint]]]]:
+        """
+        受信中のレスポンスから時系列データを1タイムスタンプずつ読み込む（終了時にレスポンスを閉じる）
+        
+        Args:
+            response: 受信中のレスポンス
+            reader: レスポンス本文のリーダー
+            keys: トップレベルのキーのイテレータ（読み進めた位置から続ける）
+            expected_schemas: 再受信時に一致を確認するスキーマ（再受信でない場合はNone）
+        """
+        timestamp_count = 0
+        try:
+            for key in keys:
+                if key == "values":
+                    for timestamp, measurements in reader.iter_object_items():
+                        timestamp_count += 1
+                        yield timestamp, [
+                            MeasurementPoint.from_dict(measurement) for measurement in measurements
+                        ]
+                elif key == "series" and expected_schemas is not None:
+                    if self._to_schemas(reader.decode_value()) != expected_schemas:
+                        raise ValueError("再受信したレスポンスのセンサー構成が1回目と異なります")
+                else:
+                    reader.skip_value()
+            self.logger.info(f"時系列データ逐次解析完了 - タイムスタンプ数: {timestamp_count}")
+        finally:
+            response.close()
+
+    @staticmethod
+    def _close_quietly(response: Optional[requests.Response]) -> None:
+        if response is not None:
+            response.close()
+
+    def _get_date_range(self) -> Tuple[str, str]:
+        """取得期間（dateFrom, dateTo）を取得"""
         now = datetime.datetime.now()
         date_to = now.strftime("%Y-%m-%dT%H:%M:%S.000Z")
-        date_from = (now - datetime.timedelta(days=1)).strftime(
+        date_from = (now - self.fetch_window).strftime(
             "%Y-%m-%dT%H:%M:%S.000Z"
         )
+        return date_from, date_to
+
+    def _build_api_url(self) -> str:
+        """API URLを構築"""
+        date_from, date_to = self._get_date_range()
 
         url = (
             f"https://{self.config.tenant_domain}/measurement/measurements/series"
@@ -91,11 +288,7 @@ class APITimeSeriesRepository(TimeSeriesRepository):
             for series in series_data
         ]
 
-        self.logger.info(f"センサースキーマを解析 - センサー数: {len(schemas)}")
-        for i, schema in enumerate(schemas[:5]):  # 最初の5個だけログ出力
-            self.logger.debug(f"センサー{i+1}: {schema.name} ({schema.type})")
-        if len(schemas) > 5:
-            self.logger.debug(f"... 他 {len(schemas) - 5} 個のセンサー")
+        self._log_schemas(schemas)
 
         # 時系列データを取得
         values = data.get("values", {})
@@ -108,6 +301,36 @@ class APITimeSeriesRepository(TimeSeriesRepository):
             ]
             measurement_count += len([m for m in measurements if m is not None])
 
+        self._log_timeseries(timeseries_data, measurement_count)
+        return schemas, timeseries_data
+
+    def _parse_response_typed(
+        self, content: bytes
+    ) -> Tuple[List[SensorSchema], Dict[str, List[Optional[MeasurementPoint]]]]:
+        """APIレスポンスをスキーマ付きで1パスでデコード（msgspec使用）"""
+        self.logger.debug("APIレスポンスの解析を開始（スキーマ付きデコード）")
+
+        schemas, timeseries_data = self.typed_decoder.decode(content)
+        self._log_schemas(schemas)
+
+        measurement_count = sum(
+            len(measurements) - measurements.count(None) for measurements in timeseries_data.values()
+        )
+        self._log_timeseries(timeseries_data, measurement_count)
+        return schemas, timeseries_data
+
+    def _log_schemas(self, schemas: List[SensorSchema]) -> None:
+        """スキーマ情報をログ出力"""
+        self.logger.info(f"センサースキーマを解析 - センサー数: {len(schemas)}")
+        for i, schema in enumerate(schemas[:5]):  # 最初の5個だけログ出力
+            self.logger.debug(f"センサー{i+1}: {schema.name} ({schema.type})")
+        if len(schemas) > 5:
+            self.logger.debug(f"... 他 {len(schemas) - 5} 個のセンサー")
+
+    def _log_timeseries(
+        self, timeseries_data: Dict[str, List[Optional[MeasurementPoint]]], measurement_count: int
+    ) -> None:
+        """時系列データの解析結果をログ出力"""
         self.logger.info(
             f"時系列データ解析完了 - タイムスタンプ数: {len(timeseries_data)}, 計測値数: {measurement_count}"
         )
@@ -115,6 +338,4 @@ class APITimeSeriesRepository(TimeSeriesRepository):
         if timeseries_data:
             first_timestamp = list(timeseries_data.keys())[0]
             last_timestamp = list(timeseries_data.keys())[-1]
-            self.logger.debug(f"データ期間: {first_timestamp} ～ {last_timestamp}")
-
-        return schemas, timeseries_data
\ No newline at end of file
+            self.logger.debug(f"データ期間: {first_timestamp} ～ {last_timestamp}")
\ No newline at end of file
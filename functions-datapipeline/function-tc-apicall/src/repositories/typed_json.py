@@ -0,0 +1,68 @@
+from typing import Dict, List, Optional, Tuple, Union
+
+from ..models import SensorSchema
+
+try:
+    import msgspec
+except ImportError:  # 未インストール時は標準のJSONデコードを使用する
+    msgspec = None
+
+
+if msgspec is not None:
+
+    class TypedMeasurementPoint(msgspec.Struct, rename={"min_value": "min", "max_value": "max"}, gc=False):
+        """
+        計測データポイント（msgspec によるデコード用）
+
+        MeasurementPoint と同じ属性を持つ。int と float は区別して保持する
+        （CSV出力で 51 と 51.0 を書き分けるため）。
+        """
+
+        min_value: Union[int, float, None] = None
+        max_value: Union[int, float, None] = None
+
+    class SeriesResponse(msgspec.Struct):
+        """/measurement/measurements/series のレスポンス"""
+
+        series: List[SensorSchema] = []
+        values: Dict[str, List[Optional[TypedMeasurementPoint]]] = {}
+
+
+class TypedSeriesDecoder:
+    """
+    スキーマ付きでAPIレスポンスを1パスでデコードする
+
+    JSONの汎用 dict/list を経由せず、検証とデコードを同時に行って
+    SensorSchema と計測データポイントを直接生成する。
+    """
+
+    def __init__(self):
+        if msgspec is None:
+            raise ImportError("msgspec がインストールされていません")
+        self.decoder = msgspec.json.Decoder(SeriesResponse)
+
+    @staticmethod
+    def is_available() -> bool:
+        """msgspec が利用可能か"""
+        return msgspec is not None
+
+    def decode(self, content: bytes) -> Tuple[List[SensorSchema], Dict[str, List[Optional["TypedMeasurementPoint"]]]]:
+        """
+        レスポンス本文をデコード
+
+        Args:
+            content: レスポンス本文（JSON）
+
+        Returns:
+            スキーマ情報と時系列データ（timestamp -> measurements）
+
+        Raises:
+            ValueError: JSONの構文や型がスキーマと一致しない場合（エラー箇所のパスを含む）
+        """
+        try:
+            response = self.decoder.decode(content)
+        except msgspec.ValidationError as e:
+            raise ValueError(f"APIレスポンスの形式が正しくありません: {e}") from e
+        except msgspec.DecodeError as e:
+            raise ValueError(f"APIレスポンスのJSON形式が正しくありません: {e}") from e
+        return response.series, response.values
@@ -0,0 +1,422 @@
+import io
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..models import SensorSchema, MeasurementPoint
+from ..repositories.storage_repository import ObjectStorageRepository
+from .sidecar_service import SidecarService, nan_to_none
+from .timeseries_arrays import to_timestamp_ms, to_value_matrices
+
+
+# 正規分布で標準偏差 = 平均絶対偏差 × sqrt(π/2)
+MAD_TO_STD = 1.2533
+# スコア計算時のスケールの下限（一定値のセンサーで0除算しないため）
+MIN_SCALE = 1e-6
+
+
+class AnomalyScorer:
+    """
+    センサーごとの逐次的な異常スコア（EWMA平均・分散とロバストzスコア）
+
+    1点あたり O(1) の状態（平均・分散・平均絶対偏差・件数）のみを保持する。スコアは更新前の状態で計算し、
+    閾値を超えた値は平均 ± 閾値 × スケールに丸めてから状態に反映する（外れ値で状態が崩れないようにする）。
+    状態の更新は連続する行をまとめ、減衰重みの閉形式で行・センサーの両方向にベクトル化して行う。
+    丸めが必要な値はそのセンサーだけを再計算するため、結果は1行ずつ更新した場合と同じになる。
+    前回までに反映した最新時刻以前の行は、取得期間の重なりとみなして読み飛ばす。
+    """
+
+    # 一括計算する行数の上限
+    MAX_SEGMENT_ROWS = 128
+    # 減衰係数の逆数の累乗の上限（10 の指数。float64 の範囲に収める）
+    MAX_SCALE_EXPONENT = 200
+
+    def __init__(
+        self,
+        sensor_names: List[str],
+        alpha: float = 0.05,
+        threshold: float = 4.0,
+        warmup: int = 30,
+        max_anomalies: int = 1000,
+    ):
+        sensor_count = len(sensor_names)
+        self.sensor_names = list(sensor_names)
+        self.alpha = alpha
+        self.threshold = threshold
+        self.warmup = warmup
+        self.max_anomalies = max_anomalies
+        self.means = np.full(sensor_count, np.nan)
+        self.variances = np.zeros(sensor_count)
+        self.deviations = np.zeros(sensor_count)
+        self.counts = np.zeros(sensor_count, dtype=np.int64)
+        self.last_timestamp_ms: Optional[int] = None
+        # 今回の実行分の結果
+        self.scored_rows = 0
+        self.skipped_rows = 0
+        self.last_scores = np.full(sensor_count, np.nan)
+        self.max_abs_scores = np.full(sensor_count, np.nan)
+        self.anomaly_counts = np.zeros(sensor_count, dtype=np.int64)
+        self.anomalies: List[Dict] = []
+
+    def update(self, block: List[Tuple[str, List[Optional[MeasurementPoint]]]]) -> None:
+        """
+        行ブロックをスコアリングして状態に反映
+
+        Args:
+            block: (timestamp, measurements) のリスト
+        """
+        if not block or not self.sensor_names:
+            return
+        timestamps, measurement_lists = zip(*block)
+        timestamps_ms = to_timestamp_ms(timestamps)
+        min_values, max_values = to_value_matrices(len(self.sensor_names), measurement_lists)
+        # 最小値と最大値の中点（片方のみの場合はその値）をセンサー値とする
+        values = np.where(
+            np.isnan(min_values), max_values,
+            np.where(np.isnan(max_values), min_values, (min_values + max_values) / 2),
+        )
+
+        order = np.argsort(timestamps_ms, kind="stable")
+        if self.last_timestamp_ms is not None:
+            order = order[timestamps_ms[order] > self.last_timestamp_ms]
+        self.skipped_rows += len(block) - len(order)
+
+        ordered_timestamps = [timestamps[i] for i in order.tolist()]
+        ordered_values = values[order]
+        segment_rows = self._max_segment_rows()
+        for start in range(0, len(order), segment_rows):
+            self._update_segment(
+                ordered_timestamps[start:start + segment_rows], ordered_values[start:start + segment_rows]
+            )
+        if len(order):
+            self.last_timestamp_ms = int(timestamps_ms[order[-1]])
+        self.scored_rows += len(order)
+
+    def _max_segment_rows(self) -> int:
+        """一括計算する行数（減衰係数の逆数の累乗がオーバーフローしない範囲）"""
+        decay = 1 - self.alpha
+        if decay <= 0:
+            return 1
+        return int(max(1, min(self.MAX_SEGMENT_ROWS, self.MAX_SCALE_EXPONENT / -np.log10(decay))))
+
+    def _update_segment(self, timestamps: List[str], values: np.ndarray) -> None:
+        """
+        連続する行をまとめてスコアリングし、状態を更新
+
+        EWMA の平均・分散・平均絶対偏差は減衰重みの閉形式（累積和）で全行分を一度に求める。
+        閾値を超えた値の丸めはそれ以降の状態を変えるため、丸めが必要な最初の行の入力を丸めた値に
+        置き換え、そのセンサーの列だけを再計算する（センサーごとに最大で閾値超えの件数分）。
+
+        Args:
+            timestamps: 行のタイムスタンプ（時刻順）
+            values: センサー値（行数 × センサー数、欠損はNaN）
+        """
+        if len(timestamps) == 1:
+            self._update_row(timestamps[0], values[0])
+            return
+
+        row_count, sensor_count = values.shape
+        observed = ~np.isnan(values)
+        counts_before = self.counts + np.cumsum(observed, axis=0) - observed
+        first = observed & (counts_before == 0)
+        update = observed & ~first
+        warm = observed & (counts_before >= self.warmup)
+        # 初回の値を平均の初期値とする（それより前の行の平均は未定義）
+        new_sensors = first.any(axis=0)
+        initial_means = np.where(new_sensors, values[first.argmax(axis=0), np.arange(sensor_count)], self.means)
+        undefined_means = np.cumsum(first, axis=0) + ~new_sensors == 0
+
+        inputs = values.copy()
+        means = np.empty_like(values)
+        variances = np.empty_like(values)
+        deviations = np.empty_like(values)
+        means_before = np.empty_like(values)
+        scale = np.empty_like(values)
+        scores = np.empty_like(values)
+        checked_rows = np.zeros(sensor_count, dtype=np.int64)
+        decay_powers = (1 - self.alpha) ** np.arange(row_count + 1)
+        # 初回は全センサーの全行を計算し、2回目以降は丸めたセンサーの列を、丸めた最初の行から再計算する
+        columns = slice(None)
+        start = 0
+        while True:
+            if start == 0:
+                previous_means = self.means[columns]
+                start_means = initial_means[columns]
+                start_variances = self.variances[columns]
+                start_deviations = self.deviations[columns]
+            else:
+                previous_means = means[start - 1, columns]
+                start_means = np.where(undefined_means[start - 1, columns], initial_means[columns], previous_means)
+                start_variances = variances[start - 1, columns]
+                start_deviations = deviations[start - 1, columns]
+            block = (slice(start, None), columns)
+            block_update = update[block]
+            block_decay = decay_powers[np.cumsum(block_update, axis=0)]
+
+            block_means = self._ewma(start_means, inputs[block], block_update, block_decay, 1.0)
+            block_means[undefined_means[block]] = np.nan
+            block_means_before = np.vstack([previous_means, block_means[:-1]])
+            difference = np.where(block_update, inputs[block] - block_means_before, 0.0)
+            block_deviations = self._ewma(start_deviations, np.abs(difference), block_update, block_decay, 1.0)
+
+            means[block] = block_means
+            means_before[block] = block_means_before
+            variances[block] = self._ewma(
+                start_variances, difference ** 2, block_update, block_decay, 1 - self.alpha
+            )
+            deviations[block] = block_deviations
+            scale[block] = np.maximum(
+                np.vstack([start_deviations, block_deviations[:-1]]) * MAD_TO_STD, MIN_SCALE
+            )
+            scores[block] = np.where(warm[block], (values[block] - block_means_before) / scale[block], np.nan)
+
+            # 未確認の行で閾値を超えた最初の値を丸め、そのセンサーを再計算する
+            with np.errstate(invalid="ignore"):
+                unclipped = (
+                    warm[block]
+                    & (np.abs(scores[block]) > self.threshold)
+                    & (np.arange(start, row_count)[:, np.newaxis] >= checked_rows[columns])
+                )
+            has_unclipped = unclipped.any(axis=0)
+            if not has_unclipped.any():
+                break
+            columns = np.arange(sensor_count)[columns][has_unclipped]
+            clip_rows = start + unclipped.argmax(axis=0)[has_unclipped]
+            bound = self.threshold * scale[clip_rows, columns]
+            center = means_before[clip_rows, columns]
+            inputs[clip_rows, columns] = np.clip(values[clip_rows, columns], center - bound, center + bound)
+            checked_rows[columns] = clip_rows + 1
+            start = int(clip_rows.min())
+
+        with np.errstate(invalid="ignore"):
+            anomalous = warm & (np.abs(scores) > self.threshold)
+        if anomalous.any():
+            self.anomaly_counts += anomalous.sum(axis=0)
+            for i, k in zip(*np.nonzero(anomalous)):
+                if len(self.anomalies) >= self.max_anomalies:
+                    break
+                self.anomalies.append({
+                    "timestamp": timestamps[i],
+                    "sensor": self.sensor_names[k],
+                    "value": float(values[i, k]),
+                    "score": round(float(scores[i, k]), 3),
+                })
+
+        last_warm = (row_count - 1) - warm[::-1].argmax(axis=0)
+        self.last_scores = np.where(
+            warm.any(axis=0), scores[last_warm, np.arange(sensor_count)], self.last_scores
+        )
+        self.max_abs_scores = np.fmax(self.max_abs_scores, np.fmax.reduce(np.abs(scores), axis=0))
+        self.means = means[-1]
+        self.variances = variances[-1]
+        self.deviations = deviations[-1]
+        self.counts = counts_before[-1] + observed[-1]
+
+    def _ewma(
+        self, initial: np.ndarray, inputs: np.ndarray, update: np.ndarray, decay: np.ndarray, factor: float
+    ) -> np.ndarray:
+        """
+        s ← (1 - α)·s + factor·α·x を更新対象の行でのみ適用した、各行の更新後の値を閉形式で求める
+
+        k 回目の更新後の値は (1 - α)^k·s0 + Σ factor·α·(1 - α)^(k - j)·x_j となるため、
+        (1 - α)^(-j) で重み付けした入力の累積和から一度に計算できる。
+
+        Args:
+            initial: 初期値（センサー数）
+            inputs: 入力（行数 × センサー数）
+            update: 更新対象の行（行数 × センサー数）
+            decay: 各行までの更新回数 k に対する (1 - α)^k（行数 × センサー数）
+            factor: 入力に掛ける係数
+
+        Returns:
+            各行の更新後の値（行数 × センサー数）
+        """
+        weighted = np.where(update, factor * self.alpha * inputs / decay, 0.0)
+        return decay * (initial + np.cumsum(weighted, axis=0))
+
+    def _update_row(self, timestamp: str, values: np.ndarray) -> None:
+        """1行分（全センサー）をスコアリングして状態を更新"""
+        observed = ~np.isnan(values)
+        first = observed & (self.counts == 0)
+        warm = observed & (self.counts >= self.warmup)
+
+        scale = np.maximum(self.deviations * MAD_TO_STD, MIN_SCALE)
+        scores = np.where(warm, (values - self.means) / scale, np.nan)
+        self.last_scores = np.where(warm, scores, self.last_scores)
+        self.max_abs_scores = np.fmax(self.max_abs_scores, np.abs(scores))
+
+        anomalous = warm & (np.abs(scores) > self.threshold)
+        if anomalous.any():
+            self.anomaly_counts += anomalous
+            for k in np.flatnonzero(anomalous).tolist():
+                if len(self.anomalies) < self.max_anomalies:
+                    self.anomalies.append({
+                        "timestamp": timestamp,
+                        "sensor": self.sensor_names[k],
+                        "value": float(values[k]),
+                        "score": round(float(scores[k]), 3),
+                    })
+
+        # 外れ値は閾値の位置に丸めて反映
+        bound = self.threshold * scale
+        clipped = np.where(warm, np.clip(values, self.means - bound, self.means + bound), values)
+        update = observed & ~first
+        difference = np.where(update, clipped - self.means, 0.0)
+        self.means = np.where(first, values, self.means + self.alpha * difference)
+        self.variances = np.where(
+            update, (1 - self.alpha) * (self.variances + self.alpha * difference ** 2), self.variances
+        )
+        self.deviations = np.where(
+            update, (1 - self.alpha) * self.deviations + self.alpha * np.abs(difference), self.deviations
+        )
+        self.counts += observed
+
+    def to_dict(self) -> Dict:
+        """JSONに変換可能な辞書を作成"""
+        sensors = []
+        for k, name in enumerate(self.sensor_names):
+            sensors.append({
+                "name": name,
+                "count": int(self.counts[k]),
+                "mean": nan_to_none(self.means[k]),
+                "std": nan_to_none(np.sqrt(self.variances[k])) if self.counts[k] else None,
+                "last_score": _round_score(self.last_scores[k]),
+                "max_abs_score": _round_score(self.max_abs_scores[k]),
+                "anomaly_count": int(self.anomaly_counts[k]),
+            })
+        return {
+            "alpha": self.alpha,
+            "threshold": self.threshold,
+            "scored_rows": self.scored_rows,
+            "skipped_rows": self.skipped_rows,
+            "anomaly_count": int(self.anomaly_counts.sum()),
+            "anomalies": self.anomalies,
+            "sensors": sensors,
+        }
+
+    def save_state(self) -> bytes:
+        """状態を npz 形式のバイト列に変換"""
+        buffer = io.BytesIO()
+        np.savez_compressed(
+            buffer,
+            sensor_names=np.array(self.sensor_names, dtype=str),
+            means=self.means,
+            variances=self.variances,
+            deviations=self.deviations,
+            counts=self.counts,
+            last_timestamp_ms=np.array(
+                -1 if self.last_timestamp_ms is None else self.last_timestamp_ms, dtype=np.int64
+            ),
+        )
+        return buffer.getvalue()
+
+    def load_state(self, data: bytes) -> None:
+        """npz 形式の状態をセンサー名で対応付けて読み込む（新しいセンサーは初期状態）"""
+        with np.load(io.BytesIO(data), allow_pickle=False) as state:
+            old_columns = {name: k for k, name in enumerate(state["sensor_names"].tolist())}
+            for k, name in enumerate(self.sensor_names):
+                if name in old_columns:
+                    j = old_columns[name]
+                    self.means[k] = state["means"][j]
+                    self.variances[k] = state["variances"][j]
+                    self.deviations[k] = state["deviations"][j]
+                    self.counts[k] = state["counts"][j]
+            last_timestamp_ms = int(state["last_timestamp_ms"])
+        self.last_timestamp_ms = None if last_timestamp_ms < 0 else last_timestamp_ms
+
+
+class AnomalyScoringService(SidecarService):
+    """
+    取得時に異常スコアを計算し、状態を実行間で引き継ぐサービス
+
+    状態は timeseries_state/{source}/anomaly_state.npz に保存し、
+    結果はCSVの隣のサイドカーJSON（{name}.anomalies.json）とレスポンスに出力する。
+    """
+
+    SIDECAR_SUFFIX = ".anomalies.json"
+    SIDECAR_LABEL = "異常スコア"
+    # 要約に含める異常の上限
+    DIGEST_ANOMALY_LIMIT = 10
+
+    def __init__(
+        self,
+        storage_repository: ObjectStorageRepository,
+        source: str,
+        alpha: float = 0.05,
+        threshold: float = 4.0,
+        warmup: int = 30,
+        prefix: str = "timeseries_state",
+    ):
+        self.storage_repository = storage_repository
+        self.source = source
+        self.alpha = alpha
+        self.threshold = threshold
+        self.warmup = warmup
+        self.prefix = prefix
+        self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+
+    def get_state_path(self) -> str:
+        """状態のオブジェクトパスを取得"""
+        return f"{self.prefix}/{self.source}/anomaly_state.npz"
+
+    def load(self, schemas: List[SensorSchema]) -> AnomalyScorer:
+        """
+        保存済みの状態を読み込んだスコアラーを作成
+
+        Args:
+            schemas: センサーのスキーマ情報
+
+        Returns:
+            スコアラー（状態がない場合は初期状態）
+        """
+        scorer = AnomalyScorer(
+            [schema.name for schema in schemas], self.alpha, self.threshold, self.warmup
+        )
+        data = self.storage_repository.download_bytes(self.get_state_path())
+        if data is not None:
+            scorer.load_state(data)
+        return scorer
+
+    def score(
+        self,
+        schemas: List[SensorSchema],
+        timeseries_data: Dict[str, List[Optional[MeasurementPoint]]]
+    ) -> AnomalyScorer:
+        """
+        全データをスコアリング
+
+        Args:
+            schemas: センサーのスキーマ情報
+            timeseries_data: 時系列データ（timestamp -> measurements）
+
+        Returns:
+            スコアリング後のスコアラー
+        """
+        scorer = self.load(schemas)
+        scorer.update(list(timeseries_data.items()))
+        return scorer
+
+    def save(self, scorer: AnomalyScorer) -> None:
+        """スコアラーの状態を保存"""
+        data = scorer.save_state()
+        self.storage_repository.upload_bytes(data, self.get_state_path(), content_type="application/octet-stream")
+        self.logger.info(f"異常スコアの状態を保存しました: {self.get_state_path()} ({len(data)} bytes)")
+
+    def build_digest(self, scorer: AnomalyScorer) -> Dict:
+        """レスポンス用の要約を作成（スコアの絶対値が大きい順）"""
+        top_anomalies = sorted(scorer.anomalies, key=lambda anomaly: -abs(anomaly["score"]))
+        anomaly_count = int(scorer.anomaly_counts.sum())
+        if anomaly_count:
+            self.logger.warning(f"異常値を検出しました: {anomaly_count}件")
+        return {
+            "scored_rows": scorer.scored_rows,
+            "skipped_rows": scorer.skipped_rows,
+            "anomaly_count": anomaly_count,
+            "sensors_with_anomalies": int((scorer.anomaly_counts > 0).sum()),
+            "top_anomalies": top_anomalies[: self.DIGEST_ANOMALY_LIMIT],
+        }
+
+
+def _round_score(value: float) -> Optional[float]:
+    return None if np.isnan(value) else round(float(value), 3)
@@ -0,0 +1,85 @@
+import logging
+from typing import Dict, List, Optional
+
+from ..models import SensorSchema, MeasurementPoint
+from ..repositories.archive_format import ArchiveData, GorillaArchiveFormat
+from ..repositories.storage_repository import ObjectStorageRepository
+from .timeseries_arrays import to_timestamp_ms, to_value_matrices
+
+
+class ArchiveService:
+    """時系列データを長期保存用の圧縮アーカイブ形式（.gts）で保存・読み出しするサービス"""
+
+    def __init__(
+        self,
+        storage_repository: ObjectStorageRepository,
+        source: str,
+        archive_format: Optional[GorillaArchiveFormat] = None,
+        prefix: str = "timeseries_archive",
+    ):
+        self.storage_repository = storage_repository
+        self.source = source
+        self.archive_format = archive_format or GorillaArchiveFormat()
+        self.prefix = prefix
+        self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+
+    def get_archive_path(self, timestamp: str) -> str:
+        """アーカイブのオブジェクトパスを取得"""
+        return f"{self.prefix}/{self.source}/{timestamp}.gts"
+
+    def write(
+        self,
+        schemas: List[SensorSchema],
+        timeseries_data: Dict[str, List[Optional[MeasurementPoint]]],
+        timestamp: str,
+    ) -> Dict:
+        """
+        時系列データをアーカイブとして保存
+
+        Args:
+            schemas: センサーのスキーマ情報
+            timeseries_data: 時系列データ（timestamp -> measurements）
+            timestamp: 出力のタイムスタンプ（YYYYmmdd_HHMMSS）
+
+        Returns:
+            保存結果の辞書
+        """
+        archive_path = self.get_archive_path(timestamp)
+        min_values, max_values = to_value_matrices(len(schemas), timeseries_data.values())
+        data = self.archive_format.encode(
+            [schema.name for schema in schemas],
+            to_timestamp_ms(timeseries_data.keys()),
+            min_values,
+            max_values,
+        )
+        file_url = self.storage_repository.upload_bytes(data, archive_path)
+        self.logger.info(f"アーカイブを保存しました: {archive_path} ({len(data)} bytes)")
+        return {
+            "success": True,
+            "archive_path": archive_path,
+            "file_url": file_url,
+            "file_size_bytes": len(data),
+        }
+
+    def read(
+        self,
+        archive_path: str,
+        start_ms: Optional[int] = None,
+        end_ms: Optional[int] = None,
+    ) -> Optional[ArchiveData]:
+        """
+        アーカイブから指定時刻範囲のデータを読み出す（範囲と重なるブロックのみ取得）
+
+        Args:
+            archive_path: アーカイブのオブジェクトパス
+            start_ms: 開始時刻（epoch ms, 省略時は先頭から）
+            end_ms: 終了時刻（epoch ms, 省略時は末尾まで）
+
+        Returns:
+            復号したデータ（アーカイブが存在しない場合はNone）
+        """
+        return self.archive_format.decode(
+            lambda offset, length: self.storage_repository.download_range(archive_path, offset, length),
+            start_ms,
+            end_ms,
+        )
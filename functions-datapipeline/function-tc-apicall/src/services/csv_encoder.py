@@ -0,0 +1,121 @@
+import csv
+import itertools
+import logging
+from typing import Iterable, List, Optional, TextIO, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..models import MeasurementPoint
+from .timeseries_arrays import CellBlock, to_cell_block
+
+
+# csv.writer（QUOTE_MINIMAL）が引用符で囲む文字
+_QUOTE_TRIGGERS = (",", '"', "\r", "\n")
+
+
+class BulkCSVEncoder:
+    """
+    行ブロック単位でCSVのデータ行を文字列化するエンコーダ
+
+    計測値を数値の行列（timeseries_arrays.CellBlock）に変換し、ブロック内の
+    ユニークな値だけを文字列化してから、トークン表の添字参照で全セルを組み立てる。
+    出力は csv.writer（既定のダイアレクト）と同一になる。数値から元の文字列表現を
+    復元できないブロックは csv.writer で書き込む。
+    """
+
+    DEFAULT_BLOCK_ROWS = 1024
+
+    def __init__(self, block_rows: int = DEFAULT_BLOCK_ROWS):
+        self.block_rows = block_rows
+        self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+
+    def write_rows(
+        self,
+        f: TextIO,
+        sensor_count: int,
+        rows: Iterable[Tuple[str, List[Optional[MeasurementPoint]]]]
+    ) -> int:
+        """
+        データ行をまとめて書き込む
+
+        Args:
+            f: 書き込み先のテキストストリーム（newline=""で開いたもの）
+            sensor_count: センサー数
+            rows: (timestamp, measurements) の行イテレータ
+
+        Returns:
+            書き込んだ行数
+        """
+        row_count = 0
+        iterator = iter(rows)
+        while True:
+            chunk = list(itertools.islice(iterator, self.block_rows))
+            if not chunk:
+                break
+            timestamps, measurement_lists = zip(*chunk)
+            block = to_cell_block(list(map(str, timestamps)), measurement_lists, sensor_count)
+            if block.exact:
+                f.write(self.encode_block(block))
+            else:
+                self.logger.debug("数値に変換できない計測値を含むため、csv.writer で書き込みます")
+                self._write_generic(f, chunk)
+            row_count += len(chunk)
+        return row_count
+
+    def encode_block(self, block: CellBlock) -> str:
+        """
+        セルの行列をCSVのデータ行に変換
+
+        Args:
+            block: セルの行列（exact であること）
+
+        Returns:
+            CSVのデータ行（行末は\\r\\n）
+        """
+        row_count, cell_count = block.values.shape
+        if row_count == 0:
+            return ""
+        values = block.values.ravel()
+        integers = block.integers.ravel()
+        present = ~np.isnan(values)
+
+        # トークン表: [空文字, タイムスタンプ..., ユニークな値の文字列...]
+        tokens: List[str] = [""]
+        tokens.extend(map(self._format_text, block.timestamps))
+        codes = np.zeros(len(values), dtype=np.int64)
+        floats = present & ~integers
+        if floats.any():
+            float_codes, uniques = pd.factorize(values[floats].view(np.int64))
+            codes[floats] = float_codes + len(tokens)
+            tokens.extend(map(repr, uniques.view(np.float64).tolist()))
+        if integers.any():
+            int_codes, uniques = pd.factorize(values[integers].astype(np.int64))
+            codes[integers] = int_codes + len(tokens)
+            tokens.extend(map(str, uniques.tolist()))
+
+        grid = np.empty((row_count, 1 + cell_count), dtype=np.int64)
+        grid[:, 0] = np.arange(1, 1 + row_count)
+        grid[:, 1:] = codes.reshape(row_count, cell_count)
+        token_array = np.array(tokens, dtype=object)
+        return "\r\n".join(map(",".join, token_array[grid].tolist())) + "\r\n"
+
+    @staticmethod
+    def _format_text(value: str) -> str:
+        """csv.writer（QUOTE_MINIMAL）と同じ規則で文字列フィールドを整形"""
+        if any(trigger in value for trigger in _QUOTE_TRIGGERS):
+            return '"' + value.replace('"', '""') + '"'
+        return value
+
+    @staticmethod
+    def _write_generic(f: TextIO, chunk: List[Tuple[str, List[Optional[MeasurementPoint]]]]):
+        """csv.writer で1行ずつ書き込む"""
+        writer = csv.writer(f)
+        for timestamp, measurements in chunk:
+            row = [timestamp]
+            for measurement in measurements:
+                if measurement:
+                    row.extend([measurement.min_value, measurement.max_value])
+                else:
+                    row.extend([None, None])
+            writer.writerow(row)
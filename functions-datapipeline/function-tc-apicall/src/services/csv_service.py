@@ -2,7 +2,7 @@ import csv
 import logging
 import os
 import tempfile
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional, TextIO, Tuple
 
 from ..models import SensorSchema, MeasurementPoint
 
@@ -10,7 +10,25 @@ from ..models import SensorSchema, MeasurementPoint
 class CSVService:
     """CSV処理を担当するサービス"""
 
-    def __init__(self):
+    ENCODER_STANDARD = "standard"
+    ENCODER_BULK = "bulk"
+
+    def __init__(self, encoder: str = ENCODER_STANDARD):
+        """
+        CSVServiceを初期化
+        
+        Args:
+            encoder: CSVエンコーダ（"standard": csv.writer で1行ずつ書き込み、
+                "bulk": 列ブロック単位の高速エンコーダ。出力は同一）
+        """
+        if encoder not in (self.ENCODER_STANDARD, self.ENCODER_BULK):
+            raise ValueError(f"不明なCSVエンコーダです: {encoder}")
+        self.encoder = encoder
+        self.bulk_encoder = None
+        if encoder == self.ENCODER_BULK:
+            # numpy/pandas に依存するため、使用時のみインポートする
+            from .csv_encoder import BulkCSVEncoder
+            self.bulk_encoder = BulkCSVEncoder()
         self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
 
     def create_csv_from_timeseries(
@@ -28,32 +46,31 @@ class CSVService:
         Returns:
             作成されたCSVファイルのパス
         """
-        self.logger.info("CSV作成開始")
+        return self.create_csv_from_rows(schemas, timeseries_data.items())
+
+    def create_csv_from_rows(
+        self, 
+        schemas: List[SensorSchema], 
+        rows: Iterable[Tuple[str, List[Optional[MeasurementPoint]]]]
+    ) -> str:
+        """
+        (timestamp, measurements) の行イテレータからCSVファイルを作成
+        
+        行を1件ずつ書き込むため、イテレータを渡せば全データをメモリに保持せずに済む。
         
+        Args:
+            schemas: センサーのスキーマ情報
+            rows: (timestamp, measurements) のイテレータ
+            
+        Returns:
+            作成されたCSVファイルのパス
+        """
         # 一時ファイルを作成
         temp_file = tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False)
         temp_file_path = temp_file.name
         
         try:
-            # CSVヘッダーを準備
-            headers = ['timestamp']
-            for schema in schemas:
-                headers.extend([f"{schema.name}_min", f"{schema.name}_max"])
-            
-            # CSVライターを初期化
-            writer = csv.writer(temp_file)
-            writer.writerow(headers)
-            
-            # データを行ごとに書き込み
-            for timestamp, measurements in timeseries_data.items():
-                row = [timestamp]
-                for measurement in measurements:
-                    if measurement:
-                        row.extend([measurement.min_value, measurement.max_value])
-                    else:
-                        row.extend([None, None])
-                writer.writerow(row)
-            
+            self.write_csv(temp_file, schemas, rows)
             temp_file.close()
             self.logger.info(f"CSV作成完了: {temp_file_path}")
             return temp_file_path
@@ -65,6 +82,45 @@ class CSVService:
                 os.unlink(temp_file_path)
             raise e
 
+    def write_csv(
+        self, 
+        f: TextIO, 
+        schemas: List[SensorSchema], 
+        rows: Iterable[Tuple[str, List[Optional[MeasurementPoint]]]]
+    ) -> None:
+        """
+        (timestamp, measurements) の行イテレータをCSVとして書き込む
+        
+        Args:
+            f: 書き込み先のテキストストリーム
+            schemas: センサーのスキーマ情報
+            rows: (timestamp, measurements) のイテレータ
+        """
+        self.logger.info(f"CSV作成開始（エンコーダ: {self.encoder}）")
+        
+        # CSVヘッダーを準備
+        headers = ['timestamp']
+        for schema in schemas:
+            headers.extend([f"{schema.name}_min", f"{schema.name}_max"])
+        
+        # CSVライターを初期化
+        writer = csv.writer(f)
+        writer.writerow(headers)
+        
+        if self.bulk_encoder:
+            # 列ブロック単位でまとめて書き込み
+            self.bulk_encoder.write_rows(f, len(schemas), rows)
+        else:
+            # データを行ごとに書き込み
+            for timestamp, measurements in rows:
+                row = [timestamp]
+                for measurement in measurements:
+                    if measurement:
+                        row.extend([measurement.min_value, measurement.max_value])
+                    else:
+                        row.extend([None, None])
+                writer.writerow(row)
+
     def get_file_size(self, file_path: str) -> int:
         """
         ファイルサイズを取得
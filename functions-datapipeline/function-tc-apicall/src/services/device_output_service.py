@@ -0,0 +1,160 @@
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+from typing import Dict, List, Optional, Tuple
+
+from ..models import SensorSchema, MeasurementPoint
+from ..repositories.storage_repository import ObjectStorageRepository
+from .csv_service import CSVService
+
+
+class DeviceOutputService:
+    """
+    センサー名のデバイスプレフィックス（"{device}:{sensor}"）ごとにCSVを分割して保存するサービス
+
+    timeseries_devices/{timestamp}/{device}.csv をデバイス単位で並列に作成・アップロードし、
+    デバイスとオブジェクトの対応を timeseries_devices/{timestamp}/index.json に保存する。
+    ファイル名のデバイスIDはURLエンコードし、先頭の "_" もエンコードするため、
+    異なるデバイスや、プレフィックスを持たないセンサーの出力先と同じ名前になることはない。
+    """
+
+    # プレフィックスを持たないセンサーの出力先（デバイスIDのファイル名は "_" で始まらないため衝突しない）
+    UNGROUPED_DEVICE = "_ungrouped"
+
+    def __init__(
+        self,
+        storage_repository: ObjectStorageRepository,
+        csv_service: Optional[CSVService] = None,
+        max_workers: int = 8,
+        prefix: str = "timeseries_devices",
+    ):
+        self.storage_repository = storage_repository
+        self.csv_service = csv_service or CSVService()
+        self.max_workers = max_workers
+        self.prefix = prefix
+        self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+
+    def write(
+        self,
+        schemas: List[SensorSchema],
+        timeseries_data: Dict[str, List[Optional[MeasurementPoint]]],
+        timestamp: str,
+    ) -> Dict:
+        """
+        デバイスごとのCSVとインデックスを保存
+
+        Args:
+            schemas: センサーのスキーマ情報
+            timeseries_data: 時系列データ（timestamp -> measurements）
+            timestamp: 出力のタイムスタンプ（YYYYmmdd_HHMMSS）
+
+        Returns:
+            保存結果の辞書
+        """
+        devices = self.group_columns(schemas)
+        self.logger.info(f"デバイス別出力開始 - デバイス数: {len(devices)}, 並列数: {self.max_workers}")
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                device: executor.submit(
+                    self._write_device, device, schemas, timeseries_data, columns, timestamp
+                )
+                for device, columns in devices.items()
+            }
+            entries = {device: future.result() for device, future in futures.items()}
+
+        index_path = f"{self.prefix}/{timestamp}/index.json"
+        index = {
+            "timestamp": timestamp,
+            "timestamp_count": len(timeseries_data),
+            "devices": {device: entry for device, entry in entries.items() if device is not None},
+        }
+        if None in entries:
+            index["ungrouped"] = entries[None]
+        index_url = self.storage_repository.upload_bytes(
+            json.dumps(index, ensure_ascii=False, separators=(",", ":")).encode("utf-8"),
+            index_path,
+            content_type="application/json",
+        )
+        self.logger.info(f"デバイス別出力完了: {index_path}")
+
+        return {
+            "success": True,
+            "index_path": index_path,
+            "index_url": index_url,
+            "device_count": len(entries),
+            "total_size_bytes": sum(entry["size_bytes"] for entry in entries.values()),
+        }
+
+    def group_columns(self, schemas: List[SensorSchema]) -> Dict[Optional[str], List[int]]:
+        """センサーの列番号をデバイスごとにまとめる（出現順を維持。プレフィックスを持たないセンサーはNone）"""
+        devices: Dict[Optional[str], List[int]] = {}
+        for k, schema in enumerate(schemas):
+            devices.setdefault(self.get_device_id(schema.name), []).append(k)
+        return devices
+
+    def get_device_id(self, sensor_name: str) -> Optional[str]:
+        """センサー名からデバイスIDを取得（プレフィックスを持たない場合はNone）"""
+        device, separator, _ = sensor_name.partition(":")
+        if not separator or not device:
+            return None
+        return device
+
+    def get_device_path(self, timestamp: str, device: Optional[str]) -> str:
+        """デバイスのCSVのオブジェクトパスを取得（Noneはプレフィックスを持たないセンサーの出力先）"""
+        if device is None:
+            file_name = self.UNGROUPED_DEVICE
+        else:
+            # "/" なども含めてエンコードし、"_" で始まる名前は先頭をエンコードして予約名と区別する
+            file_name = quote(device, safe="")
+            if file_name.startswith("_"):
+                file_name = "%5F" + file_name[1:]
+        return f"{self.prefix}/{timestamp}/{file_name}.csv"
+
+    def _write_device(
+        self,
+        device: Optional[str],
+        schemas: List[SensorSchema],
+        timeseries_data: Dict[str, List[Optional[MeasurementPoint]]],
+        columns: List[int],
+        timestamp: str,
+    ) -> Dict:
+        """1デバイス分のCSVを作成してアップロード"""
+        device_schemas, device_rows = self._select_columns(schemas, timeseries_data, columns)
+        destination_path = self.get_device_path(timestamp, device)
+
+        temp_file_path = None
+        try:
+            temp_file_path = self.csv_service.create_csv_from_rows(device_schemas, device_rows)
+            self.storage_repository.upload_file(temp_file_path, destination_path)
+            return {
+                "path": destination_path,
+                "sensors": [schema.name for schema in device_schemas],
+                "size_bytes": self.csv_service.get_file_size(temp_file_path),
+            }
+        finally:
+            if temp_file_path:
+                self.csv_service.cleanup_temp_file(temp_file_path)
+
+    @staticmethod
+    def _select_columns(
+        schemas: List[SensorSchema],
+        timeseries_data: Dict[str, List[Optional[MeasurementPoint]]],
+        columns: List[int],
+    ) -> Tuple[List[SensorSchema], List[Tuple[str, List[Optional[MeasurementPoint]]]]]:
+        """指定列のスキーマと行を取り出す"""
+        device_schemas = [schemas[k] for k in columns]
+        start, end = columns[0], columns[-1] + 1
+        if end - start == len(columns):
+            # 同一デバイスの列が連続している場合はスライスで取り出す
+            device_rows = [
+                (timestamp, measurements[start:end])
+                for timestamp, measurements in timeseries_data.items()
+            ]
+        else:
+            device_rows = [
+                (timestamp, [measurements[k] for k in columns])
+                for timestamp, measurements in timeseries_data.items()
+            ]
+        return device_schemas, device_rows
@@ -0,0 +1,140 @@
+import logging
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+
+class MemoryProfiler:
+    """処理ステージごとのピークメモリ使用量を計測する（tracemallocを使用）"""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.stages: Dict[str, Dict[str, int]] = {}
+        self._started_tracing = False
+        self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        ステージのピークメモリを計測するコンテキストマネージャ
+
+        Args:
+            name: ステージ名
+        """
+        if not self.enabled:
+            yield
+            return
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+        tracemalloc.reset_peak()
+        start_bytes, _ = tracemalloc.get_traced_memory()
+        try:
+            yield
+        finally:
+            current_bytes, peak_bytes = tracemalloc.get_traced_memory()
+            self.stages[name] = {
+                "peak_bytes": peak_bytes,
+                "start_bytes": start_bytes,
+                "end_bytes": current_bytes,
+            }
+            self.logger.info(
+                f"メモリ計測 [{name}] - ピーク: {peak_bytes / 1024 / 1024:.1f}MB, "
+                f"開始時: {start_bytes / 1024 / 1024:.1f}MB, 終了時: {current_bytes / 1024 / 1024:.1f}MB"
+            )
+
+    def stop(self) -> None:
+        """計測を終了（自身で開始したトレースのみ停止）"""
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def get_report(self) -> Dict:
+        """計測結果を取得"""
+        return {
+            "enabled": self.enabled,
+            "stages": dict(self.stages),
+        }
+
+
+class MemoryEstimator:
+    """取得前にセンサー数と取得期間からメモリ使用量を見積もる"""
+
+    # 全センサーに値がある場合の1セルあたりの概算バイト数
+    # （レスポンス本文 + JSONデコード結果 + MeasurementPoint を含む実測値を切り上げ）
+    BYTES_PER_CELL = 512
+    # ランタイムとライブラリのベースライン
+    BASELINE_BYTES = 64 * 1024 * 1024
+
+    # 直近に観測したセンサー数（ウォームインスタンス間で共有）
+    _last_series_count: Optional[int] = None
+
+    def __init__(
+        self,
+        budget_bytes: int,
+        series_count_hint: int = 0,
+        sampling_interval_seconds: int = 60,
+    ):
+        self.budget_bytes = budget_bytes
+        self.series_count_hint = series_count_hint
+        self.sampling_interval_seconds = sampling_interval_seconds
+        self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+
+    @classmethod
+    def record_series_count(cls, series_count: int) -> None:
+        """取得したセンサー数を次回の見積もり用に記録"""
+        cls._last_series_count = series_count
+
+    def get_series_count(self) -> Optional[int]:
+        """見積もりに使うセンサー数（設定値 > 前回観測値）"""
+        if self.series_count_hint > 0:
+            return self.series_count_hint
+        return self._last_series_count
+
+    def estimate_bytes(self, series_count: int, window_seconds: float) -> int:
+        """
+        メモリ使用量を見積もる
+
+        Args:
+            series_count: センサー数
+            window_seconds: 取得期間（秒）
+
+        Returns:
+            見積もりバイト数
+        """
+        timestamp_count = int(window_seconds // max(self.sampling_interval_seconds, 1)) + 1
+        return self.BASELINE_BYTES + series_count * timestamp_count * self.BYTES_PER_CELL
+
+    def evaluate(self, window_seconds: float) -> Dict:
+        """
+        見積もりと予算を比較し、ストリーミングモードを使うか判定
+
+        Args:
+            window_seconds: 取得期間（秒）
+
+        Returns:
+            判定結果の辞書
+        """
+        series_count = self.get_series_count()
+        if series_count is None:
+            self.logger.info("センサー数が不明のため、メモリ見積もりをスキップします")
+            return {
+                "estimated_bytes": None,
+                "budget_bytes": self.budget_bytes,
+                "streaming_mode": False,
+            }
+
+        estimated_bytes = self.estimate_bytes(series_count, window_seconds)
+        streaming_mode = estimated_bytes > self.budget_bytes
+        self.logger.info(
+            f"メモリ見積もり - センサー数: {series_count}, 見積もり: {estimated_bytes / 1024 / 1024:.1f}MB, "
+            f"予算: {self.budget_bytes / 1024 / 1024:.1f}MB, ストリーミングモード: {streaming_mode}"
+        )
+        return {
+            "series_count": series_count,
+            "estimated_bytes": estimated_bytes,
+            "budget_bytes": self.budget_bytes,
+            "streaming_mode": streaming_mode,
+        }
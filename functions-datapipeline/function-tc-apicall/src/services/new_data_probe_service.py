@@ -0,0 +1,129 @@
+import datetime
+import json
+import logging
+import random
+import time
+from typing import Dict, Optional
+
+from ..repositories.storage_repository import GenerationMismatchError, ObjectStorageRepository
+from ..repositories.time_series_repository import LatestMeasurementTimeSeriesRepository
+
+
+class NewDataProbeService:
+    """
+    本取得の前に最新の計測時刻だけを問い合わせ、前回処理時の時刻（ウォーターマーク）と比較するサービス
+
+    ウォーターマークは timeseries_state/{source}/watermark.json に保存する。
+    """
+
+    # 競合時の再試行回数
+    MAX_ATTEMPTS = 5
+    # 再試行までの待ち時間の上限（秒）
+    MAX_BACKOFF_SECONDS = 2.0
+
+    def __init__(
+        self,
+        time_series_repository: LatestMeasurementTimeSeriesRepository,
+        storage_repository: ObjectStorageRepository,
+        source: str,
+        prefix: str = "timeseries_state",
+    ):
+        self.time_series_repository = time_series_repository
+        self.storage_repository = storage_repository
+        self.source = source
+        self.prefix = prefix
+        self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+
+    def get_watermark_path(self) -> str:
+        """ウォーターマークのオブジェクトパスを取得"""
+        return f"{self.prefix}/{self.source}/watermark.json"
+
+    def check(self) -> Dict:
+        """
+        新しいデータがあるか確認
+
+        問い合わせや時刻の比較に失敗した場合は新しいデータがあるものとして扱う（本取得を止めない）。
+
+        Returns:
+            確認結果の辞書（has_new_data, latest_measurement_time, watermark）
+        """
+        watermark = None
+        try:
+            watermark = self._load_watermark()
+            latest_time = self.time_series_repository.fetch_latest_measurement_time()
+            if latest_time is None:
+                has_new_data = False
+            elif watermark is None:
+                has_new_data = True
+            else:
+                has_new_data = self._parse_time(latest_time) > self._parse_time(watermark)
+        except Exception as e:
+            self.logger.warning(f"最新計測時刻の確認に失敗したため、通常どおり取得します: {e}")
+            return {"has_new_data": True, "latest_measurement_time": None, "watermark": watermark, "error": str(e)}
+
+        self.logger.info(
+            f"新規データ確認 - 最新計測時刻: {latest_time}, ウォーターマーク: {watermark}, 新規データ: {has_new_data}"
+        )
+        return {"has_new_data": has_new_data, "latest_measurement_time": latest_time, "watermark": watermark}
+
+    def commit(self, probe_result: Dict) -> None:
+        """
+        処理が完了した最新計測時刻をウォーターマークとして保存
+
+        条件付き書き込みで保存し、保存済みの時刻より古い場合は更新しない
+        （後から完了した古い実行がウォーターマークを戻さないようにする）。
+
+        Args:
+            probe_result: check の結果
+        """
+        latest_time = probe_result.get("latest_measurement_time")
+        if not latest_time:
+            return
+        latest = self._parse_time(latest_time)
+        path = self.get_watermark_path()
+
+        for attempt in range(1, self.MAX_ATTEMPTS + 1):
+            data, generation = self.storage_repository.download_bytes_with_generation(path)
+            current = self._decode_watermark(data)
+            try:
+                current_time = self._parse_time(current) if current else None
+            except ValueError:
+                # 解析できないウォーターマークは置き換える
+                self.logger.warning(f"保存済みのウォーターマークを解析できないため置き換えます: {current}")
+                current_time = None
+            if current_time is not None and current_time >= latest:
+                self.logger.info(f"ウォーターマークは既に {current} まで進んでいるため更新しません")
+                return
+            content = {
+                "latest_measurement_time": latest_time,
+                "updated_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            }
+            try:
+                self.storage_repository.upload_bytes_if_generation_match(
+                    json.dumps(content).encode("utf-8"), path, generation, content_type="application/json"
+                )
+            except GenerationMismatchError:
+                if attempt == self.MAX_ATTEMPTS:
+                    raise
+                self.logger.info(f"ウォーターマークが他の書き込みで更新されたため再試行します（{attempt}回目）")
+                time.sleep(random.uniform(0, min(0.1 * 2 ** attempt, self.MAX_BACKOFF_SECONDS)))
+                continue
+            self.logger.info(f"ウォーターマークを更新しました: {latest_time}")
+            return
+
+    def _load_watermark(self) -> Optional[str]:
+        return self._decode_watermark(self.storage_repository.download_bytes(self.get_watermark_path()))
+
+    @staticmethod
+    def _decode_watermark(data: Optional[bytes]) -> Optional[str]:
+        if data is None:
+            return None
+        return json.loads(data.decode("utf-8")).get("latest_measurement_time")
+
+    @staticmethod
+    def _parse_time(value: str) -> datetime.datetime:
+        """ISO 8601 の時刻を解析（タイムゾーンなしはUTCとみなす）"""
+        parsed = datetime.datetime.fromisoformat(value)
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+        return parsed
@@ -0,0 +1,270 @@
+import csv
+import io
+import logging
+import random
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ..models import SensorSchema, MeasurementPoint
+from ..repositories.storage_repository import GenerationMismatchError, ObjectStorageRepository
+
+
+# 行データ: (timestamp, センサー名 -> (min, max) のセル文字列)
+PartitionRow = Tuple[str, Dict[str, Tuple[str, str]]]
+
+
+class PartitionReconciliationService:
+    """日付パーティション単位で遅延到着データを既存データへマージするサービス"""
+
+    # 競合時の再試行回数
+    MAX_ATTEMPTS = 5
+    # 再試行までの待ち時間の上限（秒）
+    MAX_BACKOFF_SECONDS = 2.0
+
+    def __init__(
+        self,
+        storage_repository: ObjectStorageRepository,
+        source: str,
+        prefix: str = "timeseries_partitions",
+    ):
+        self.storage_repository = storage_repository
+        self.source = source
+        self.prefix = prefix
+        self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+
+    def reconcile(
+        self,
+        schemas: List[SensorSchema],
+        timeseries_data: Dict[str, List[Optional[MeasurementPoint]]]
+    ) -> Dict:
+        """
+        取得データを既存パーティションにマージし、変更があったパーティションのみ書き換える
+
+        Args:
+            schemas: センサーのスキーマ情報
+            timeseries_data: 時系列データ（timestamp -> measurements）
+
+        Returns:
+            マージ結果の辞書
+        """
+        self.logger.info("パーティションのマージ処理開始")
+
+        sensor_names = [schema.name for schema in schemas]
+        new_partitions = self._group_by_partition(sensor_names, timeseries_data)
+
+        rewritten = []
+        rewritten_objects = []
+        inserted_total = 0
+        updated_total = 0
+
+        for partition_key in sorted(new_partitions):
+            partition_path = self.get_partition_path(partition_key)
+            new_rows = sorted(new_partitions[partition_key], key=lambda row: row[0])
+            merged = self._store_partition(partition_path, sensor_names, new_rows)
+            if merged is None:
+                self.logger.debug(f"パーティションに変更なし: {partition_path}")
+                continue
+
+            partition_object, stats = merged
+            rewritten.append(partition_path)
+            rewritten_objects.append(partition_object)
+            inserted_total += stats["inserted"]
+            updated_total += stats["updated"]
+            self.logger.info(
+                f"パーティションを書き換えました: {partition_path} "
+                f"(追加: {stats['inserted']}行, 更新: {stats['updated']}行)"
+            )
+
+        self.logger.info(
+            f"パーティションのマージ処理完了 - 対象: {len(new_partitions)}件, 書き換え: {len(rewritten)}件"
+        )
+        return {
+            "success": True,
+            "partitions_checked": len(new_partitions),
+            "partitions_rewritten": rewritten,
+            "partition_objects": rewritten_objects,
+            "rows_inserted": inserted_total,
+            "rows_updated": updated_total,
+        }
+
+    def _store_partition(
+        self,
+        partition_path: str,
+        sensor_names: List[str],
+        new_rows: List[PartitionRow],
+    ) -> Optional[Tuple[Dict, Dict[str, int]]]:
+        """
+        既存パーティションに新しい行をマージし、条件付きで書き込む（競合時は読み直して再試行）
+
+        Args:
+            partition_path: パーティションのオブジェクトパス
+            sensor_names: 取得データのセンサー名
+            new_rows: 新規取得した行（timestamp昇順）
+
+        Returns:
+            書き込んだパーティションの情報と追加・更新行数（変更がない場合はNone）
+        """
+        for attempt in range(1, self.MAX_ATTEMPTS + 1):
+            existing_data, generation = self.storage_repository.download_bytes_with_generation(partition_path)
+            existing_sensors, existing_rows = self._parse_partition(existing_data)
+
+            merged_sensors = existing_sensors + [
+                name for name in sensor_names if name not in existing_sensors
+            ]
+            stats = {"inserted": 0, "updated": 0}
+            data, summary = self._serialize_partition(
+                merged_sensors, self._merge_sorted(existing_rows, new_rows, stats)
+            )
+
+            header_changed = merged_sensors != existing_sensors
+            if existing_data is not None and not header_changed and not stats["inserted"] and not stats["updated"]:
+                return None
+
+            try:
+                self.storage_repository.upload_bytes_if_generation_match(
+                    data, partition_path, generation, content_type="text/csv"
+                )
+            except GenerationMismatchError:
+                if attempt == self.MAX_ATTEMPTS:
+                    raise
+                self.logger.info(
+                    f"パーティションが他の書き込みで更新されたため再試行します（{partition_path}, {attempt}回目）"
+                )
+                time.sleep(random.uniform(0, min(0.1 * 2 ** attempt, self.MAX_BACKOFF_SECONDS)))
+                continue
+            return {"path": partition_path, "sensors": merged_sensors, **summary}, stats
+
+    def get_partition_path(self, partition_key: str) -> str:
+        """パーティションのオブジェクトパスを取得"""
+        return f"{self.prefix}/{self.source}/{partition_key}.csv"
+
+    def _group_by_partition(
+        self,
+        sensor_names: List[str],
+        timeseries_data: Dict[str, List[Optional[MeasurementPoint]]]
+    ) -> Dict[str, List[PartitionRow]]:
+        """取得データを日付パーティションごとの行に変換"""
+        partitions: Dict[str, List[PartitionRow]] = {}
+        for timestamp, measurements in timeseries_data.items():
+            cells = {}
+            for name, measurement in zip(sensor_names, measurements):
+                if measurement:
+                    cells[name] = (
+                        self._format_cell(measurement.min_value),
+                        self._format_cell(measurement.max_value),
+                    )
+                else:
+                    cells[name] = ("", "")
+            partitions.setdefault(self._partition_key(timestamp), []).append((timestamp, cells))
+        return partitions
+
+    def _merge_sorted(
+        self,
+        existing_rows: List[PartitionRow],
+        new_rows: List[PartitionRow],
+        stats: Dict[str, int],
+    ) -> Iterator[PartitionRow]:
+        """
+        タイムスタンプ順のストリーミングマージ（同一時刻はセンサー単位で後勝ち）
+
+        Args:
+            existing_rows: 既存パーティションの行（timestamp昇順）
+            new_rows: 新規取得した行（timestamp昇順）
+            stats: 追加・更新行数の集計先
+
+        Yields:
+            マージ後の行
+        """
+        i, j = 0, 0
+        while i < len(existing_rows) and j < len(new_rows):
+            existing_ts, existing_cells = existing_rows[i]
+            new_ts, new_cells = new_rows[j]
+            if existing_ts < new_ts:
+                yield existing_rows[i]
+                i += 1
+            elif new_ts < existing_ts:
+                stats["inserted"] += 1
+                yield new_rows[j]
+                j += 1
+            else:
+                merged_cells = dict(existing_cells)
+                for name, cell in new_cells.items():
+                    # 値を持つ新しい計測値のみで上書きする
+                    if cell != ("", ""):
+                        merged_cells[name] = cell
+                if merged_cells != existing_cells:
+                    stats["updated"] += 1
+                yield existing_ts, merged_cells
+                i += 1
+                j += 1
+
+        for row in existing_rows[i:]:
+            yield row
+        for row in new_rows[j:]:
+            stats["inserted"] += 1
+            yield row
+
+    def _parse_partition(self, data: Optional[bytes]) -> Tuple[List[str], List[PartitionRow]]:
+        """既存パーティションCSVを解析"""
+        if data is None:
+            return [], []
+
+        reader = csv.reader(io.StringIO(data.decode("utf-8")))
+        header = next(reader, None)
+        if not header:
+            return [], []
+
+        # ヘッダーは timestamp, {name}_min, {name}_max, ... の並び
+        sensor_names = [column[: -len("_min")] for column in header[1::2]]
+        rows = []
+        for record in reader:
+            if not record:
+                continue
+            cells = {
+                name: (record[1 + 2 * k], record[2 + 2 * k])
+                for k, name in enumerate(sensor_names)
+            }
+            rows.append((record[0], cells))
+        return sensor_names, rows
+
+    def _serialize_partition(self, sensor_names: List[str], rows: Iterable[PartitionRow]) -> Tuple[bytes, Dict]:
+        """
+        マージ後の行を受け取りながらCSVバイト列に変換
+
+        Args:
+            sensor_names: ヘッダーのセンサー名
+            rows: 書き込む行（timestamp昇順）
+
+        Returns:
+            CSVバイト列と、最初/最後のタイムスタンプ・行数
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        headers = ['timestamp']
+        for name in sensor_names:
+            headers.extend([f"{name}_min", f"{name}_max"])
+        writer.writerow(headers)
+
+        summary = {"first_timestamp": None, "last_timestamp": None, "row_count": 0}
+        for timestamp, cells in rows:
+            row = [timestamp]
+            for name in sensor_names:
+                row.extend(cells.get(name, ("", "")))
+            writer.writerow(row)
+            if summary["first_timestamp"] is None:
+                summary["first_timestamp"] = timestamp
+            summary["last_timestamp"] = timestamp
+            summary["row_count"] += 1
+
+        return buffer.getvalue().encode("utf-8"), summary
+
+    @staticmethod
+    def _partition_key(timestamp: str) -> str:
+        """タイムスタンプ（ISO 8601）から日付パーティションキーを取得"""
+        return timestamp[:10]
+
+    @staticmethod
+    def _format_cell(value) -> str:
+        """CSVセルの文字列表現（csv.writerと同じ表現）"""
+        return "" if value is None else str(value)
@@ -0,0 +1,211 @@
+import logging
+import os
+import tempfile
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..models import SensorSchema, MeasurementPoint
+from ..repositories.ring_buffer import (
+    EMPTY_TIMESTAMP,
+    RingBufferFile,
+    RingBufferWindow,
+    build_window,
+    read_header,
+)
+from ..repositories.storage_repository import ObjectStorageRepository
+from .timeseries_arrays import to_timestamp_ms, to_value_matrices
+
+
+class RingBufferService:
+    """
+    直近N時間の計測値を固定サイズのバイナリリングバッファとして保持するサービス
+
+    バッファは timeseries_ringbuffer/{source}.bin に保存し、変更のあったスロットのみ
+    mmap 上で書き換える。読み出し側はヘッダーからバイト範囲を計算し、
+    Rangeリクエストで必要なスロットだけを取得できる。
+    """
+
+    def __init__(
+        self,
+        storage_repository: ObjectStorageRepository,
+        source: str,
+        hours: int,
+        interval_seconds: int = 60,
+        prefix: str = "timeseries_ringbuffer",
+    ):
+        self.storage_repository = storage_repository
+        self.source = source
+        self.capacity = max(hours * 3600 // max(interval_seconds, 1), 1)
+        self.interval_seconds = interval_seconds
+        self.prefix = prefix
+        self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+
+    def get_buffer_path(self) -> str:
+        """リングバッファのオブジェクトパスを取得"""
+        return f"{self.prefix}/{self.source}.bin"
+
+    def update(
+        self,
+        schemas: List[SensorSchema],
+        timeseries_data: Dict[str, List[Optional[MeasurementPoint]]]
+    ) -> Dict:
+        """
+        取得データのうち新規・変更のある行だけをリングバッファに書き込む
+
+        Args:
+            schemas: センサーのスキーマ情報
+            timeseries_data: 時系列データ（timestamp -> measurements）
+
+        Returns:
+            更新結果の辞書
+        """
+        buffer_path = self.get_buffer_path()
+        sensor_names = [schema.name for schema in schemas]
+        self.logger.info(f"リングバッファ更新開始: {buffer_path}")
+
+        with tempfile.NamedTemporaryFile(suffix=".bin", delete=False) as temp_file:
+            temp_file_path = temp_file.name
+
+        ring_buffer = None
+        try:
+            ring_buffer, recreated = self._open_buffer(temp_file_path, sensor_names)
+
+            timestamps_ms, min_values, max_values = self._to_arrays(len(sensor_names), timeseries_data)
+            changed = self._changed_rows(ring_buffer, timestamps_ms, min_values, max_values)
+            rows_written = ring_buffer.write_rows(
+                timestamps_ms[changed], min_values[changed], max_values[changed]
+            )
+            last_timestamp_ms = ring_buffer.header.last_timestamp_ms
+            ring_buffer.close()
+            ring_buffer = None
+
+            if rows_written or recreated:
+                self.storage_repository.upload_file(temp_file_path, buffer_path)
+                self.logger.info(f"リングバッファを更新しました: {buffer_path} (書き込み: {rows_written}行)")
+            else:
+                self.logger.info(f"リングバッファに変更なし: {buffer_path}")
+
+            return {
+                "success": True,
+                "path": buffer_path,
+                "rows_written": rows_written,
+                "recreated": recreated,
+                "capacity": self.capacity,
+                "last_timestamp": self._format_timestamp(last_timestamp_ms),
+            }
+
+        finally:
+            if ring_buffer:
+                ring_buffer.close()
+            os.unlink(temp_file_path)
+
+    def read_last_minutes(self, minutes: float) -> Optional[RingBufferWindow]:
+        """
+        Rangeリクエストで直近の指定分数のデータを読み出す
+
+        ヘッダー（2回）と対象スロット（1〜2回）の範囲読み出しのみで、バッファ全体は取得しない。
+
+        Args:
+            minutes: 読み出す期間（分）
+
+        Returns:
+            期間のデータ（バッファが存在しない場合はNone）
+        """
+        buffer_path = self.get_buffer_path()
+
+        def read_range(start: int, length: int) -> Optional[bytes]:
+            return self.storage_repository.download_range(buffer_path, start, length)
+
+        header = read_header(read_range)
+        if header is None:
+            return None
+
+        chunks = []
+        for offset, length in header.last_slot_ranges(header.rows_for_minutes(minutes)):
+            chunks.append(np.frombuffer(read_range(offset, length), dtype=header.row_dtype))
+        return build_window(header, chunks, minutes)
+
+    def _open_buffer(self, temp_file_path: str, sensor_names: List[str]) -> Tuple[RingBufferFile, bool]:
+        """
+        既存バッファを一時ファイルに取得して開く（構成が変わった場合は作り直す）
+
+        Returns:
+            リングバッファと、新規作成・作り直しをしたか
+        """
+        existing_data = self.storage_repository.download_bytes(self.get_buffer_path())
+        if existing_data is None:
+            return self._create_buffer(temp_file_path, sensor_names), True
+
+        with open(temp_file_path, "wb") as f:
+            f.write(existing_data)
+        existing = RingBufferFile(temp_file_path)
+        header = existing.header
+        if (
+            header.sensor_names == sensor_names
+            and header.capacity == self.capacity
+            and header.interval_seconds == self.interval_seconds
+        ):
+            return existing, False
+
+        # センサー構成・容量・間隔が変わった場合は、保持中のデータを新しい構成へ移し替える
+        self.logger.info("リングバッファの構成が変わったため作り直します")
+        window = existing.read_last(header.capacity * header.interval_seconds / 60)
+        existing.close()
+        ring_buffer = self._create_buffer(temp_file_path, sensor_names)
+        self._migrate(ring_buffer, window, sensor_names)
+        return ring_buffer, True
+
+    def _create_buffer(self, path: str, sensor_names: List[str]) -> RingBufferFile:
+        return RingBufferFile.create(path, self.capacity, self.interval_seconds, sensor_names)
+
+    def _migrate(self, ring_buffer: RingBufferFile, window: RingBufferWindow, sensor_names: List[str]) -> None:
+        """旧構成のデータをセンサー名で対応付けて書き込む"""
+        row_count = len(window.timestamps)
+        min_values = np.full((row_count, len(sensor_names)), np.nan, dtype=np.float32)
+        max_values = np.full((row_count, len(sensor_names)), np.nan, dtype=np.float32)
+        old_columns = {name: k for k, name in enumerate(window.sensor_names)}
+        for k, name in enumerate(sensor_names):
+            if name in old_columns:
+                min_values[:, k] = window.min_values[:, old_columns[name]]
+                max_values[:, k] = window.max_values[:, old_columns[name]]
+        ring_buffer.write_rows(window.timestamps.astype(np.int64), min_values, max_values)
+
+    def _changed_rows(
+        self,
+        ring_buffer: RingBufferFile,
+        timestamps_ms: np.ndarray,
+        min_values: np.ndarray,
+        max_values: np.ndarray,
+    ) -> np.ndarray:
+        """スロットの現在の内容と異なる行のマスク（NaN同士は同一とみなす）"""
+        header = ring_buffer.header
+        if header.last_timestamp_ms == EMPTY_TIMESTAMP:
+            return np.ones(len(timestamps_ms), dtype=bool)
+        current = ring_buffer.rows[(timestamps_ms // header.interval_ms) % header.capacity]
+
+        def differs(current_values: np.ndarray, new_values: np.ndarray) -> np.ndarray:
+            same = (current_values == new_values) | (np.isnan(current_values) & np.isnan(new_values))
+            return ~same.all(axis=1)
+
+        return (
+            (current["timestamp"] != timestamps_ms)
+            | differs(current["min"], min_values)
+            | differs(current["max"], max_values)
+        )
+
+    def _to_arrays(
+        self,
+        sensor_count: int,
+        timeseries_data: Dict[str, List[Optional[MeasurementPoint]]]
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """時系列データを epoch ms の時刻配列と float32 の最小値・最大値行列に変換"""
+        timestamps_ms = to_timestamp_ms(timeseries_data.keys())
+        min_values, max_values = to_value_matrices(sensor_count, timeseries_data.values(), dtype=np.float32)
+        return timestamps_ms, min_values, max_values
+
+    @staticmethod
+    def _format_timestamp(timestamp_ms: int) -> Optional[str]:
+        if timestamp_ms == EMPTY_TIMESTAMP:
+            return None
+        return str(np.datetime64(timestamp_ms, "ms")) + "Z"
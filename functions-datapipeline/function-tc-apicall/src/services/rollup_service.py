@@ -0,0 +1,200 @@
+import logging
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..models import SensorSchema, MeasurementPoint
+from ..repositories.rollup_format import RollupLevel, aggregate
+from ..repositories.storage_repository import GenerationMismatchError, ObjectStorageRepository
+from .timeseries_arrays import to_timestamp_ms, to_value_matrices
+
+
+class RollupService:
+    """
+    多段階のロールアップ（1m → 5m → 1h → 1d）を取得ごとに差分更新するサービス
+
+    各段階は timeseries_rollups/{source}/{level}.npz に保存する。1m は取得した行から、
+    それより粗い段階は1つ細かい段階から、新しい行が入ったバケットだけを集計し直して置き換える
+    （取得期間が重なっても二重に数えない）。値は min/max の中点を合計・件数に加え、
+    平均は合計 / 件数で求める。
+    1m の保持期間より古い行（遅延データ）は、粗い段階を集計し直せない（加算すると再取得時に
+    重複して数える）ため反映せず、件数を結果の late_rows_dropped に返す。
+    更新は世代を指定した条件付き書き込み（compare-and-swap）で行い、競合時は読み直して再試行する。
+    """
+
+    # (名前, バケット幅（秒）, 保持期間（秒、0は無期限）)
+    # 粗い段階は1つ細かい段階から集計し直すため、細かい段階は粗いバケット幅以上を保持する
+    LEVELS: List[Tuple[str, int, int]] = [
+        ("1m", 60, 2 * 86400),
+        ("5m", 300, 35 * 86400),
+        ("1h", 3600, 400 * 86400),
+        ("1d", 86400, 0),
+    ]
+    # 競合時の再試行回数
+    MAX_ATTEMPTS = 5
+    # 再試行までの待ち時間の上限（秒）
+    MAX_BACKOFF_SECONDS = 2.0
+
+    def __init__(self, storage_repository: ObjectStorageRepository, source: str, prefix: str = "timeseries_rollups"):
+        self.storage_repository = storage_repository
+        self.source = source
+        self.prefix = prefix
+        self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+
+    def get_level_path(self, level_name: str) -> str:
+        """段階のオブジェクトパスを取得"""
+        return f"{self.prefix}/{self.source}/{level_name}.npz"
+
+    def update(
+        self,
+        schemas: List[SensorSchema],
+        timeseries_data: Dict[str, List[Optional[MeasurementPoint]]]
+    ) -> Dict:
+        """
+        取得データで各段階のバケットを更新
+
+        Args:
+            schemas: センサーのスキーマ情報
+            timeseries_data: 時系列データ（timestamp -> measurements）
+
+        Returns:
+            更新結果の辞書
+        """
+        sensor_names = [schema.name for schema in schemas]
+        timestamps_ms = to_timestamp_ms(timeseries_data.keys())
+        min_values, max_values = to_value_matrices(len(sensor_names), timeseries_data.values())
+        # 最小値と最大値の中点（片方のみの場合はその値）を平均の元にする
+        midpoints = np.where(
+            np.isnan(min_values), max_values,
+            np.where(np.isnan(max_values), min_values, (min_values + max_values) / 2),
+        )
+        observed = ~np.isnan(midpoints)
+        latest_ms = int(timestamps_ms.max())
+
+        # 1m の保持期間より古い行は、粗い段階を集計し直せないため反映しない
+        accepted = timestamps_ms >= self._oldest_bucket(0, latest_ms)
+        late_rows_dropped = int(np.count_nonzero(~accepted))
+        if late_rows_dropped:
+            self.logger.warning(
+                f"1m の保持期間より古い行はロールアップに反映しません: {late_rows_dropped}行"
+            )
+            timestamps_ms = timestamps_ms[accepted]
+            min_values, max_values = min_values[accepted], max_values[accepted]
+            midpoints, observed = midpoints[accepted], observed[accepted]
+
+        results = {}
+        finer: Optional[RollupLevel] = None
+        for k, (level_name, bucket_seconds, retention_seconds) in enumerate(self.LEVELS):
+            bucket_ms = bucket_seconds * 1000
+            if finer is None:
+                touched = aggregate(
+                    bucket_ms, sensor_names, timestamps_ms, min_values, max_values,
+                    np.where(observed, midpoints, 0.0), observed,
+                )
+            else:
+                touched = self._reaggregate(finer, touched_buckets, bucket_ms)
+            oldest_bucket = self._oldest_bucket(k, latest_ms) if retention_seconds else None
+
+            path = self.get_level_path(level_name)
+            level, data, attempts = self._store_level(path, bucket_ms, sensor_names, touched, oldest_bucket)
+            results[level_name] = {
+                "path": path,
+                "buckets_updated": len(touched.buckets),
+                "bucket_count": len(level.buckets),
+                "size_bytes": len(data),
+                "attempts": attempts,
+            }
+            finer = level
+            touched_buckets = touched.buckets
+
+        self.logger.info(
+            "ロールアップを更新しました: "
+            + ", ".join(
+                f"{name} {result['buckets_updated']}件" for name, result in results.items()
+            )
+        )
+        return {"success": True, "levels": results, "late_rows_dropped": late_rows_dropped}
+
+    def read(self, level_name: str, start_ms: Optional[int] = None, end_ms: Optional[int] = None) -> Optional[RollupLevel]:
+        """
+        段階のロールアップを読み出す
+
+        Args:
+            level_name: 段階の名前（"1m" / "5m" / "1h" / "1d"）
+            start_ms: 開始時刻（epoch ms, 省略時は先頭から）
+            end_ms: 終了時刻（epoch ms, 省略時は末尾まで）
+
+        Returns:
+            期間と重なるバケット（存在しない場合はNone）
+        """
+        data = self.storage_repository.download_bytes(self.get_level_path(level_name))
+        if data is None:
+            return None
+        return RollupLevel.decode(data).select(start_ms, end_ms)
+
+    def _store_level(
+        self,
+        path: str,
+        bucket_ms: int,
+        sensor_names: List[str],
+        touched: RollupLevel,
+        oldest_bucket: Optional[int],
+    ) -> Tuple[RollupLevel, bytes, int]:
+        """
+        保存済みの段階を読み込んでバケットを置き換え、条件付きで書き込む（競合時は読み直して再試行）
+
+        Args:
+            path: 段階のオブジェクトパス
+            bucket_ms: バケットの幅（ms）
+            sensor_names: センサー名
+            touched: 置き換えるバケット
+            oldest_bucket: 保持する最古のバケット（Noneは無期限）
+
+        Returns:
+            書き込んだ段階、そのバイト列、試行回数
+        """
+        for attempt in range(1, self.MAX_ATTEMPTS + 1):
+            stored, generation = self.storage_repository.download_bytes_with_generation(path)
+            if stored is None:
+                level = RollupLevel.empty(bucket_ms, sensor_names)
+            else:
+                # センサー構成の変更は名前で対応付ける
+                level = RollupLevel.decode(stored).with_sensors(sensor_names)
+            level.upsert(touched)
+            if oldest_bucket is not None:
+                level.trim(oldest_bucket)
+
+            data = level.encode()
+            try:
+                self.storage_repository.upload_bytes_if_generation_match(
+                    data, path, generation, content_type="application/octet-stream"
+                )
+            except GenerationMismatchError:
+                if attempt == self.MAX_ATTEMPTS:
+                    raise
+                self.logger.info(f"ロールアップが他の書き込みで更新されたため再試行します（{path}, {attempt}回目）")
+                time.sleep(random.uniform(0, min(0.1 * 2 ** attempt, self.MAX_BACKOFF_SECONDS)))
+                continue
+            return level, data, attempt
+
+    def _oldest_bucket(self, level_index: int, latest_ms: int) -> int:
+        """
+        段階が保持する最古のバケット
+
+        1つ粗い段階のバケット単位で保持し、粗いバケットを常に細かい段階から集計し直せるようにする。
+        """
+        retention_seconds = self.LEVELS[level_index][2]
+        coarser_bucket_ms = self.LEVELS[level_index + 1][1] * 1000
+        return (latest_ms - retention_seconds * 1000) // coarser_bucket_ms * coarser_bucket_ms
+
+    @staticmethod
+    def _reaggregate(finer: RollupLevel, finer_buckets: np.ndarray, bucket_ms: int) -> RollupLevel:
+        """更新された細かいバケットを含む粗いバケットを、細かい段階から集計し直す"""
+        targets = np.unique(finer_buckets // bucket_ms * bucket_ms)
+        rows = np.isin(finer.buckets // bucket_ms * bucket_ms, targets)
+        return aggregate(
+            bucket_ms, finer.sensor_names, finer.buckets[rows],
+            finer.minimums[rows], finer.maximums[rows], finer.sums[rows], finer.counts[rows],
+        )
@@ -0,0 +1,78 @@
+import json
+import logging
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from ..models import MeasurementPoint
+from ..repositories.storage_repository import ObjectStorageRepository
+
+
+class SidecarService:
+    """
+    行ブロック単位で集計し、結果をデータオブジェクトの隣のサイドカーJSONに保存するサービスの基底クラス
+
+    集計先は update(block) と to_dict() を持つオブジェクト（SensorStatistics / AnomalyScorer など）。
+    サブクラスは SIDECAR_SUFFIX と SIDECAR_LABEL を指定し、storage_repository と logger を設定する。
+    """
+
+    # ストリーミング時の集計ブロック行数
+    BLOCK_ROWS = 1024
+    # サイドカーの拡張子（{name}.csv → {name}{SIDECAR_SUFFIX}）
+    SIDECAR_SUFFIX = ".json"
+    # ログに出力する集計結果の名前
+    SIDECAR_LABEL = "集計結果"
+
+    storage_repository: Optional[ObjectStorageRepository]
+    logger: logging.Logger
+
+    def track(
+        self,
+        accumulator,
+        rows: Iterable[Tuple[str, List[Optional[MeasurementPoint]]]],
+    ) -> Iterator[Tuple[str, List[Optional[MeasurementPoint]]]]:
+        """
+        行を受け渡しながらブロック単位で集計する（ストリーミングモード用）
+
+        Args:
+            accumulator: 集計先
+            rows: (timestamp, measurements) のイテレータ
+
+        Yields:
+            受け取った行
+        """
+        block = []
+        for row in rows:
+            block.append(row)
+            if len(block) >= self.BLOCK_ROWS:
+                accumulator.update(block)
+                block = []
+            yield row
+        accumulator.update(block)
+
+    def get_sidecar_path(self, object_path: str) -> str:
+        """データオブジェクトに対応するサイドカーのパスを取得"""
+        base_path = object_path[: -len(".csv")] if object_path.endswith(".csv") else object_path
+        return f"{base_path}{self.SIDECAR_SUFFIX}"
+
+    def store_sidecar(self, accumulator, object_path: str) -> str:
+        """
+        集計結果をデータオブジェクトの隣にJSONで保存
+
+        Args:
+            accumulator: 集計結果
+            object_path: データオブジェクトのパス
+
+        Returns:
+            保存したサイドカーのURL
+        """
+        sidecar_path = self.get_sidecar_path(object_path)
+        content = {"object": object_path, **accumulator.to_dict()}
+        data = json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        file_url = self.storage_repository.upload_bytes(data, sidecar_path, content_type="application/json")
+        self.logger.info(f"{self.SIDECAR_LABEL}を保存しました: {sidecar_path} ({len(data)} bytes)")
+        return file_url
+
+
+def nan_to_none(value: float) -> Optional[float]:
+    return None if np.isnan(value) else float(value)
@@ -0,0 +1,176 @@
+import itertools
+import logging
+import operator
+from operator import attrgetter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..models import SensorSchema, MeasurementPoint
+from ..repositories.storage_repository import ObjectStorageRepository
+from .sidecar_service import SidecarService, nan_to_none
+
+
+class SensorStatistics:
+    """
+    センサーごとの要約統計量（件数・欠損率・最小・最大・平均・最初/最後の時刻）
+
+    ブロック単位でベクトル化して集計するため、全データを一括で渡しても、
+    ストリーミングで少しずつ渡しても同じ結果になる。
+    """
+
+    def __init__(self, schemas: List[SensorSchema]):
+        sensor_count = len(schemas)
+        self.schemas = schemas
+        self.row_count = 0
+        self.counts = np.zeros(sensor_count, dtype=np.int64)
+        self.minimums = np.full(sensor_count, np.nan)
+        self.maximums = np.full(sensor_count, np.nan)
+        self.sums = np.zeros(sensor_count)
+        self.value_counts = np.zeros(sensor_count, dtype=np.int64)
+        self.first_timestamps: List[Optional[str]] = [None] * sensor_count
+        self.last_timestamps: List[Optional[str]] = [None] * sensor_count
+
+    def update(self, block: List[Tuple[str, List[Optional[MeasurementPoint]]]]) -> None:
+        """
+        行ブロックを集計に加える
+
+        Args:
+            block: (timestamp, measurements) のリスト
+        """
+        if not block:
+            return
+        sensor_count = len(self.schemas)
+        timestamps, measurement_lists = zip(*block)
+        self.row_count += len(block)
+        if not sensor_count:
+            return
+
+        # タイムスタンプ順に並べ替えて、センサーごとの最初/最後の行を求める
+        order = np.argsort(np.array(timestamps))
+        points = list(itertools.chain.from_iterable(measurement_lists[i] for i in order))
+        present = np.fromiter(
+            map(operator.is_not, points, itertools.repeat(None)), dtype=bool, count=len(points)
+        )
+        present_points = list(itertools.compress(points, present.tolist()))
+
+        min_values = np.full(len(points), np.nan)
+        max_values = np.full(len(points), np.nan)
+        min_values[present] = self._to_float_array(list(map(attrgetter("min_value"), present_points)))
+        max_values[present] = self._to_float_array(list(map(attrgetter("max_value"), present_points)))
+        present = present.reshape(len(block), sensor_count)
+        min_values = min_values.reshape(len(block), sensor_count)
+        max_values = max_values.reshape(len(block), sensor_count)
+
+        self.counts += present.sum(axis=0)
+        # fmin/fmax はNaNを無視する（全てNaNの列はNaNのまま）
+        self.minimums = np.fmin(self.minimums, np.fmin.reduce(min_values, axis=0))
+        self.maximums = np.fmax(self.maximums, np.fmax.reduce(max_values, axis=0))
+        for values in (min_values, max_values):
+            observed = ~np.isnan(values)
+            self.sums += np.where(observed, values, 0.0).sum(axis=0)
+            self.value_counts += observed.sum(axis=0)
+
+        has_data = present.any(axis=0)
+        first_rows = present.argmax(axis=0)
+        last_rows = len(block) - 1 - present[::-1].argmax(axis=0)
+        for sensor in np.flatnonzero(has_data).tolist():
+            first = timestamps[order[first_rows[sensor]]]
+            last = timestamps[order[last_rows[sensor]]]
+            if self.first_timestamps[sensor] is None or first < self.first_timestamps[sensor]:
+                self.first_timestamps[sensor] = first
+            if self.last_timestamps[sensor] is None or last > self.last_timestamps[sensor]:
+                self.last_timestamps[sensor] = last
+
+    def to_dict(self) -> Dict:
+        """JSONに変換可能な辞書を作成（値がない統計量はNone）"""
+        means = np.divide(
+            self.sums, self.value_counts, out=np.full(len(self.schemas), np.nan), where=self.value_counts > 0
+        )
+        sensors = []
+        for k, schema in enumerate(self.schemas):
+            count = int(self.counts[k])
+            sensors.append({
+                "name": schema.name,
+                "unit": schema.unit,
+                "count": count,
+                "null_ratio": round(1 - count / self.row_count, 6) if self.row_count else None,
+                "min": nan_to_none(self.minimums[k]),
+                "max": nan_to_none(self.maximums[k]),
+                "mean": nan_to_none(means[k]),
+                "first_timestamp": self.first_timestamps[k],
+                "last_timestamp": self.last_timestamps[k],
+            })
+
+        observed_first = [ts for ts in self.first_timestamps if ts is not None]
+        observed_last = [ts for ts in self.last_timestamps if ts is not None]
+        return {
+            "row_count": self.row_count,
+            "sensor_count": len(self.schemas),
+            "first_timestamp": min(observed_first) if observed_first else None,
+            "last_timestamp": max(observed_last) if observed_last else None,
+            "sensors": sensors,
+        }
+
+    @staticmethod
+    def _to_float_array(values: List) -> np.ndarray:
+        """値を float64 に変換（数値に変換できない値はNaN）"""
+        try:
+            return np.array(values, dtype=np.float64)
+        except (TypeError, ValueError):
+            return np.fromiter(map(_to_float, values), dtype=np.float64, count=len(values))
+
+
+class SummaryStatisticsService(SidecarService):
+    """時系列データの要約統計量を計算し、サイドカーJSONとして保存するサービス"""
+
+    SIDECAR_SUFFIX = ".stats.json"
+    SIDECAR_LABEL = "要約統計量"
+    # 要約に含める欠損センサー名の上限
+    DIGEST_EMPTY_SENSOR_LIMIT = 10
+
+    def __init__(self, storage_repository: Optional[ObjectStorageRepository] = None):
+        self.storage_repository = storage_repository
+        self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+
+    def compute(
+        self,
+        schemas: List[SensorSchema],
+        timeseries_data: Dict[str, List[Optional[MeasurementPoint]]]
+    ) -> SensorStatistics:
+        """
+        全データの要約統計量を計算
+
+        Args:
+            schemas: センサーのスキーマ情報
+            timeseries_data: 時系列データ（timestamp -> measurements）
+
+        Returns:
+            要約統計量
+        """
+        statistics = SensorStatistics(schemas)
+        statistics.update(list(timeseries_data.items()))
+        return statistics
+
+    def build_digest(self, statistics: SensorStatistics) -> Dict:
+        """レスポンス用の要約を作成"""
+        summary = statistics.to_dict()
+        empty_sensors = [sensor["name"] for sensor in summary["sensors"] if sensor["count"] == 0]
+        total_cells = summary["row_count"] * summary["sensor_count"]
+        return {
+            "row_count": summary["row_count"],
+            "first_timestamp": summary["first_timestamp"],
+            "last_timestamp": summary["last_timestamp"],
+            "sensors_with_data": summary["sensor_count"] - len(empty_sensors),
+            "sensors_without_data": len(empty_sensors),
+            "empty_sensor_names": empty_sensors[: self.DIGEST_EMPTY_SENSOR_LIMIT],
+            "null_ratio": round(1 - int(statistics.counts.sum()) / total_cells, 6) if total_cells else None,
+        }
+
+
+def _to_float(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
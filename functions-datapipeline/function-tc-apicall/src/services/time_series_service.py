@@ -1,27 +1,71 @@
+import codecs
+import json
 import logging
 import os
-from datetime import datetime
-from typing import Dict, List, Optional
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Optional, Tuple
 
 from ..config import Config
 from ..models import SensorSchema, MeasurementPoint
 from ..repositories.time_series_repository import TimeSeriesRepository
-from ..repositories.storage_repository import StorageRepository
+from ..repositories.storage_repository import GenerationMismatchError, ObjectStorageRepository, StorageRepository
 from .csv_service import CSVService
+from .device_output_service import DeviceOutputService
+from .memory_service import MemoryEstimator, MemoryProfiler
+from .new_data_probe_service import NewDataProbeService
+from .partition_service import PartitionReconciliationService
+from .zone_map_service import ZoneMapIndexService
+
+if TYPE_CHECKING:
+    # numpy / pandas を使うオプション機能は、有効時にのみ main.py から読み込む
+    from .anomaly_service import AnomalyScorer, AnomalyScoringService
+    from .archive_service import ArchiveService
+    from .ring_buffer_service import RingBufferService
+    from .rollup_service import RollupService
+    from .statistics_service import SensorStatistics, SummaryStatisticsService
 
 
 class TimeSeriesService:
     """時系列データ処理のメインビジネスロジック"""
 
+    # 最新のCSVを指すポインタ（function-bq-insert が一覧を取得せずに最新ファイルを特定するために使う）
+    LATEST_POINTER_PATH = "timeseries_data/_latest.json"
+    # ポインタ更新の競合時の試行回数
+    LATEST_POINTER_ATTEMPTS = 3
+
     def __init__(
         self,
         time_series_repository: TimeSeriesRepository,
         storage_repository: Optional[StorageRepository] = None,
         csv_service: Optional[CSVService] = None,
+        partition_service: Optional[PartitionReconciliationService] = None,
+        memory_profiler: Optional[MemoryProfiler] = None,
+        memory_estimator: Optional[MemoryEstimator] = None,
+        statistics_service: Optional["SummaryStatisticsService"] = None,
+        ring_buffer_service: Optional["RingBufferService"] = None,
+        device_output_service: Optional[DeviceOutputService] = None,
+        wide_output: bool = True,
+        archive_service: Optional["ArchiveService"] = None,
+        new_data_probe_service: Optional[NewDataProbeService] = None,
+        anomaly_service: Optional["AnomalyScoringService"] = None,
+        rollup_service: Optional["RollupService"] = None,
+        zone_map_service: Optional[ZoneMapIndexService] = None,
     ):
         self.time_series_repository = time_series_repository
         self.storage_repository = storage_repository
         self.csv_service = csv_service or CSVService()
+        self.partition_service = partition_service
+        self.memory_profiler = memory_profiler
+        self.memory_estimator = memory_estimator
+        self.statistics_service = statistics_service
+        self.ring_buffer_service = ring_buffer_service
+        self.device_output_service = device_output_service
+        self.wide_output = wide_output
+        self.archive_service = archive_service
+        self.new_data_probe_service = new_data_probe_service
+        self.anomaly_service = anomaly_service
+        self.rollup_service = rollup_service
+        self.zone_map_service = zone_map_service
         self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
 
     def process_time_series_data(self) -> Dict:
@@ -32,43 +76,31 @@ class TimeSeriesService:
             処理結果の辞書
         """
         self.logger.info("時系列データ処理開始")
+        profiler = self.memory_profiler or MemoryProfiler()
         
         try:
-            # 時系列データを取得
-            schemas, timeseries_data = self.time_series_repository.fetch_time_series_data()
+            # 前回処理以降に新しい計測がなければ、取得・変換・アップロードを省略
+            probe = None
+            if self.new_data_probe_service:
+                probe = self.new_data_probe_service.check()
+                if not probe["has_new_data"]:
+                    self.logger.info("新しいデータがないため処理をスキップします")
+                    return {"status": "no_new_data", "new_data_probe": probe}
             
-            # 基本の処理結果を作成
-            result = {
-                "data_summary": {
-                    "sensor_count": len(schemas),
-                    "timestamp_count": len(timeseries_data),
-                    "sensors": [
-                        {"name": schema.name, "unit": schema.unit, "type": schema.type}
-                        for schema in schemas[:10]  # 最初の10個のセンサー情報
-                    ],
-                }
-            }
+            # メモリ見積もりが予算を超える場合は省メモリのストリーミングモードで処理
+            memory_guard = self._evaluate_memory_guard()
+            if memory_guard and memory_guard["streaming_mode"]:
+                result = self._process_time_series_stream(profiler)
+            else:
+                result = self._process_time_series_in_memory(profiler)
             
-            # サンプルデータを追加
-            if timeseries_data:
-                first_timestamp = list(timeseries_data.keys())[0]
-                sample_measurements = timeseries_data[first_timestamp]
-                
-                result["sample_data"] = {
-                    "timestamp": first_timestamp,
-                    "measurements": [
-                        {
-                            "min": measurement.min_value if measurement else None,
-                            "max": measurement.max_value if measurement else None,
-                        }
-                        for measurement in sample_measurements[:5]  # 最初の5個の計測値
-                    ],
-                }
-            
-            # CSV保存処理
-            csv_result = self._process_csv_storage(schemas, timeseries_data)
-            if csv_result:
-                result["csv_storage"] = csv_result
+            if memory_guard:
+                result["memory_guard"] = memory_guard
+            if profiler.enabled:
+                result["memory_profile"] = profiler.get_report()
+            if probe:
+                result["new_data_probe"] = probe
+                self._commit_watermark(probe, result)
             
             self.logger.info("時系列データ処理完了")
             return result
@@ -76,11 +108,259 @@ class TimeSeriesService:
         except Exception as e:
             self.logger.error(f"時系列データ処理エラー: {e}")
             raise e
+        
+        finally:
+            profiler.stop()
+
+    def _process_time_series_in_memory(self, profiler: MemoryProfiler) -> Dict:
+        """
+        全データをメモリに展開して処理する（通常モード）
+        
+        Args:
+            profiler: メモリ計測
+            
+        Returns:
+            処理結果の辞書
+        """
+        # 時系列データを取得
+        with profiler.stage("fetch"):
+            schemas, timeseries_data = self.time_series_repository.fetch_time_series_data()
+        MemoryEstimator.record_series_count(len(schemas))
+        
+        # 基本の処理結果を作成
+        result = self._build_data_summary(schemas, len(timeseries_data))
+        
+        # サンプルデータを追加
+        if timeseries_data:
+            first_timestamp = list(timeseries_data.keys())[0]
+            result["sample_data"] = self._build_sample_data(
+                first_timestamp, timeseries_data[first_timestamp]
+            )
+        
+        # CSV保存処理（全センサーの横持ちCSVとデバイス別CSVで同じタイムスタンプを使う）
+        output_timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        csv_result = None
+        if self.wide_output:
+            with profiler.stage("csv_storage"):
+                csv_result = self._process_csv_storage(schemas, timeseries_data, output_timestamp)
+            if csv_result:
+                result["csv_storage"] = csv_result
+        
+        # デバイス別出力
+        if self.device_output_service:
+            with profiler.stage("device_output"):
+                result["device_output"] = self._process_device_output(
+                    schemas, timeseries_data, output_timestamp
+                )
+        
+        # 長期保存用の圧縮アーカイブ
+        if self.archive_service:
+            with profiler.stage("archive"):
+                result["archive"] = self._process_archive(schemas, timeseries_data, output_timestamp)
+        
+        # センサーごとの要約統計量
+        if self.statistics_service:
+            with profiler.stage("statistics"):
+                result["statistics"] = self._process_statistics(
+                    lambda: self.statistics_service.compute(schemas, timeseries_data), csv_result
+                )
+        
+        # 取得時の異常スコア
+        if self.anomaly_service:
+            with profiler.stage("anomaly_scoring"):
+                result["anomaly_scores"] = self._process_anomaly_scores(
+                    lambda: self.anomaly_service.score(schemas, timeseries_data), csv_result
+                )
+        
+        # 直近データのリングバッファ更新
+        if self.ring_buffer_service:
+            with profiler.stage("ring_buffer"):
+                result["ring_buffer"] = self._process_ring_buffer(schemas, timeseries_data)
+        
+        # 多段階ロールアップの差分更新
+        if self.rollup_service:
+            with profiler.stage("rollups"):
+                result["rollups"] = self._process_rollups(schemas, timeseries_data)
+        
+        # 遅延データのパーティションマージ
+        if self.partition_service:
+            with profiler.stage("partition_reconciliation"):
+                result["partition_reconciliation"] = self._process_partition_reconciliation(
+                    schemas, timeseries_data
+                )
+        
+        # 保存したオブジェクトの索引（ゾーンマップ）更新（書き換えたパーティションを含む）
+        if self.zone_map_service and timeseries_data:
+            timestamps = list(timeseries_data.keys())
+            with profiler.stage("zone_map_index"):
+                result["zone_map_index"] = self._process_zone_map_index(
+                    schemas, timestamps[0], timestamps[-1], len(timestamps), result, output_timestamp
+                )
+        
+        return result
+
+    def _process_time_series_stream(self, profiler: MemoryProfiler) -> Dict:
+        """
+        1タイムスタンプずつ読み込みながらCSVを作成する（ストリーミングモード）
+        
+        全データをメモリに保持しないため、パーティションマージは行わない。
+        
+        Args:
+            profiler: メモリ計測
+            
+        Returns:
+            処理結果の辞書
+        """
+        self.logger.info("ストリーミングモードで処理します")
+        
+        with profiler.stage("fetch"):
+            schemas, rows = self.time_series_repository.fetch_time_series_stream()
+        MemoryEstimator.record_series_count(len(schemas))
+        
+        stream_stats = {"timestamp_count": 0, "sample_data": None, "first_timestamp": None, "last_timestamp": None}
+        tracked_rows = self._track_stream_rows(schemas, rows, stream_stats)
+        statistics = None
+        if self.statistics_service:
+            from .statistics_service import SensorStatistics
+            statistics = SensorStatistics(schemas)
+            tracked_rows = self.statistics_service.track(statistics, tracked_rows)
+        scorer = None
+        if self.anomaly_service:
+            scorer = self.anomaly_service.load(schemas)
+            tracked_rows = self.anomaly_service.track(scorer, tracked_rows)
+        
+        csv_result = None
+        with profiler.stage("csv_storage"):
+            if isinstance(self.storage_repository, ObjectStorageRepository):
+                csv_result = self._store_csv_stream(schemas, tracked_rows)
+            elif self.storage_repository:
+                csv_result = self._store_csv(
+                    lambda: self.csv_service.create_csv_from_rows(schemas, tracked_rows)
+                )
+            else:
+                self.logger.info("ストレージリポジトリが設定されていないため、CSV保存をスキップします")
+                for _ in tracked_rows:
+                    pass
+        
+        result = self._build_data_summary(schemas, stream_stats["timestamp_count"])
+        result["processing_mode"] = "streaming"
+        if stream_stats["sample_data"]:
+            result["sample_data"] = stream_stats["sample_data"]
+        if csv_result:
+            result["csv_storage"] = csv_result
+        if statistics:
+            result["statistics"] = self._process_statistics(lambda: statistics, csv_result)
+        if scorer:
+            result["anomaly_scores"] = self._process_anomaly_scores(lambda: scorer, csv_result)
+        if self.zone_map_service and stream_stats["timestamp_count"]:
+            with profiler.stage("zone_map_index"):
+                result["zone_map_index"] = self._process_zone_map_index(
+                    schemas, stream_stats["first_timestamp"], stream_stats["last_timestamp"],
+                    stream_stats["timestamp_count"], result
+                )
+        if self.device_output_service:
+            self.logger.warning("ストリーミングモードではデバイス別出力をスキップします（全センサーのCSVを出力します）")
+        if self.archive_service:
+            self.logger.warning("ストリーミングモードではアーカイブ出力をスキップします")
+        if self.ring_buffer_service:
+            self.logger.warning("ストリーミングモードではリングバッファ更新をスキップします")
+        if self.rollup_service:
+            self.logger.warning("ストリーミングモードではロールアップ更新をスキップします")
+        if self.partition_service:
+            self.logger.warning("ストリーミングモードではパーティションマージをスキップします")
+        
+        return result
+
+    def _track_stream_rows(
+        self,
+        schemas: List[SensorSchema],
+        rows: Iterator[Tuple[str, List[Optional[MeasurementPoint]]]],
+        stream_stats: Dict,
+    ) -> Iterator[Tuple[str, List[Optional[MeasurementPoint]]]]:
+        """ストリーミング行を検証しながら件数・サンプル・先頭と末尾の時刻を記録"""
+        for timestamp, measurements in rows:
+            if len(measurements) != len(schemas):
+                raise ValueError(
+                    f"タイムスタンプ {timestamp} のメジャーメント数 ({len(measurements)}) "
+                    f"がスキーマ数 ({len(schemas)}) と一致しません"
+                )
+            if stream_stats["sample_data"] is None:
+                stream_stats["sample_data"] = self._build_sample_data(timestamp, measurements)
+                stream_stats["first_timestamp"] = timestamp
+            stream_stats["last_timestamp"] = timestamp
+            stream_stats["timestamp_count"] += 1
+            yield timestamp, measurements
+
+    def _commit_watermark(self, probe: Dict, result: Dict) -> None:
+        """有効な出力段階がすべて成功した場合のみウォーターマークを進める（失敗時は次回に再取得）"""
+        # ストリーミングモードで実行しなかった段階も未完了として扱う
+        failed_stages = [
+            stage for stage in self._enabled_output_stages()
+            if not result.get(stage, {}).get("success")
+        ]
+        if failed_stages:
+            self.logger.warning(f"完了していない出力段階があるため、ウォーターマークを更新しません: {', '.join(failed_stages)}")
+            return
+        try:
+            self.new_data_probe_service.commit(probe)
+        except Exception as e:
+            self.logger.error(f"ウォーターマークの更新エラー: {e}")
+
+    def _enabled_output_stages(self) -> List[str]:
+        """有効な出力段階（処理結果のキー）"""
+        stages = {
+            "csv_storage": self.wide_output and self.storage_repository is not None,
+            "device_output": self.device_output_service,
+            "archive": self.archive_service,
+            "statistics": self.statistics_service,
+            "anomaly_scores": self.anomaly_service,
+            "ring_buffer": self.ring_buffer_service,
+            "rollups": self.rollup_service,
+            "partition_reconciliation": self.partition_service,
+        }
+        return [stage for stage, enabled in stages.items() if enabled]
+
+    def _evaluate_memory_guard(self) -> Optional[Dict]:
+        """メモリ見積もりを評価（見積もり未設定時はNone）"""
+        if not self.memory_estimator:
+            return None
+        return self.memory_estimator.evaluate(
+            self.time_series_repository.fetch_window.total_seconds()
+        )
+
+    def _build_data_summary(self, schemas: List[SensorSchema], timestamp_count: int) -> Dict:
+        """データ概要を作成"""
+        return {
+            "data_summary": {
+                "sensor_count": len(schemas),
+                "timestamp_count": timestamp_count,
+                "sensors": [
+                    {"name": schema.name, "unit": schema.unit, "type": schema.type}
+                    for schema in schemas[:10]  # 最初の10個のセンサー情報
+                ],
+            }
+        }
+
+    def _build_sample_data(
+        self, timestamp: str, measurements: List[Optional[MeasurementPoint]]
+    ) -> Dict:
+        """サンプルデータを作成"""
+        return {
+            "timestamp": timestamp,
+            "measurements": [
+                {
+                    "min": measurement.min_value if measurement else None,
+                    "max": measurement.max_value if measurement else None,
+                }
+                for measurement in measurements[:5]  # 最初の5個の計測値
+            ],
+        }
 
     def _process_csv_storage(
         self, 
         schemas: List[SensorSchema], 
-        timeseries_data: Dict[str, List[Optional[MeasurementPoint]]]
+        timeseries_data: Dict[str, List[Optional[MeasurementPoint]]],
+        timestamp: Optional[str] = None
     ) -> Optional[Dict]:
         """
         CSVファイル作成とストレージ保存を処理
@@ -88,6 +368,7 @@ class TimeSeriesService:
         Args:
             schemas: センサーのスキーマ情報
             timeseries_data: 時系列データ
+            timestamp: 出力のタイムスタンプ（省略時は現在時刻）
             
         Returns:
             CSV処理結果の辞書（保存しない場合はNone）
@@ -96,21 +377,37 @@ class TimeSeriesService:
             self.logger.info("ストレージリポジトリが設定されていないため、CSV保存をスキップします")
             return None
         
+        # データ検証
+        if not self.csv_service.validate_csv_data(schemas, timeseries_data):
+            return {
+                "success": False,
+                "error": "CSV データの検証に失敗しました"
+            }
+        
+        return self._store_csv(
+            lambda: self.csv_service.create_csv_from_timeseries(schemas, timeseries_data),
+            timestamp
+        )
+
+    def _store_csv(self, create_csv: Callable[[], str], timestamp: Optional[str] = None) -> Dict:
+        """
+        CSVファイルを作成してストレージにアップロード
+        
+        Args:
+            create_csv: CSVファイルを作成してパスを返す関数
+            timestamp: 出力のタイムスタンプ（省略時は現在時刻）
+            
+        Returns:
+            CSV処理結果の辞書
+        """
         temp_file_path = None
         
         try:
-            # データ検証
-            if not self.csv_service.validate_csv_data(schemas, timeseries_data):
-                return {
-                    "success": False,
-                    "error": "CSV データの検証に失敗しました"
-                }
-            
             # CSVファイルを作成
-            temp_file_path = self.csv_service.create_csv_from_timeseries(schemas, timeseries_data)
+            temp_file_path = create_csv()
             
             # ストレージ用のファイル名を生成
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            timestamp = timestamp or datetime.now().strftime("%Y%m%d_%H%M%S")
             destination_path = f"timeseries_data/{timestamp}.csv"
             
             # ストレージにアップロード
@@ -124,7 +421,8 @@ class TimeSeriesService:
                 "file_url": file_url,
                 "file_size_bytes": file_size,
                 "destination_path": destination_path,
-                "timestamp": timestamp
+                "timestamp": timestamp,
+                "latest_pointer_updated": self._update_latest_pointer(destination_path)
             }
             
         except Exception as e:
@@ -139,6 +437,361 @@ class TimeSeriesService:
             if temp_file_path:
                 self.csv_service.cleanup_temp_file(temp_file_path)
 
+    def _store_csv_stream(
+        self,
+        schemas: List[SensorSchema],
+        rows: Iterator[Tuple[str, List[Optional[MeasurementPoint]]]],
+    ) -> Dict:
+        """
+        CSVを一時ファイルに作成せず、ストレージへ書き込みながら保存（ストリーミングモード）
+        
+        Args:
+            schemas: センサーのスキーマ情報
+            rows: (timestamp, measurements) のイテレータ
+            
+        Returns:
+            CSV処理結果の辞書
+        """
+        try:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            destination_path = f"timeseries_data/{timestamp}.csv"
+            
+            with self.storage_repository.open_writer(destination_path) as f:
+                self.csv_service.write_csv(codecs.getwriter("utf-8")(f), schemas, rows)
+                file_size = f.tell()
+            
+            return {
+                "success": True,
+                "file_url": self.storage_repository.get_object_url(destination_path),
+                "file_size_bytes": file_size,
+                "destination_path": destination_path,
+                "timestamp": timestamp,
+                "latest_pointer_updated": self._update_latest_pointer(destination_path)
+            }
+            
+        except Exception as e:
+            self.logger.error(f"CSV処理・格納エラー: {e}")
+            return {
+                "success": False,
+                "error": str(e)
+            }
+
+    def _update_latest_pointer(self, destination_path: str) -> bool:
+        """
+        最新のCSVを指すポインタを更新（ファイル名の新しい方だけを反映し、古い実行で巻き戻さない）
+        
+        更新は世代を指定した条件付き書き込みで行う。失敗してもCSVの保存は成功として扱う
+        （function-bq-insert は日付で絞った一覧取得にフォールバックする）。
+        
+        Args:
+            destination_path: 保存したCSVのパス
+            
+        Returns:
+            ポインタを更新した場合はTrue
+        """
+        if not isinstance(self.storage_repository, ObjectStorageRepository):
+            self.logger.info("ストレージが条件付き書き込みに対応していないため、最新ファイルのポインタを更新しません")
+            return False
+        try:
+            metadata = self.storage_repository.get_object_metadata(destination_path) or {}
+            pointer = {
+                "name": destination_path,
+                "generation": metadata.get("generation"),
+                "size_bytes": metadata.get("size_bytes"),
+                "updated_at": datetime.now(timezone.utc).isoformat(),
+            }
+            data = json.dumps(pointer).encode("utf-8")
+            for attempt in range(1, self.LATEST_POINTER_ATTEMPTS + 1):
+                current, generation = self.storage_repository.download_bytes_with_generation(
+                    self.LATEST_POINTER_PATH
+                )
+                if current is not None and json.loads(current.decode("utf-8")).get("name", "") > destination_path:
+                    self.logger.info(f"より新しいCSVを指しているため、ポインタを更新しません: {self.LATEST_POINTER_PATH}")
+                    return False
+                try:
+                    self.storage_repository.upload_bytes_if_generation_match(
+                        data, self.LATEST_POINTER_PATH, generation, content_type="application/json"
+                    )
+                    self.logger.info(f"最新ファイルのポインタを更新しました: {destination_path}")
+                    return True
+                except GenerationMismatchError:
+                    self.logger.info(f"ポインタが他の書き込みで更新されたため再試行します（{attempt}回目）")
+            self.logger.warning("競合が続いたため、最新ファイルのポインタを更新できませんでした")
+            return False
+        except Exception as e:
+            self.logger.warning(f"最新ファイルのポインタの更新に失敗しました: {e}")
+            return False
+
+    def _process_statistics(
+        self, compute_statistics: Callable[[], "SensorStatistics"], csv_result: Optional[Dict]
+    ) -> Dict:
+        """
+        要約統計量を計算し、CSVを保存した場合はサイドカーJSONを隣に保存
+        
+        Args:
+            compute_statistics: 要約統計量を返す関数
+            csv_result: CSV処理結果（保存しない場合はNone）
+            
+        Returns:
+            要約統計量のダイジェスト
+        """
+        try:
+            statistics = compute_statistics()
+            result = {"success": True, **self.statistics_service.build_digest(statistics)}
+            if self.statistics_service.storage_repository and csv_result and csv_result.get("success"):
+                result["sidecar_path"] = self.statistics_service.get_sidecar_path(
+                    csv_result["destination_path"]
+                )
+                result["sidecar_url"] = self.statistics_service.store_sidecar(
+                    statistics, csv_result["destination_path"]
+                )
+            return result
+        except Exception as e:
+            self.logger.error(f"要約統計量の処理エラー: {e}")
+            return {
+                "success": False,
+                "error": str(e)
+            }
+
+    def _process_anomaly_scores(
+        self, compute_scores: Callable[[], "AnomalyScorer"], csv_result: Optional[Dict]
+    ) -> Dict:
+        """
+        異常スコアを計算して状態を保存し、CSVを保存した場合はサイドカーJSONを隣に保存（CSVの保存に失敗した場合は状態を保存しない）
+        
+        Args:
+            compute_scores: スコアリング後のスコアラーを返す関数
+            csv_result: CSV処理結果（保存しない場合はNone）
+            
+        Returns:
+            異常スコアの要約
+        """
+        try:
+            scorer = compute_scores()
+            if csv_result and not csv_result.get("success"):
+                # 状態を進めると、次回の再取得時に今回の行が反映済みとして読み飛ばされる
+                self.logger.warning("CSVの保存に失敗したため、異常スコアの状態を保存しません")
+            else:
+                self.anomaly_service.save(scorer)
+            result = {"success": True, **self.anomaly_service.build_digest(scorer)}
+            if csv_result and csv_result.get("success"):
+                result["sidecar_path"] = self.anomaly_service.get_sidecar_path(
+                    csv_result["destination_path"]
+                )
+                result["sidecar_url"] = self.anomaly_service.store_sidecar(
+                    scorer, csv_result["destination_path"]
+                )
+            return result
+        except Exception as e:
+            self.logger.error(f"異常スコアの処理エラー: {e}")
+            return {
+                "success": False,
+                "error": str(e)
+            }
+
+    def _process_device_output(
+        self, 
+        schemas: List[SensorSchema], 
+        timeseries_data: Dict[str, List[Optional[MeasurementPoint]]],
+        timestamp: str
+    ) -> Dict:
+        """
+        デバイス別のCSVとインデックスを保存
+        
+        Args:
+            schemas: センサーのスキーマ情報
+            timeseries_data: 時系列データ
+            timestamp: 出力のタイムスタンプ
+            
+        Returns:
+            保存結果の辞書
+        """
+        if not self.csv_service.validate_csv_data(schemas, timeseries_data):
+            return {
+                "success": False,
+                "error": "CSV データの検証に失敗しました"
+            }
+        
+        try:
+            return self.device_output_service.write(schemas, timeseries_data, timestamp)
+        except Exception as e:
+            self.logger.error(f"デバイス別出力エラー: {e}")
+            return {
+                "success": False,
+                "error": str(e)
+            }
+
+    def _process_archive(
+        self, 
+        schemas: List[SensorSchema], 
+        timeseries_data: Dict[str, List[Optional[MeasurementPoint]]],
+        timestamp: str
+    ) -> Dict:
+        """
+        取得データを圧縮アーカイブとして保存
+        
+        Args:
+            schemas: センサーのスキーマ情報
+            timeseries_data: 時系列データ
+            timestamp: 出力のタイムスタンプ
+            
+        Returns:
+            保存結果の辞書
+        """
+        if not timeseries_data:
+            return {"success": True, "archive_path": None}
+        
+        try:
+            return self.archive_service.write(schemas, timeseries_data, timestamp)
+        except Exception as e:
+            self.logger.error(f"アーカイブ出力エラー: {e}")
+            return {
+                "success": False,
+                "error": str(e)
+            }
+
+    def _process_ring_buffer(
+        self, 
+        schemas: List[SensorSchema], 
+        timeseries_data: Dict[str, List[Optional[MeasurementPoint]]]
+    ) -> Dict:
+        """
+        取得データをリングバッファに反映
+        
+        Args:
+            schemas: センサーのスキーマ情報
+            timeseries_data: 時系列データ
+            
+        Returns:
+            更新結果の辞書
+        """
+        if not timeseries_data:
+            return {"success": True, "rows_written": 0}
+        
+        try:
+            return self.ring_buffer_service.update(schemas, timeseries_data)
+        except Exception as e:
+            self.logger.error(f"リングバッファ更新エラー: {e}")
+            return {
+                "success": False,
+                "error": str(e)
+            }
+
+    def _process_rollups(
+        self, 
+        schemas: List[SensorSchema], 
+        timeseries_data: Dict[str, List[Optional[MeasurementPoint]]]
+    ) -> Dict:
+        """
+        取得データで多段階ロールアップを更新
+        
+        Args:
+            schemas: センサーのスキーマ情報
+            timeseries_data: 時系列データ
+            
+        Returns:
+            更新結果の辞書
+        """
+        if not timeseries_data:
+            return {"success": True, "levels": {}}
+        
+        try:
+            return self.rollup_service.update(schemas, timeseries_data)
+        except Exception as e:
+            self.logger.error(f"ロールアップ更新エラー: {e}")
+            return {
+                "success": False,
+                "error": str(e)
+            }
+
+    def _process_zone_map_index(
+        self,
+        schemas: List[SensorSchema],
+        first_timestamp: str,
+        last_timestamp: str,
+        row_count: int,
+        result: Dict,
+        timestamp: Optional[str] = None
+    ) -> Dict:
+        """
+        保存に成功したCSV・デバイス別CSV・アーカイブ・書き換えたパーティションを索引に追加
+        
+        Args:
+            schemas: センサーのスキーマ情報
+            first_timestamp: 先頭行の時刻
+            last_timestamp: 末尾行の時刻
+            row_count: 行数
+            result: 各出力の保存結果を含む処理結果
+            timestamp: 出力のタイムスタンプ（デバイス別CSVのパスに使用）
+            
+        Returns:
+            更新結果の辞書
+        """
+        sensor_names = [schema.name for schema in schemas]
+        summary = {"first_timestamp": first_timestamp, "last_timestamp": last_timestamp, "row_count": row_count}
+        objects = []
+        
+        csv_result = result.get("csv_storage")
+        if csv_result and csv_result.get("success"):
+            objects.append({"path": csv_result["destination_path"], "sensors": sensor_names, **summary})
+        
+        device_result = result.get("device_output")
+        if device_result and device_result.get("success") and timestamp:
+            for device, columns in self.device_output_service.group_columns(schemas).items():
+                objects.append({
+                    "path": self.device_output_service.get_device_path(timestamp, device),
+                    "sensors": [sensor_names[k] for k in columns],
+                    **summary,
+                })
+        
+        archive_result = result.get("archive")
+        if archive_result and archive_result.get("success") and archive_result.get("archive_path"):
+            objects.append({"path": archive_result["archive_path"], "sensors": sensor_names, **summary})
+        
+        # パーティションは既存の行とマージした内容のため、パーティション自体の時刻範囲・行数を使う
+        partition_result = result.get("partition_reconciliation")
+        if partition_result and partition_result.get("success"):
+            objects.extend(partition_result.get("partition_objects", []))
+        
+        if not objects:
+            return {"success": True, "objects_recorded": 0}
+        
+        try:
+            return self.zone_map_service.record(objects)
+        except Exception as e:
+            self.logger.error(f"索引更新エラー: {e}")
+            return {
+                "success": False,
+                "error": str(e)
+            }
+
+    def _process_partition_reconciliation(
+        self, 
+        schemas: List[SensorSchema], 
+        timeseries_data: Dict[str, List[Optional[MeasurementPoint]]]
+    ) -> Dict:
+        """
+        取得データを既存の日付パーティションへマージ
+        
+        Args:
+            schemas: センサーのスキーマ情報
+            timeseries_data: 時系列データ
+            
+        Returns:
+            マージ結果の辞書
+        """
+        if not timeseries_data:
+            return {"success": True, "partitions_checked": 0, "partitions_rewritten": []}
+        
+        try:
+            return self.partition_service.reconcile(schemas, timeseries_data)
+        except Exception as e:
+            self.logger.error(f"パーティションマージエラー: {e}")
+            return {
+                "success": False,
+                "error": str(e)
+            }
+
     def get_config_validation_error(self, config: Config) -> Optional[str]:
         """
         設定の検証エラーを取得
@@ -0,0 +1,142 @@
+import itertools
+import operator
+from dataclasses import dataclass
+from operator import attrgetter
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..models import MeasurementPoint
+
+
+# 計測値の (min_value, max_value) をまとめて取り出す
+_MIN_MAX = attrgetter("min_value", "max_value")
+# float64 で正確に表現できる整数の上限
+_MAX_EXACT_INT = 2 ** 53
+# セルの値の型（int と float を区別して出力するため）
+_KIND_INT, _KIND_FLOAT, _KIND_NONE = 1, 2, 3
+_CELL_KINDS = {int: _KIND_INT, float: _KIND_FLOAT, type(None): _KIND_NONE}
+
+
+def to_timestamp_ms(timestamps: Sequence[str]) -> np.ndarray:
+    """
+    ISO 8601 形式のタイムスタンプを epoch ミリ秒に変換
+
+    Args:
+        timestamps: タイムスタンプ文字列
+
+    Returns:
+        epoch ms（int64）
+    """
+    return (pd.to_datetime(list(timestamps), utc=True, format="ISO8601").asi8 // 1_000_000).astype(np.int64)
+
+
+def to_value_matrices(
+    sensor_count: int,
+    measurement_lists: Iterable[List[Optional[MeasurementPoint]]],
+    dtype=np.float64,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    計測値のリストを最小値・最大値の行列に変換（欠損はNaN）
+
+    Args:
+        sensor_count: センサー数
+        measurement_lists: 行ごとの計測値リスト
+        dtype: 行列の型
+
+    Returns:
+        最小値と最大値の行列（行数 × センサー数）
+    """
+    points = list(itertools.chain.from_iterable(measurement_lists))
+    present = np.fromiter(
+        map(operator.is_not, points, itertools.repeat(None)), dtype=bool, count=len(points)
+    )
+    present_points = list(itertools.compress(points, present.tolist()))
+
+    matrices = []
+    for attribute in ("min_value", "max_value"):
+        values = np.full(len(points), np.nan, dtype=dtype)
+        values[present] = np.array(list(map(attrgetter(attribute), present_points)), dtype=np.float64)
+        matrices.append(values.reshape(-1, sensor_count) if sensor_count else values.reshape(0, 0))
+    return matrices[0], matrices[1]
+
+
+@dataclass
+class CellBlock:
+    """
+    行ブロックのセル（CSVの列順: センサーごとに min, max）を数値として保持したもの
+
+    values は float64（欠損はNaN）、integers は値が int だったセル。
+    exact が False の場合は、int / float / None 以外の値、float64 で表せない整数、
+    値としてのNaNなどを含み、数値から元の値の文字列表現を復元できない。
+    """
+
+    timestamps: List[str]
+    values: np.ndarray
+    integers: np.ndarray
+    exact: bool
+
+
+def to_cell_block(
+    timestamps: Sequence[str],
+    measurement_lists: Sequence[List[Optional[MeasurementPoint]]],
+    sensor_count: int,
+) -> CellBlock:
+    """
+    行ブロックの計測値をセルの行列に変換
+
+    型の確認は整数値とNaNのセルのみ行う（それ以外は float と確定できる）。
+
+    Args:
+        timestamps: 各行のタイムスタンプ
+        measurement_lists: 各行の計測値リスト
+        sensor_count: センサー数
+
+    Returns:
+        セルの行列
+    """
+    row_count = len(timestamps)
+    points = list(itertools.chain.from_iterable(measurement_lists))
+    if len(points) != row_count * sensor_count:
+        raise ValueError(f"計測値の数 ({len(points)}) が 行数 × センサー数 ({row_count} × {sensor_count}) と一致しません")
+    present = np.fromiter(
+        map(operator.is_not, points, itertools.repeat(None)), dtype=bool, count=len(points)
+    )
+    cells = list(itertools.chain.from_iterable(map(_MIN_MAX, itertools.compress(points, present.tolist()))))
+
+    values = np.full((row_count, 2 * sensor_count), np.nan)
+    integers = np.zeros((row_count, 2 * sensor_count), dtype=bool)
+    block = CellBlock(list(timestamps), values, integers, exact=True)
+    if not cells:
+        return block
+    try:
+        numbers = np.array(cells, dtype=np.float64)
+    except (TypeError, ValueError, OverflowError):
+        block.exact = False
+        return block
+
+    with np.errstate(invalid="ignore"):
+        ambiguous = np.flatnonzero((numbers == np.trunc(numbers)) | np.isnan(numbers))
+    number_integers = np.zeros(len(cells), dtype=bool)
+    if len(ambiguous):
+        kinds = np.fromiter(
+            map(_CELL_KINDS.get, map(type, map(cells.__getitem__, ambiguous.tolist())), itertools.repeat(0)),
+            dtype=np.int8,
+            count=len(ambiguous),
+        )
+        # NaN は None（欠損）のみ、整数値は int / float のみ復元できる
+        nan_cells = np.isnan(numbers[ambiguous])
+        is_int = kinds == _KIND_INT
+        if not np.all(np.where(nan_cells, kinds == _KIND_NONE, is_int | (kinds == _KIND_FLOAT))):
+            block.exact = False
+            return block
+        number_integers[ambiguous] = is_int
+        if is_int.any() and np.abs(numbers[ambiguous[is_int]]).max() >= _MAX_EXACT_INT:
+            block.exact = False
+            return block
+
+    cell_present = np.repeat(present, 2).reshape(row_count, 2 * sensor_count)
+    values[cell_present] = numbers
+    integers[cell_present] = number_integers
+    return block
@@ -0,0 +1,174 @@
+import datetime
+import hashlib
+import json
+import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from ..repositories.bloom_filter import SensorBloomFilter
+from ..repositories.storage_repository import GenerationMismatchError, ObjectStorageRepository
+
+
+class ZoneMapIndexService:
+    """
+    ソースごとのデータオブジェクトの索引（ゾーンマップ）を管理するサービス
+
+    索引は timeseries_index/{source}/index.json に保存し、オブジェクトごとに
+    最小・最大時刻、行数、バイト数、世代、含まれるセンサーのブルームフィルタを持つ。
+    更新は世代を指定した条件付き書き込み（compare-and-swap）で行い、競合時は読み直して再試行する。
+    更新時に、削除されたオブジェクトと記録後に書き換えられた（世代が変わった）オブジェクトの項目を取り除く。
+    同じセンサー構成のフィルタは1つにまとめて保存する。
+    """
+
+    VERSION = 1
+    # 競合時の再試行回数
+    MAX_ATTEMPTS = 5
+    # 再試行までの待ち時間の上限（秒）
+    MAX_BACKOFF_SECONDS = 2.0
+    # 既存項目のメタデータ確認の並列数
+    VERIFY_WORKERS = 16
+
+    def __init__(self, storage_repository: ObjectStorageRepository, source: str, prefix: str = "timeseries_index"):
+        self.storage_repository = storage_repository
+        self.source = source
+        self.prefix = prefix
+        self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+
+    def get_index_path(self) -> str:
+        """索引のオブジェクトパスを取得"""
+        return f"{self.prefix}/{self.source}/index.json"
+
+    def record(self, objects: List[Dict]) -> Dict:
+        """
+        書き込んだオブジェクトを索引に追加（同じパスは置き換え、古くなった項目は削除）
+
+        Args:
+            objects: path, sensors, first_timestamp, last_timestamp, row_count を持つ辞書のリスト
+
+        Returns:
+            更新結果の辞書
+        """
+        entries = {}
+        filters = {}
+        for obj in objects:
+            metadata = self.storage_repository.get_object_metadata(obj["path"])
+            if metadata is None:
+                self.logger.warning(f"索引対象のオブジェクトが存在しません: {obj['path']}")
+                continue
+            filter_id = self._filter_id(obj["sensors"])
+            filters.setdefault(filter_id, SensorBloomFilter.build(obj["sensors"]).to_dict())
+            entries[obj["path"]] = {
+                "min_timestamp_ms": _to_epoch_ms(obj["first_timestamp"]),
+                "max_timestamp_ms": _to_epoch_ms(obj["last_timestamp"]),
+                "row_count": obj["row_count"],
+                "size_bytes": metadata["size_bytes"],
+                "generation": metadata["generation"],
+                "sensor_count": len(obj["sensors"]),
+                "filter": filter_id,
+            }
+
+        index_path = self.get_index_path()
+        # 既存項目の現在のメタデータ（再試行時は新しく加わった項目のみ確認する）
+        current_metadata: Dict[str, Optional[Dict]] = {}
+        for attempt in range(1, self.MAX_ATTEMPTS + 1):
+            index, generation = self._load_index()
+            unchecked = [path for path in index["objects"] if path not in entries and path not in current_metadata]
+            current_metadata.update(self._get_metadata(unchecked))
+            stale = [
+                path for path, entry in index["objects"].items()
+                if path not in entries and (
+                    current_metadata[path] is None or current_metadata[path]["generation"] != entry["generation"]
+                )
+            ]
+            for path in stale:
+                del index["objects"][path]
+            index["objects"].update(entries)
+            index["filters"].update(filters)
+            referenced = {entry["filter"] for entry in index["objects"].values()}
+            index["filters"] = {key: value for key, value in index["filters"].items() if key in referenced}
+            index["updated_at"] = datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+            data = json.dumps(index, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            try:
+                self.storage_repository.upload_bytes_if_generation_match(
+                    data, index_path, generation, content_type="application/json"
+                )
+            except GenerationMismatchError:
+                if attempt == self.MAX_ATTEMPTS:
+                    raise
+                self.logger.info(f"索引が他の書き込みで更新されたため再試行します（{attempt}回目）")
+                time.sleep(random.uniform(0, min(0.1 * 2 ** attempt, self.MAX_BACKOFF_SECONDS)))
+                continue
+
+            self.logger.info(
+                f"索引を更新しました: {index_path} "
+                f"(追加: {len(entries)}件, 削除: {len(stale)}件, 全体: {len(index['objects'])}件)"
+            )
+            return {
+                "success": True,
+                "index_path": index_path,
+                "objects_recorded": len(entries),
+                "objects_removed": len(stale),
+                "object_count": len(index["objects"]),
+                "size_bytes": len(data),
+                "attempts": attempt,
+            }
+
+    def find(
+        self,
+        start_ms: Optional[int] = None,
+        end_ms: Optional[int] = None,
+        sensor: Optional[str] = None,
+    ) -> List[Dict]:
+        """
+        時刻範囲とセンサーで絞り込んだオブジェクトを取得（データはダウンロードしない）
+
+        Args:
+            start_ms: 開始時刻（epoch ms, 省略時は制限なし）
+            end_ms: 終了時刻（epoch ms, 含む。省略時は制限なし）
+            sensor: センサー名（省略時は制限なし。ブルームフィルタのため誤って含まれる場合がある）
+
+        Returns:
+            path を含むオブジェクトの情報（最小時刻の昇順）
+        """
+        index, _ = self._load_index()
+        filters = {key: SensorBloomFilter.from_dict(value) for key, value in index["filters"].items()}
+        matches = []
+        for path, entry in index["objects"].items():
+            if start_ms is not None and entry["max_timestamp_ms"] < start_ms:
+                continue
+            if end_ms is not None and entry["min_timestamp_ms"] > end_ms:
+                continue
+            if sensor is not None and not filters[entry["filter"]].might_contain(sensor):
+                continue
+            matches.append({"path": path, **entry})
+        return sorted(matches, key=lambda entry: entry["min_timestamp_ms"])
+
+    def _get_metadata(self, paths: List[str]) -> Dict[str, Optional[Dict]]:
+        """オブジェクトのメタデータを並列に取得（存在しない場合はNone）"""
+        if not paths:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(self.VERIFY_WORKERS, len(paths))) as executor:
+            return dict(zip(paths, executor.map(self.storage_repository.get_object_metadata, paths)))
+
+    def _load_index(self):
+        """索引と読み込んだ世代を取得（存在しない場合は空の索引と世代0）"""
+        data, generation = self.storage_repository.download_bytes_with_generation(self.get_index_path())
+        if data is None:
+            return {"version": self.VERSION, "source": self.source, "filters": {}, "objects": {}}, 0
+        return json.loads(data.decode("utf-8")), generation
+
+    @staticmethod
+    def _filter_id(sensors: List[str]) -> str:
+        """センサー構成ごとのフィルタID"""
+        return hashlib.blake2b("\n".join(sorted(sensors)).encode("utf-8"), digest_size=8).hexdigest()
+
+
+def _to_epoch_ms(timestamp: str) -> int:
+    """ISO 8601 のタイムスタンプを epoch ms に変換（タイムゾーンなしはUTC）"""
+    parsed = datetime.datetime.fromisoformat(timestamp)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+    return int(parsed.timestamp() * 1000)
@@ -0,0 +1,105 @@
+import builtins
+import importlib.util
+import logging
+import sys
+import time
+from typing import Dict, List, Optional
+
+
+class StartupProfiler:
+    """
+    起動時（モジュール読み込み時）のインポート時間をモジュールごとに計測する
+
+    builtins.__import__ を差し替え、初回に読み込まれたモジュールの累積時間
+    （依存モジュールを含む）と自身の時間を記録する。python -X importtime と同じ考え方で、
+    Cloud Functions のようにインタプリタの起動オプションを指定できない環境で使う。
+    """
+
+    def __init__(self, enabled: bool = False, top_n: int = 15):
+        self.enabled = enabled
+        self.top_n = top_n
+        self.import_seconds: Optional[float] = None
+        self.requests_served = 0
+        self._records: Dict[str, List[float]] = {}
+        self._stack: List[List[float]] = []
+        self._original_import = None
+        self._started_at = 0.0
+        self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+
+    def start(self) -> None:
+        """インポートの計測を開始"""
+        if not self.enabled:
+            return
+        self._original_import = builtins.__import__
+        self._started_at = time.perf_counter()
+        builtins.__import__ = self._timed_import
+
+    def stop(self) -> None:
+        """インポートの計測を終了し、結果をログに出力"""
+        if not self.enabled or self._original_import is None:
+            return
+        builtins.__import__ = self._original_import
+        self._original_import = None
+        self.import_seconds = time.perf_counter() - self._started_at
+        self.logger.info(f"起動時のインポート時間: {self.import_seconds:.3f}秒")
+        for module in self.get_top_modules():
+            self.logger.info(
+                f"  {module['module']}: 累積 {module['cumulative_ms']}ms, 自身 {module['self_ms']}ms"
+            )
+
+    def get_top_modules(self) -> List[Dict]:
+        """累積時間の長い順にモジュールを取得"""
+        records = sorted(self._records.items(), key=lambda item: -item[1][0])
+        return [
+            {"module": name, "cumulative_ms": round(cumulative * 1000, 1), "self_ms": round(own * 1000, 1)}
+            for name, (cumulative, own) in records[: self.top_n]
+        ]
+
+    def get_report(self, setup_seconds: float) -> Dict:
+        """
+        レスポンス用のレポートを作成（呼び出しごとに処理済みリクエスト数を加算）
+
+        Args:
+            setup_seconds: リクエスト内の設定読み込み・依存関係構築の時間
+
+        Returns:
+            起動時間のレポート
+        """
+        self.requests_served += 1
+        return {
+            "cold_start": self.requests_served == 1,
+            "import_seconds": round(self.import_seconds, 3) if self.import_seconds is not None else None,
+            "setup_seconds": round(setup_seconds, 4),
+            "top_imports": self.get_top_modules(),
+        }
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        module_name = self._resolve_name(name, globals, level)
+        if module_name is None or module_name in sys.modules:
+            return self._original_import(name, globals, locals, fromlist, level)
+
+        # [子モジュールの累積時間の合計]
+        frame = [0.0]
+        self._stack.append(frame)
+        start = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start
+            self._stack.pop()
+            if self._stack:
+                self._stack[-1][0] += elapsed
+            self._records.setdefault(module_name, [elapsed, elapsed - frame[0]])
+
+    @staticmethod
+    def _resolve_name(name: str, globals: Optional[Dict], level: int) -> Optional[str]:
+        """相対インポートを絶対モジュール名に解決（解決できない場合はNone）"""
+        if not level:
+            return name
+        package = (globals or {}).get("__package__")
+        if not package:
+            return None
+        try:
+            return importlib.util.resolve_name("." * level + name, package)
+        except ImportError:
+            return None
@@ -0,0 +1,47 @@
+import csv
+import io
+
+from src.models import MeasurementPoint
+from src.services.csv_encoder import BulkCSVEncoder
+
+
+def _standard(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for timestamp, measurements in rows:
+        row = [timestamp]
+        for measurement in measurements:
+            if measurement:
+                row.extend([measurement.min_value, measurement.max_value])
+            else:
+                row.extend([None, None])
+        writer.writerow(row)
+    return buffer.getvalue()
+
+
+def _bulk(rows, sensor_count, block_rows=2):
+    buffer = io.StringIO()
+    written = BulkCSVEncoder(block_rows=block_rows).write_rows(buffer, sensor_count, rows)
+    assert written == len(rows)
+    return buffer.getvalue()
+
+
+def test_output_matches_csv_writer():
+    rows = [
+        ("2026-10-01T00:00:00.000Z", [MeasurementPoint(51, 51), MeasurementPoint(51.0, 0.1 + 0.2), None]),
+        ("2026-10-01T00:01:00.000Z", [MeasurementPoint(-0.0, 0.0), MeasurementPoint(None, 3), MeasurementPoint(1e16, -7)]),
+        ('2026-10-01 "quoted", row', [None, None, MeasurementPoint(float("inf"), 2 ** 53 - 1)]),
+    ]
+
+    assert _bulk(rows, 3) == _standard(rows)
+
+
+def test_values_that_cannot_round_trip_fall_back_to_csv_writer():
+    rows = [
+        ("2026-10-01T00:00:00.000Z", [MeasurementPoint(True, 1)]),
+        ("2026-10-01T00:01:00.000Z", [MeasurementPoint(2 ** 60, 1)]),
+        ("2026-10-01T00:02:00.000Z", [MeasurementPoint(float("nan"), "12")]),
+        ("2026-10-01T00:03:00.000Z", [MeasurementPoint(1.5, 2)]),
+    ]
+
+    assert _bulk(rows, 1, block_rows=1) == _standard(rows)
@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+from src.models import MeasurementPoint, SensorSchema
+from src.repositories.storage_repository import LocalStorageRepository
+from src.services.device_output_service import DeviceOutputService
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return LocalStorageRepository(str(tmp_path))
+
+
+@pytest.fixture
+def service(storage):
+    return DeviceOutputService(storage, max_workers=2)
+
+
+@pytest.mark.parametrize(
+    "device, file_name",
+    [
+        ("boiler-1", "boiler-1.csv"),
+        ("floor/2", "floor%2F2.csv"),
+        ("%2F", "%252F.csv"),
+        ("_ungrouped", "%5Fungrouped.csv"),
+        ("温度計", "%E6%B8%A9%E5%BA%A6%E8%A8%88.csv"),
+        (None, "_ungrouped.csv"),
+    ],
+)
+def test_device_file_names_are_encoded(service, device, file_name):
+    assert service.get_device_path("20261001_000000", device) == f"timeseries_devices/20261001_000000/{file_name}"
+
+
+def test_device_file_names_do_not_collide(service):
+    devices = ["a/b", "a%2Fb", "_ungrouped", "%5Fungrouped", None]
+
+    paths = {service.get_device_path("20261001_000000", device) for device in devices}
+
+    assert len(paths) == len(devices)
+
+
+def test_write_splits_columns_by_device(storage, service):
+    schemas = [
+        SensorSchema(name="floor/2:temperature", unit="", type="float"),
+        SensorSchema(name="pressure", unit="", type="float"),
+        SensorSchema(name="floor/2:humidity", unit="", type="float"),
+    ]
+    timeseries_data = {"2026-10-01T00:00:00": [MeasurementPoint(1, 2), MeasurementPoint(3, 4), None]}
+
+    result = service.write(schemas, timeseries_data, "20261001_000000")
+
+    assert result["device_count"] == 2
+    index = json.loads(storage.download_bytes(result["index_path"]))
+    device_entry = index["devices"]["floor/2"]
+    assert device_entry["path"] == "timeseries_devices/20261001_000000/floor%2F2.csv"
+    assert device_entry["sensors"] == ["floor/2:temperature", "floor/2:humidity"]
+    assert index["ungrouped"]["sensors"] == ["pressure"]
+    assert storage.download_bytes(device_entry["path"]).decode("utf-8").splitlines() == [
+        "timestamp,floor/2:temperature_min,floor/2:temperature_max,floor/2:humidity_min,floor/2:humidity_max",
+        "2026-10-01T00:00:00,1,2,,",
+    ]
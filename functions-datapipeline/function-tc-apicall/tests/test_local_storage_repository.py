@@ -0,0 +1,41 @@
+import pytest
+
+from src.repositories.storage_repository import GenerationMismatchError, LocalStorageRepository
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return LocalStorageRepository(str(tmp_path))
+
+
+def test_missing_object_has_generation_zero(storage):
+    assert storage.download_bytes_with_generation("state/missing.json") == (None, 0)
+    assert storage.get_object_metadata("state/missing.json") is None
+
+
+def test_conditional_write_creates_only_when_absent(storage):
+    generation = storage.upload_bytes_if_generation_match(b"first", "state/value.json", 0)
+
+    assert 0 < generation < 2 ** 53
+    assert storage.download_bytes_with_generation("state/value.json") == (b"first", generation)
+    with pytest.raises(GenerationMismatchError):
+        storage.upload_bytes_if_generation_match(b"second", "state/value.json", 0)
+
+
+def test_conditional_write_rejects_stale_generation(storage):
+    first = storage.upload_bytes_if_generation_match(b"first", "state/value.json", 0)
+    second = storage.upload_bytes_if_generation_match(b"second", "state/value.json", first)
+
+    assert second != first
+    assert storage.get_object_metadata("state/value.json") == {"generation": second, "size_bytes": 6}
+    with pytest.raises(GenerationMismatchError):
+        storage.upload_bytes_if_generation_match(b"third", "state/value.json", first)
+    assert storage.download_bytes("state/value.json") == b"second"
+
+
+def test_unconditional_write_changes_generation(storage):
+    generation = storage.upload_bytes_if_generation_match(b"first", "state/value.json", 0)
+    storage.upload_bytes(b"other", "state/value.json")
+
+    with pytest.raises(GenerationMismatchError):
+        storage.upload_bytes_if_generation_match(b"third", "state/value.json", generation)
@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+from src.repositories.storage_repository import LocalStorageRepository
+from src.services.new_data_probe_service import NewDataProbeService
+
+
+class FakeLatestRepository:
+    def __init__(self, latest_time):
+        self.latest_time = latest_time
+
+    def fetch_latest_measurement_time(self):
+        return self.latest_time
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return LocalStorageRepository(str(tmp_path))
+
+
+def _service(storage, latest_time):
+    return NewDataProbeService(FakeLatestRepository(latest_time), storage, "source")
+
+
+def _stored_watermark(storage, service):
+    return json.loads(storage.download_bytes(service.get_watermark_path()))["latest_measurement_time"]
+
+
+def test_check_compares_with_committed_watermark(storage):
+    service = _service(storage, "2026-10-01T00:05:00Z")
+    probe = service.check()
+    assert probe["has_new_data"] is True
+
+    service.commit(probe)
+
+    assert service.check()["has_new_data"] is False
+
+
+def test_check_fails_open_when_watermark_cannot_be_compared(storage):
+    service = _service(storage, "2026-10-01T00:05:00Z")
+    storage.upload_bytes(json.dumps({"latest_measurement_time": "not-a-time"}).encode("utf-8"), service.get_watermark_path())
+
+    probe = service.check()
+
+    assert probe["has_new_data"] is True
+    assert probe["latest_measurement_time"] is None
+    assert "error" in probe
+
+    service.commit({"latest_measurement_time": "2026-10-01T00:05:00Z"})
+    assert service.check()["has_new_data"] is False
+
+
+def test_commit_does_not_move_watermark_backwards(storage):
+    newer = _service(storage, "2026-10-01T00:10:00Z")
+    older = _service(storage, "2026-10-01T00:05:00Z")
+    newer_probe = newer.check()
+    older_probe = older.check()
+
+    newer.commit(newer_probe)
+    older.commit(older_probe)
+
+    assert _stored_watermark(storage, newer) == "2026-10-01T00:10:00Z"
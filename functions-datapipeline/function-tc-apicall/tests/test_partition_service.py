@@ -0,0 +1,108 @@
+import pytest
+
+from src.models import MeasurementPoint, SensorSchema
+from src.repositories.storage_repository import GenerationMismatchError, LocalStorageRepository
+from src.services.partition_service import PartitionReconciliationService
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return LocalStorageRepository(str(tmp_path))
+
+
+@pytest.fixture
+def service(storage):
+    return PartitionReconciliationService(storage, "source")
+
+
+def _schemas(*names):
+    return [SensorSchema(name=name, unit="", type="") for name in names]
+
+
+def test_merge_sorted_interleaves_and_overwrites_per_sensor(service):
+    existing = [
+        ("2026-10-01T00:00:00", {"a": ("1", "2"), "b": ("3", "4")}),
+        ("2026-10-01T00:02:00", {"a": ("5", "6"), "b": ("7", "8")}),
+    ]
+    new = [
+        ("2026-10-01T00:01:00", {"a": ("9", "9"), "b": ("", "")}),
+        ("2026-10-01T00:02:00", {"a": ("", ""), "b": ("0", "1")}),
+        ("2026-10-01T00:03:00", {"a": ("2", "2"), "b": ("", "")}),
+    ]
+    stats = {"inserted": 0, "updated": 0}
+
+    merged = list(service._merge_sorted(existing, new, stats))
+
+    assert [row[0] for row in merged] == [
+        "2026-10-01T00:00:00", "2026-10-01T00:01:00", "2026-10-01T00:02:00", "2026-10-01T00:03:00",
+    ]
+    # 同一時刻は値を持つセンサーのみ後勝ち
+    assert merged[2][1] == {"a": ("5", "6"), "b": ("0", "1")}
+    assert stats == {"inserted": 2, "updated": 1}
+
+
+def test_merge_sorted_does_not_count_identical_rows(service):
+    rows = [("2026-10-01T00:00:00", {"a": ("1", "2")})]
+    stats = {"inserted": 0, "updated": 0}
+
+    assert list(service._merge_sorted(rows, list(rows), stats)) == rows
+    assert stats == {"inserted": 0, "updated": 0}
+
+
+def test_reconcile_adds_late_rows_and_skips_unchanged_partitions(storage, service):
+    service.reconcile(_schemas("a"), {"2026-10-01T00:01:00": [MeasurementPoint(1, 2)]})
+
+    result = service.reconcile(
+        _schemas("a", "b"),
+        {
+            "2026-10-01T00:00:00": [MeasurementPoint(3, 4), None],
+            "2026-10-02T00:00:00": [None, MeasurementPoint(5.5, 6)],
+        },
+    )
+
+    assert result["rows_inserted"] == 2
+    assert [entry["row_count"] for entry in result["partition_objects"]] == [2, 1]
+    assert storage.download_bytes(service.get_partition_path("2026-10-01")) == (
+        b"timestamp,a_min,a_max,b_min,b_max\r\n"
+        b"2026-10-01T00:00:00,3,4,,\r\n"
+        b"2026-10-01T00:01:00,1,2,,\r\n"
+    )
+    unchanged = service.reconcile(_schemas("a", "b"), {"2026-10-01T00:00:00": [MeasurementPoint(3, 4), None]})
+    assert unchanged["partitions_rewritten"] == []
+
+
+def test_reconcile_retries_when_partition_changes_concurrently(storage, service, monkeypatch):
+    monkeypatch.setattr("src.services.partition_service.time.sleep", lambda seconds: None)
+    path = service.get_partition_path("2026-10-01")
+    storage.upload_bytes(b"timestamp,a_min,a_max\r\n2026-10-01T00:05:00,1,1\r\n", path)
+    original_upload = storage.upload_bytes_if_generation_match
+    calls = []
+
+    def racing_upload(data, destination_path, generation, content_type=None):
+        calls.append(generation)
+        if len(calls) == 1:
+            # 他の実行が先にパーティションを書き換えた状態を再現する
+            storage.upload_bytes(b"timestamp,a_min,a_max\r\n2026-10-01T00:06:00,2,2\r\n", path)
+        return original_upload(data, destination_path, generation, content_type=content_type)
+
+    monkeypatch.setattr(storage, "upload_bytes_if_generation_match", racing_upload)
+
+    result = service.reconcile(_schemas("a"), {"2026-10-01T00:00:00": [MeasurementPoint(0, 0)]})
+
+    assert len(calls) == 2
+    assert result["partition_objects"][0]["row_count"] == 2
+    assert storage.download_bytes(path) == (
+        b"timestamp,a_min,a_max\r\n2026-10-01T00:00:00,0,0\r\n2026-10-01T00:06:00,2,2\r\n"
+    )
+
+
+def test_reconcile_gives_up_after_max_attempts(storage, service, monkeypatch):
+    monkeypatch.setattr("src.services.partition_service.time.sleep", lambda seconds: None)
+
+    def always_conflicts(data, destination_path, generation, content_type=None):
+        raise GenerationMismatchError(destination_path)
+
+    monkeypatch.setattr(storage, "upload_bytes_if_generation_match", always_conflicts)
+
+    with pytest.raises(GenerationMismatchError):
+        service.reconcile(_schemas("a"), {"2026-10-01T00:00:00": [MeasurementPoint(0, 0)]})
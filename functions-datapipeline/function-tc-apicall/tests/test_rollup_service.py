@@ -0,0 +1,77 @@
+import datetime
+
+import numpy as np
+import pytest
+
+from src.models import MeasurementPoint, SensorSchema
+from src.repositories.storage_repository import LocalStorageRepository
+from src.services.rollup_service import RollupService
+
+
+START = datetime.datetime(2026, 10, 10)
+SCHEMAS = [SensorSchema(name="a", unit="", type="float"), SensorSchema(name="b", unit="", type="float")]
+
+
+@pytest.fixture
+def service(tmp_path):
+    return RollupService(LocalStorageRepository(str(tmp_path)), "source")
+
+
+def _rows(start: datetime.datetime, minutes: int, value: float = 2.0):
+    return {
+        (start + datetime.timedelta(minutes=k)).strftime("%Y-%m-%dT%H:%M:%S"): [
+            MeasurementPoint(min_value=value - 1, max_value=value + 1), None
+        ]
+        for k in range(minutes)
+    }
+
+
+def test_levels_round_trip(service):
+    result = service.update(SCHEMAS, _rows(START, 120))
+
+    assert result["levels"]["1m"]["bucket_count"] == 120
+    assert [len(service.read(name).buckets) for name in ("1m", "5m", "1h", "1d")] == [120, 24, 2, 1]
+    daily = service.read("1d")
+    assert daily.sensor_names == ["a", "b"]
+    assert int(daily.counts[0, 0]) == 120
+    assert int(daily.counts[0, 1]) == 0
+    assert daily.means[0, 0] == pytest.approx(2.0)
+    assert np.isnan(daily.means[0, 1])
+
+
+def test_overlapping_fetch_is_not_counted_twice(service):
+    service.update(SCHEMAS, _rows(START, 120))
+    service.update(SCHEMAS, _rows(START + datetime.timedelta(minutes=60), 120, value=4.0))
+
+    daily = service.read("1d")
+    assert int(daily.counts[0, 0]) == 180
+    assert float(daily.sums[0, 0]) == pytest.approx(60 * 2.0 + 120 * 4.0)
+
+
+def test_late_rows_beyond_minute_retention_are_dropped_and_reported(service):
+    service.update(SCHEMAS, _rows(START, 60))
+    late_start = START - datetime.timedelta(days=3)
+    fetch = {**_rows(late_start, 10), **_rows(START + datetime.timedelta(minutes=60), 1)}
+
+    first = service.update(SCHEMAS, fetch)
+    # 同じ遅延データを再取得しても重複して数えない
+    second = service.update(SCHEMAS, fetch)
+
+    assert first["late_rows_dropped"] == second["late_rows_dropped"] == 10
+    late_ms = int(late_start.replace(tzinfo=datetime.timezone.utc).timestamp() * 1000)
+    assert service.read("5m", late_ms, late_ms + 600_000).counts.sum() == 0
+    assert int(service.read("1d").counts[:, 0].sum()) == 61
+
+
+def test_sensor_changes_are_matched_by_name(service):
+    service.update(SCHEMAS, _rows(START, 5))
+    renamed = [SensorSchema(name="c", unit="", type="float"), SCHEMAS[0]]
+    service.update(renamed, {
+        (START + datetime.timedelta(minutes=5)).strftime("%Y-%m-%dT%H:%M:%S"): [
+            MeasurementPoint(min_value=0.0, max_value=0.0), MeasurementPoint(min_value=1.0, max_value=3.0)
+        ]
+    })
+
+    minutes = service.read("1m")
+    assert minutes.sensor_names == ["c", "a"]
+    assert minutes.counts[:, 1].tolist() == [1] * 6
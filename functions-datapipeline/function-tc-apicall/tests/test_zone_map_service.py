@@ -0,0 +1,72 @@
+import os
+
+import pytest
+
+from src.repositories.storage_repository import LocalStorageRepository
+from src.services.zone_map_service import ZoneMapIndexService
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return LocalStorageRepository(str(tmp_path))
+
+
+@pytest.fixture
+def service(storage):
+    return ZoneMapIndexService(storage, "source")
+
+
+def _object(path, sensors, first="2026-10-01T00:00:00", last="2026-10-01T01:00:00"):
+    return {"path": path, "sensors": sensors, "first_timestamp": first, "last_timestamp": last, "row_count": 61}
+
+
+def test_record_and_find_round_trip(storage, service):
+    storage.upload_bytes(b"a", "timeseries_data/first.csv")
+    storage.upload_bytes(b"b", "timeseries_data/second.csv")
+
+    result = service.record([
+        _object("timeseries_data/first.csv", ["temperature", "humidity"]),
+        _object("timeseries_data/second.csv", ["pressure"], "2026-10-02T00:00:00", "2026-10-02T01:00:00"),
+    ])
+
+    assert result["objects_recorded"] == 2
+    october_first_ms = 1790812800000
+    found = service.find(start_ms=october_first_ms, end_ms=october_first_ms + 3_600_000)
+    assert [entry["path"] for entry in found] == ["timeseries_data/first.csv"]
+    assert found[0]["row_count"] == 61
+    assert found[0]["size_bytes"] == 1
+    assert [entry["path"] for entry in service.find(sensor="pressure")] == ["timeseries_data/second.csv"]
+    assert [entry["path"] for entry in service.find()] == ["timeseries_data/first.csv", "timeseries_data/second.csv"]
+
+
+def test_missing_objects_are_not_recorded(service):
+    result = service.record([_object("timeseries_data/missing.csv", ["temperature"])])
+
+    assert result["objects_recorded"] == 0
+    assert service.find() == []
+
+
+def test_deleted_and_rewritten_objects_are_pruned(storage, service):
+    for name in ("kept", "deleted", "rewritten"):
+        storage.upload_bytes(b"1", f"timeseries_data/{name}.csv")
+    service.record([_object(f"timeseries_data/{name}.csv", ["temperature"]) for name in ("kept", "deleted", "rewritten")])
+
+    os.unlink(os.path.join(storage.base_path, "timeseries_data/deleted.csv"))
+    storage.upload_bytes(b"22", "timeseries_data/rewritten.csv")
+    storage.upload_bytes(b"1", "timeseries_data/added.csv")
+    result = service.record([_object("timeseries_data/added.csv", ["temperature"])])
+
+    assert result["objects_removed"] == 2
+    assert sorted(entry["path"] for entry in service.find()) == ["timeseries_data/added.csv", "timeseries_data/kept.csv"]
+
+
+def test_rerecording_a_rewritten_object_updates_its_entry(storage, service):
+    storage.upload_bytes(b"1", "timeseries_partitions/source/2026-10-01.csv")
+    service.record([_object("timeseries_partitions/source/2026-10-01.csv", ["temperature"])])
+    storage.upload_bytes(b"123", "timeseries_partitions/source/2026-10-01.csv")
+
+    service.record([_object("timeseries_partitions/source/2026-10-01.csv", ["temperature"], last="2026-10-01T23:59:00")])
+
+    (entry,) = service.find()
+    assert entry["size_bytes"] == 3
+    assert entry["generation"] == storage.get_object_metadata("timeseries_partitions/source/2026-10-01.csv")["generation"]